@@ -0,0 +1,63 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Throughput of wikitext escaping, in MB/s.
+
+Doesn't need Office, run with any Python 3:
+    python non-oxt-files/benchmarks/escaper_benchmark.py
+"""
+
+
+import sys
+import time
+from os.path import dirname, join, abspath, pardir
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.WikiTextEscaper import WikiTextEscaper
+
+
+# plain prose is the common case, the rest are adversarial texts with lots of wikitext-significant sequences
+SAMPLES = {
+    'prose':       'The quick brown fox jumps over the lazy dog, again and again. ' * 16,
+    'markup-like': "*#:; [[link]] {{template|a=b}} ''italic'' '''bold''' ~~~~ __TOC__ <b>&amp; [http://x y]\n" * 16,
+    'quotes':      "'" * 1000,
+    'line starts': '\n'.join(['* a', '# b', ': c', '; d', '= e =', '----', '{|', ' pre']) * 16,
+    'nbsp':        'non\u00A0breaking\u2011text ' * 64,
+}
+
+CONTEXTS = {
+    'plain':    {},
+    'template': {'atLineStart': True, 'insideTemplate': True},
+    'link':     {'insideLink': True},
+}
+
+TARGET_SECONDS = 0.5
+
+
+def measure(text, kwargs):
+    iterations = 0
+    started = time.perf_counter()
+    elapsed = 0
+    while elapsed < TARGET_SECONDS:
+        for _ in range(100):
+            WikiTextEscaper.escape(text, **kwargs)
+        iterations += 100
+        elapsed = time.perf_counter() - started
+
+    megabytes = len(text.encode('utf-8')) * iterations / 1024 / 1024
+    return megabytes / elapsed
+
+
+def main():
+    print('{:<12} {:<10} {:>8}'.format('sample', 'context', 'MB/s'))
+    for sampleName, text in SAMPLES.items():
+        for contextName, kwargs in CONTEXTS.items():
+            print('{:<12} {:<10} {:>8.1f}'.format(sampleName, contextName, measure(text, kwargs)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Time of paragraphs enumeration with and without ExtractionSession (locked controllers etc).
+
+Run with Python interpreter from LibreOffice's distribution, Office must be started with
+    soffice --writer --accept="socket,port=2002;urp;StarOffice.ServiceManager"
+
+    python extraction_session_benchmark.py <path to .odt> [repeats]
+
+Use big documents (thousands of paragraphs), otherwise the difference is within noise.
+"""
+
+
+import sys
+import time
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+import uno
+
+from writer2wiki.main import getOfficeAppContext
+from writer2wiki.convert.ConversionSettings import ConversionSettings
+from writer2wiki.convert.WikiConverter import WikiConverter
+from writer2wiki.w2w_office.extraction_session import ExtractionSession
+from writer2wiki.w2w_office.service import Service
+
+
+def timeExtraction(context, document, docPath, useSession):
+    converter = WikiConverter(context)
+    converter._document = document
+    settings = ConversionSettings(docPath)
+
+    started = time.perf_counter()
+    if useSession:
+        with ExtractionSession(document):
+            converter._convertXTextObject(document.getText(), settings)
+    else:
+        converter._convertXTextObject(document.getText(), settings)
+    return time.perf_counter() - started
+
+
+def main():
+    docPath = Path(sys.argv[1]).resolve()
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    context = getOfficeAppContext()
+    desktop = Service.create(Service.DESKTOP, context)
+    document = desktop.loadComponentFromURL(uno.systemPathToFileUrl(str(docPath)), '_blank', 0, ())
+    try:
+        print('paragraphs:', document.ParagraphCount)
+        for useSession in (False, True, False, True):
+            times = [timeExtraction(context, document, docPath, useSession) for _ in range(repeats)]
+            print('{:<16} best {:.3f} s, mean {:.3f} s'.format('with session' if useSession else 'without session',
+                                                              min(times), sum(times) / len(times)))
+    finally:
+        document.close(True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Generator of .odt documents of any size for benchmarks, modeled on `non-oxt-files/examples/wiki-sample.odt`.
+
+Documents are written directly as ODF (zip with XML files), Office is not needed. Each document is generated
+together with its extracted content in the format of `Paragraph.toDict()` - what conversion would read from it in
+Office - so that the rest of conversion can be benchmarked without Office too.
+
+    python odt_corpus.py <output folder> [paragraphs counts, e.g. 10,1000,100000]
+
+Density parameters are fractions from 0 to 1, see `CorpusParams`.
+"""
+
+
+import json
+import random
+import sys
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+
+CorpusParams = namedtuple('CorpusParams', [
+    'paragraphs',   # number of body paragraphs (headings, list items and footnotes are not counted)
+    'formatting',   # fraction of words with direct formatting (bold, italic, color etc)
+    'styles',       # fraction of paragraphs with custom paragraph style, and of words with custom character style
+    'lists',        # fraction of paragraphs which start a list
+    'links',        # fraction of paragraphs with a hyperlink
+    'footnotes',    # fraction of paragraphs with a footnote
+    'seed',
+])
+CorpusParams.__new__.__defaults__ = (0.1, 0.05, 0.05, 0.1, 0.05, 1)
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+HEADING_EVERY = 50
+LIST_LENGTH = 5
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et dolore '
+         'magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo '
+         'consequat').split()
+
+CUSTOM_PARAGRAPH_STYLE = 'Corpus Quote'
+CUSTOM_CHAR_STYLE = 'Corpus Term'
+
+# automatic text style => its ODF text properties and UNO properties, as `TextPortion` reads them
+DIRECT_FORMATS = {
+    'T1': ('fo:font-weight="bold"', [['CharWeight', 150.0]]),
+    'T2': ('fo:font-style="italic"', [['CharPosture', 'ITALIC']]),
+    'T3': ('fo:font-weight="bold" fo:font-style="italic"', [['CharPosture', 'ITALIC'], ['CharWeight', 150.0]]),
+    'T4': ('fo:color="#ff6600"', [['CharColor', 0xFF6600]]),
+    'T5': ('style:text-underline-style="solid" style:text-underline-width="auto" '
+           'style:text-underline-color="font-color"', [['CharUnderline', 1]]),
+    'T6': ('style:text-line-through-style="solid"', [['CharStrikeout', 1]]),
+    'T7': ('style:text-position="super 58%"', [['CharEscapement', 33]]),
+}
+
+_NS = ('xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+       'xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0" '
+       'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+       'xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0" '
+       'xmlns:xlink="http://www.w3.org/1999/xlink" office:version="1.2"')
+
+_MANIFEST = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" '
+             'manifest:version="1.2">'
+             '<manifest:file-entry manifest:full-path="/" manifest:version="1.2" '
+             'manifest:media-type="application/vnd.oasis.opendocument.text"/>'
+             '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+             '<manifest:file-entry manifest:full-path="styles.xml" manifest:media-type="text/xml"/>'
+             '</manifest:manifest>')
+
+_STYLES = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<office:document-styles ' + _NS + '><office:styles>'
+           '<style:style style:name="Standard" style:family="paragraph" style:class="text"/>'
+           '<style:style style:name="Heading" style:family="paragraph" style:parent-style-name="Standard">'
+           '<style:text-properties fo:font-size="14pt"/></style:style>'
+           '<style:style style:name="Heading_20_1" style:display-name="Heading 1" style:family="paragraph" '
+           'style:parent-style-name="Heading" style:default-outline-level="1">'
+           '<style:text-properties fo:font-size="130%" fo:font-weight="bold"/></style:style>'
+           '<style:style style:name="Footnote" style:family="paragraph" style:parent-style-name="Standard">'
+           '<style:text-properties fo:font-size="10pt"/></style:style>'
+           '<style:style style:name="Corpus_20_Quote" style:display-name="' + CUSTOM_PARAGRAPH_STYLE + '" '
+           'style:family="paragraph" style:parent-style-name="Standard">'
+           '<style:paragraph-properties fo:margin-left="1cm"/></style:style>'
+           '<style:style style:name="Corpus_20_Term" style:display-name="' + CUSTOM_CHAR_STYLE + '" '
+           'style:family="text"><style:text-properties fo:font-variant="small-caps"/></style:style>'
+           '<text:list-style style:name="Numbering_20_123" style:display-name="Numbering 123">'
+           '<text:list-level-style-number text:level="1" style:num-format="1" style:num-suffix="."/>'
+           '<text:list-level-style-number text:level="2" style:num-format="1" style:num-suffix="."/>'
+           '</text:list-style>'
+           '<text:list-style style:name="List_20_1" style:display-name="List 1">'
+           '<text:list-level-style-bullet text:level="1" text:bullet-char="•"/>'
+           '<text:list-level-style-bullet text:level="2" text:bullet-char="◦"/>'
+           '</text:list-style>'
+           '</office:styles></office:document-styles>')
+
+
+class _Run:
+    def __init__(self, text, formatName=None, charStyle=False, link=None):
+        self.text = text
+        self.formatName = formatName
+        self.charStyle = charStyle
+        self.link = link
+
+    def toXml(self):
+        xml = escape(self.text)
+        if self.formatName is not None:
+            xml = '<text:span text:style-name="{}">{}</text:span>'.format(self.formatName, xml)
+        if self.charStyle:
+            xml = '<text:span text:style-name="Corpus_20_Term">{}</text:span>'.format(xml)
+        if self.link is not None:
+            xml = '<text:a xlink:type="simple" xlink:href={}>{}</text:a>'.format(quoteattr(self.link), xml)
+        return xml
+
+    def toDict(self):
+        properties = [['HyperLinkURL', self.link]] if self.link is not None else []
+        if self.formatName is not None:
+            properties += DIRECT_FORMATS[self.formatName][1]
+        return {'text': self.text, 'style': CUSTOM_CHAR_STYLE if self.charStyle else '', 'properties': properties}
+
+
+class _Footnote:
+    def __init__(self, number, text):
+        self.number = number
+        self.text = text
+
+    def toXml(self):
+        return ('<text:note text:id="ftn{0}" text:note-class="footnote"><text:note-citation>{0}</text:note-citation>'
+                '<text:note-body><text:p text:style-name="Footnote">{1}</text:p></text:note-body></text:note>'
+                .format(self.number, escape(self.text)))
+
+    def toDict(self):
+        paragraph = {'style': 'Footnote', 'outlineLevel': 0, 'listLevel': 0, 'numbered': False,
+                     'portions': [{'text': self.text, 'style': '', 'properties': []}]}
+        return {'caption': str(self.number), 'footnote': [paragraph]}
+
+
+class _Paragraph:
+    def __init__(self, styleName, parts, outlineLevel=0, listLevel=0, numbered=False):
+        """ :param parts: list of `_Run` and `_Footnote` """
+        self.styleName = styleName
+        self.parts = parts
+        self.outlineLevel = outlineLevel
+        self.listLevel = listLevel
+        self.numbered = numbered
+
+    def toXml(self):
+        styleAttr = self.styleName.replace(' ', '_20_')
+        content = ''.join(p.toXml() for p in self.parts)
+        if self.outlineLevel > 0:
+            return '<text:h text:style-name="{}" text:outline-level="{}">{}</text:h>'.format(
+                styleAttr, self.outlineLevel, content)
+        return '<text:p text:style-name="{}">{}</text:p>'.format(styleAttr, content)
+
+    def toDict(self):
+        return {'style': self.styleName, 'outlineLevel': self.outlineLevel, 'listLevel': self.listLevel,
+                'numbered': self.numbered, 'portions': [p.toDict() for p in self.parts]}
+
+
+def _makeParts(rnd: random.Random, params: CorpusParams, footnoteNumber):
+    """ :return: (list of `_Run` and `_Footnote`, next footnote number) """
+    words = [rnd.choice(WORDS) for _ in range(rnd.randint(20, 60))]
+    linkAt = rnd.randrange(len(words)) if rnd.random() < params.links else None
+
+    parts = []
+    plain = []
+
+    def flushPlain():
+        if plain:
+            parts.append(_Run(' '.join(plain) + ' '))
+            plain.clear()
+
+    for index, word in enumerate(words):
+        formatName = rnd.choice(sorted(DIRECT_FORMATS)) if rnd.random() < params.formatting else None
+        charStyle = rnd.random() < params.styles
+        link = 'https://example.org/{}/{}'.format(word, index) if index == linkAt else None
+        if formatName is None and not charStyle and link is None:
+            plain.append(word)
+            continue
+
+        flushPlain()
+        parts.append(_Run(word, formatName, charStyle, link))
+        plain.append('')  # space after the formatted word
+
+    flushPlain()
+
+    if rnd.random() < params.footnotes:
+        parts.append(_Footnote(footnoteNumber, 'See {} {}, p. {}.'.format(
+            rnd.choice(WORDS).capitalize(), rnd.choice(WORDS), rnd.randint(1, 300))))
+        footnoteNumber += 1
+
+    return parts, footnoteNumber
+
+
+def generateParagraphs(params: CorpusParams):
+    """ :return List[_Paragraph]: document's top level paragraphs """
+    rnd = random.Random(params.seed)
+    paragraphs = []
+    footnoteNumber = 1
+    for index in range(params.paragraphs):
+        if index % HEADING_EVERY == 0:
+            paragraphs.append(_Paragraph('Heading 1', [_Run('Chapter {}'.format(index // HEADING_EVERY + 1))],
+                                         outlineLevel=1))
+
+        if rnd.random() < params.lists:
+            numbered = rnd.random() < 0.5
+            for itemIndex in range(LIST_LENGTH):
+                parts, footnoteNumber = _makeParts(rnd, params, footnoteNumber)
+                paragraphs.append(_Paragraph('Standard', parts, listLevel=1 + itemIndex % 2, numbered=numbered))
+
+        styleName = CUSTOM_PARAGRAPH_STYLE if rnd.random() < params.styles else 'Standard'
+        parts, footnoteNumber = _makeParts(rnd, params, footnoteNumber)
+        paragraphs.append(_Paragraph(styleName, parts))
+
+    return paragraphs
+
+
+def _bodyXml(paragraphs):
+    """ List items are nested into <text:list> elements, one list for each run of items """
+    xml = []
+    openLevels = 0
+    for para in paragraphs:
+        if para.listLevel == 0:
+            xml.append('</text:list-item></text:list>' * openLevels)
+            openLevels = 0
+            xml.append(para.toXml())
+            continue
+
+        if openLevels == 0:
+            listStyle = 'Numbering_20_123' if para.numbered else 'List_20_1'
+            xml.append('<text:list text:style-name="{}"><text:list-item>'.format(listStyle))
+            openLevels = 1
+        else:
+            while openLevels > para.listLevel:
+                xml.append('</text:list-item></text:list>')
+                openLevels -= 1
+            xml.append('</text:list-item><text:list-item>' if openLevels == para.listLevel else '')
+
+        while openLevels < para.listLevel:
+            xml.append('<text:list><text:list-item>')
+            openLevels += 1
+        xml.append(para.toXml())
+
+    xml.append('</text:list-item></text:list>' * openLevels)
+    return ''.join(xml)
+
+
+def writeDocument(path: Path, params: CorpusParams):
+    """ Write .odt document and its extracted content to `<path>.json`
+
+    :return List[dict]: document's paragraphs in the format of `Paragraph.toDict()`
+    """
+    paragraphs = generateParagraphs(params)
+
+    autoStyles = ''.join('<style:style style:name="{}" style:family="text"><style:text-properties {}/></style:style>'
+                         .format(name, xmlProperties) for name, (xmlProperties, _) in sorted(DIRECT_FORMATS.items()))
+    content = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<office:document-content ' + _NS + '>'
+               '<office:automatic-styles>' + autoStyles + '</office:automatic-styles>'
+               '<office:body><office:text>' + _bodyXml(paragraphs) + '</office:text></office:body>'
+               '</office:document-content>')
+
+    with zipfile.ZipFile(str(path), 'w') as odt:
+        # must be the first entry and not compressed, see ODF specification, section "MIME type stream"
+        odt.writestr('mimetype', 'application/vnd.oasis.opendocument.text', compress_type=zipfile.ZIP_STORED)
+        odt.writestr('META-INF/manifest.xml', _MANIFEST, compress_type=zipfile.ZIP_DEFLATED)
+        odt.writestr('styles.xml', _STYLES, compress_type=zipfile.ZIP_DEFLATED)
+        odt.writestr('content.xml', content, compress_type=zipfile.ZIP_DEFLATED)
+
+    paragraphDicts = [p.toDict() for p in paragraphs]
+    with open(str(path) + '.json', 'w', encoding='utf-8') as f:
+        json.dump(paragraphDicts, f, ensure_ascii=False)
+
+    return paragraphDicts
+
+
+def main():
+    folder = Path(sys.argv[1])
+    sizes = [int(s) for s in sys.argv[2].split(',')] if len(sys.argv) > 2 else DEFAULT_SIZES
+    folder.mkdir(parents=True, exist_ok=True)
+
+    for size in sizes:
+        path = folder / 'corpus-{}.odt'.format(size)
+        writeDocument(path, CorpusParams(size))
+        print('written', path)
+
+
+if __name__ == '__main__':
+    main()
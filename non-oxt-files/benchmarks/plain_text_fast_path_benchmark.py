@@ -0,0 +1,112 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Extraction time with and without plain text fast path (see `BaseConverter._isPlainText()`).
+
+Run with Python interpreter from LibreOffice's distribution, Office must be started with
+    soffice --writer --accept="socket,port=2002;urp;StarOffice.ServiceManager"
+
+    python plain_text_fast_path_benchmark.py [path to .odt] [repeats]
+
+Without a document path, a prose-heavy document is generated: PARAGRAPHS_COUNT paragraphs of plain text, every
+FORMATTED_EVERY-th of them has a bold word. Conversion results of both ways are compared, they must be the same.
+"""
+
+
+import sys
+import tempfile
+import time
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+import uno
+
+from writer2wiki.main import getOfficeAppContext
+from writer2wiki.convert.ConversionSettings import ConversionSettings
+from writer2wiki.convert.WikiConverter import WikiConverter
+from writer2wiki.w2w_office.extraction_session import ExtractionSession
+from writer2wiki.w2w_office.service import Service
+
+
+PARAGRAPHS_COUNT = 2000
+FORMATTED_EVERY = 10
+PROSE = 'The quick brown fox jumps over the lazy dog, again and again. ' * 6
+
+
+def generateDocument(desktop, docPath: Path):
+    document = desktop.loadComponentFromURL('private:factory/swriter', '_blank', 0, ())
+    text = document.getText()
+    cursor = text.createTextCursor()
+    for i in range(PARAGRAPHS_COUNT):
+        if i % FORMATTED_EVERY == 0:
+            text.insertString(cursor, PROSE, False)
+            cursor.CharWeight = 150.0  # FontWeight.BOLD
+            text.insertString(cursor, 'bold', False)
+            cursor.CharWeight = 100.0  # FontWeight.NORMAL
+        else:
+            text.insertString(cursor, PROSE, False)
+        text.insertControlCharacter(cursor, 0, False)  # ControlCharacter.PARAGRAPH_BREAK
+
+    document.storeToURL(uno.systemPathToFileUrl(str(docPath)), ())
+    document.close(True)
+
+
+def convert(context, document, docPath, useFastPath):
+    converter = WikiConverter(context)
+    converter._document = document
+    converter.USE_PLAIN_TEXT_FAST_PATH = useFastPath
+    settings = ConversionSettings(docPath)
+
+    started = time.perf_counter()
+    with ExtractionSession(document):
+        converter._convertXTextObject(document.getText(), settings)
+    elapsed = time.perf_counter() - started
+
+    converter._prepareParagraphs(settings)
+    return elapsed, converter.getResult(), converter._plainParagraphsCount
+
+
+def main():
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    context = getOfficeAppContext()
+    desktop = Service.create(Service.DESKTOP, context)
+
+    if len(sys.argv) > 1:
+        docPath = Path(sys.argv[1]).resolve()
+    else:
+        docPath = Path(tempfile.mkdtemp()) / 'prose.odt'
+        generateDocument(desktop, docPath)
+
+    document = desktop.loadComponentFromURL(uno.systemPathToFileUrl(str(docPath)), '_blank', 0, ())
+    try:
+        print('paragraphs:', document.ParagraphCount)
+        results = {}
+        for useFastPath in (False, True) * repeats:
+            elapsed, result, plainCount = convert(context, document, docPath, useFastPath)
+            results.setdefault(useFastPath, []).append(elapsed)
+            if useFastPath:
+                print('read as plain text:', plainCount)
+
+            if results.setdefault(('result', useFastPath), result) != result:
+                print('ERR: results of the same conversion differ')
+
+        for useFastPath in (False, True):
+            times = results[useFastPath]
+            print('{:<14} best {:.3f} s, mean {:.3f} s'.format('fast path' if useFastPath else 'portions',
+                                                                min(times), sum(times) / len(times)))
+
+        if results[('result', False)] != results[('result', True)]:
+            print('ERR: fast path result differs from portions enumeration')
+            sys.exit(1)
+    finally:
+        document.close(True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" End-to-end conversion time and peak memory by document size, on documents generated by `odt_corpus.py`.
+
+    python scaling_benchmark.py [paragraphs counts, e.g. 10,1000,100000] [--office | --no-office]
+
+With `soffice` in PATH and `uno` importable (run with Python interpreter from LibreOffice's distribution), each
+document is converted in a fresh headless Office: extraction, rendering and post-processing, output files are not
+saved. Otherwise only Office-independent part of conversion is measured: content generated together with the
+document (as it would be extracted) is rendered to wiki-text.
+
+Each size is converted in a separate Python process, peak RSS is its max resident set size, plus soffice.bin's one
+on Linux. Time per paragraph is compared with the previous size, growth of it means superlinear scaling.
+"""
+
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from odt_corpus import CorpusParams, DEFAULT_SIZES, writeDocument
+
+
+OFFICE_PORT = 2003
+CONNECT_TIMEOUT = 60
+CHILD_ARG = '--child'
+
+
+def peakRssKib():
+    """ :return int|None: max resident set size of this process in KiB, None if it can't be measured """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxRss // 1024 if sys.platform == 'darwin' else maxRss  # bytes on macOS, KiB on Linux
+
+
+def convertWithoutOffice(docPath: Path):
+    import json
+    from writer2wiki.convert.ConversionSettings import ConversionSettings
+    from writer2wiki.convert.Paragraph import Paragraph
+    from writer2wiki.convert.WikiConverter import WikiConverter
+
+    with open(str(docPath) + '.json', encoding='utf-8') as f:
+        paragraphDicts = json.load(f)
+
+    started = time.perf_counter()
+    converter = WikiConverter(None)
+    converter._paragraphs = [Paragraph.fromDict(p) for p in paragraphDicts]
+    settings = ConversionSettings(docPath)
+    converter._prepareParagraphs(settings)
+    outputFiles = converter.getOutputFiles(docPath.with_suffix(converter.getFileExtension()), settings)
+    return time.perf_counter() - started, sum(len(content) for _, content in outputFiles)
+
+
+def convertInOffice(docPath: Path):
+    import uno
+    from writer2wiki.convert.WikiConverter import WikiConverter
+
+    localContext = uno.getComponentContext()
+    resolver = localContext.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver',
+                                                                     localContext)
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while True:
+        try:
+            context = resolver.resolve('uno:socket,host=localhost,port={};urp;StarOffice.ComponentContext'
+                                       .format(OFFICE_PORT))
+            break
+        except Exception:  # NoConnectException: Office is still starting
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+    desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+    hidden = uno.createUnoStruct('com.sun.star.beans.PropertyValue')
+    hidden.Name, hidden.Value = 'Hidden', True
+    document = desktop.loadComponentFromURL(uno.systemPathToFileUrl(str(docPath)), '_blank', 0, (hidden,))
+
+    started = time.perf_counter()
+    converter = WikiConverter(context)
+    converter._document = document  # hidden document is not the current component
+    settings = converter._makeConversionSettings(docPath)
+    converter._extractText(document.getText(), settings)
+    converter._prepareParagraphs(settings)
+    outputFiles = converter.getOutputFiles(docPath.with_suffix(converter.getFileExtension()), settings)
+    elapsed = time.perf_counter() - started
+
+    document.close(True)
+    return elapsed, sum(len(content) for _, content in outputFiles)
+
+
+def runChild(mode, docPath):
+    """ Runs in a separate process. Prints seconds spent on conversion, size of result and peak RSS """
+    convert = convertInOffice if mode == 'office' else convertWithoutOffice
+    elapsed, resultSize = convert(Path(docPath))
+    print('{:.6f} {} {}'.format(elapsed, resultSize, peakRssKib() or 0))
+
+
+def startOffice(profileDir):
+    return subprocess.Popen(['soffice', '--headless', '--invisible', '--norestore', '--nologo',
+                             '-env:UserInstallation=' + Path(profileDir).as_uri(),
+                             '--accept=socket,host=localhost,port={};urp;'.format(OFFICE_PORT)],
+                            start_new_session=True)
+
+
+def officePeakRssKib(profileDir):
+    """ :return int|None: VmHWM of soffice.bin started with `profileDir`, Linux only """
+    procDir = Path('/proc')
+    if not procDir.exists():
+        return None
+
+    for cmdline in procDir.glob('[0-9]*/cmdline'):
+        try:
+            if b'soffice.bin' in cmdline.read_bytes() and Path(profileDir).as_uri().encode() in cmdline.read_bytes():
+                for line in (cmdline.parent / 'status').read_text().splitlines():
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1])
+        except OSError:  # process has exited
+            continue
+    return None
+
+
+def stopOffice(office: subprocess.Popen):
+    try:
+        os.killpg(office.pid, signal.SIGTERM)
+    except AttributeError:  # Windows
+        office.terminate()
+    office.wait()
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    sizes = [int(s) for s in args[0].split(',')] if args else DEFAULT_SIZES
+
+    canUseOffice = shutil.which('soffice') is not None
+    try:
+        import uno
+    except ImportError:
+        canUseOffice = False
+
+    useOffice = '--office' in sys.argv or (canUseOffice and '--no-office' not in sys.argv)
+    mode = 'office' if useOffice else 'model'
+    print('converting {}'.format('in headless Office' if useOffice else 'without Office (rendering only)'))
+
+    folder = Path(tempfile.mkdtemp(prefix='w2w-corpus-'))
+    print('{:>10} {:>10} {:>14} {:>12} {:>14} {:>14}'.format(
+        'paragraphs', 'time, s', 'ms/paragraph', 'result, KB', 'peak RSS, MB', 'Office RSS, MB'))
+
+    previousPerParagraph = None
+    for size in sizes:
+        docPath = folder / 'corpus-{}.odt'.format(size)
+        writeDocument(docPath, CorpusParams(size))
+
+        office = None
+        officeRss = None
+        profileDir = folder / 'office-profile'
+        if useOffice:
+            office = startOffice(profileDir)
+        try:
+            output = subprocess.check_output([sys.executable, __file__, CHILD_ARG, mode, str(docPath)],
+                                             universal_newlines=True)
+            if useOffice:
+                officeRss = officePeakRssKib(profileDir)
+        finally:
+            if office is not None:
+                stopOffice(office)
+
+        elapsed, resultSize, rss = output.split()[-3:]
+        elapsed = float(elapsed)
+        perParagraph = elapsed * 1000 / size
+        growth = '' if previousPerParagraph is None else ' (x{:.2f})'.format(perParagraph / previousPerParagraph)
+        previousPerParagraph = perParagraph
+
+        print('{:>10} {:>10.3f} {:>14} {:>12.1f} {:>14.1f} {:>14}'.format(
+            size, elapsed, '{:.4f}{}'.format(perParagraph, growth), int(resultSize) / 1024, int(rss) / 1024,
+            '-' if officeRss is None else '{:.1f}'.format(officeRss / 1024)))
+
+    shutil.rmtree(str(folder), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 3 and sys.argv[1] == CHILD_ARG:
+        runChild(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,87 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Cold start time: from extension's command to the first read paragraph.
+
+Each run is done in a new Python process, so that our modules are imported from scratch as they are on the first
+click in a fresh Office. Connection to Office and loading of the document are not measured.
+
+Run with Python interpreter from LibreOffice's distribution, Office must be started with
+    soffice --writer --accept="socket,port=2002;urp;StarOffice.ServiceManager"
+
+    python startup_benchmark.py <path to .odt> [runs]
+
+Exit code is 1 if median time exceeds the budget (WRITER2WIKI_STARTUP_BUDGET seconds, 1 by default).
+"""
+
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from os.path import dirname, join, abspath, pardir
+
+REPO_ROOT = abspath(join(dirname(__file__), pardir, pardir))
+CHILD_ARG = '--child'
+
+
+def runChild(docPath):
+    """ Runs in a separate process. Prints seconds spent from 'command' to the first read paragraph """
+    import uno
+
+    localContext = uno.getComponentContext()
+    resolver = localContext.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver',
+                                                                     localContext)
+    context = resolver.resolve('uno:socket,host=localhost,port=2002;urp;StarOffice.ComponentContext')
+    desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+    desktop.loadComponentFromURL(uno.systemPathToFileUrl(docPath), '_default', 0, ())
+
+    # same as in `Writer2WikiComp.trigger()`, everything below is what happens after user's click
+    startedAt = time.perf_counter()
+
+    sys.path.append(join(REPO_ROOT, 'writer2wiki'))
+    import main  # as Office loads it: not as a part of package
+    from writer2wiki.convert.WikiConverter import WikiConverter
+    imported = time.perf_counter()
+
+    converter = WikiConverter(context, startedAt=startedAt)
+    if not converter.checkCanConvert():
+        raise RuntimeError("can't convert current document")
+    settings = converter._makeConversionSettings(converter.getDocumentPath())
+    converter._extractText(converter._document.getText(), settings, paragraphRange=range(0, 1))
+    finished = time.perf_counter()
+
+    print('{:.6f} {:.6f}'.format(imported - startedAt, finished - startedAt))
+
+
+def main():
+    docPath = abspath(sys.argv[1])
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    budget = float(os.environ.get('WRITER2WIKI_STARTUP_BUDGET', 1.0))
+
+    importTimes = []
+    totalTimes = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, __file__, CHILD_ARG, docPath], universal_newlines=True)
+        importTime, totalTime = map(float, output.split()[-2:])
+        importTimes.append(importTime)
+        totalTimes.append(totalTime)
+
+    print('imports:          median {:.3f} s, max {:.3f} s'.format(statistics.median(importTimes), max(importTimes)))
+    print('first paragraph:  median {:.3f} s, max {:.3f} s'.format(statistics.median(totalTimes), max(totalTimes)))
+    print('budget:                  {:.3f} s'.format(budget))
+
+    if statistics.median(totalTimes) > budget:
+        print('OVER BUDGET')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == CHILD_ARG:
+        runChild(sys.argv[2])
+    else:
+        main()
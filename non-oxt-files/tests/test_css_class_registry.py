@@ -0,0 +1,112 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Replacing inline styles with classes of TemplateStyles stylesheet, see `CssClassRegistry` """
+
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.CssClassRegistry import CssClassRegistry
+from writer2wiki.util import lockFile
+
+
+RED = '<span style="color:red">'
+BLUE = '<span style="color:blue">'
+
+
+class CssClassRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpDir = tempfile.TemporaryDirectory()
+        self.stylesheet = Path(self._tmpDir.name) / 'Styles.css'
+
+    def tearDown(self):
+        self._tmpDir.cleanup()
+
+    def convertInFolder(self, parts):
+        """ Replace styles of a document the way per-folder mode of `WikiConverter` does """
+        registry = CssClassRegistry(self.stylesheet)
+        with lockFile(registry.getPath()):
+            registry.load()
+            parts = registry.replaceInlineStylesInParts(parts)
+            registry.save()
+        return parts
+
+    def testTemplateStylesIsIncluded(self):
+        registry = CssClassRegistry(self.stylesheet)
+        self.assertEqual(registry.replaceInlineStyles('a ' + RED + 'b</span> ' + BLUE + 'c</span> ' + RED + '</span>'),
+                         '<templatestyles src="Styles.css" />\n'
+                         'a <span class="w2w-c1">b</span> <span class="w2w-c2">c</span> <span class="w2w-c1"></span>')
+        self.assertEqual(registry.getStylesheet(), '.w2w-c1 { color:red }\n.w2w-c2 { color:blue }\n')
+
+    def testTextWithoutStylesIsKept(self):
+        registry = CssClassRegistry(self.stylesheet)
+        self.assertEqual(registry.replaceInlineStylesInParts(['a', '<span>b</span>']), ['a', '<span>b</span>'])
+        self.assertTrue(registry.isEmpty())
+
+    def testTemplateStylesIsIncludedOnceForAllParts(self):
+        registry = CssClassRegistry(self.stylesheet)
+        self.assertEqual(registry.replaceInlineStylesInParts(['a', RED + 'b</span>']),
+                         ['<templatestyles src="Styles.css" />\na', '<span class="w2w-c1">b</span>'])
+
+    def testClassNamesAreStableAcrossDocuments(self):
+        self.assertEqual(self.convertInFolder([RED + 'a</span>']), ['<templatestyles src="Styles.css" />\n'
+                                                                    '<span class="w2w-c1">a</span>'])
+        self.assertEqual(self.convertInFolder([BLUE + 'b</span>' + RED + 'c</span>'])[0],
+                         '<templatestyles src="Styles.css" />\n'
+                         '<span class="w2w-c2">b</span><span class="w2w-c1">c</span>')
+        self.assertEqual(self.stylesheet.read_text(encoding='utf-8'), '.w2w-c1 { color:red }\n.w2w-c2 { color:blue }\n')
+        # lock file is not left in user's folder
+        self.assertEqual([path.name for path in self.stylesheet.parent.iterdir()], ['Styles.css'])
+
+    def testStylesheetIsNotWrittenWithoutNewClasses(self):
+        self.convertInFolder([RED + 'a</span>'])
+        os.utime(str(self.stylesheet), ns=(0, 0))
+        self.convertInFolder([RED + 'b</span>'])
+        self.assertEqual(self.stylesheet.stat().st_mtime_ns, 0)
+
+    def testOtherContentOfStylesheetIsKept(self):
+        userContent = '/* edited by user */\n.w2w-c1 { color:red }\n.note { color:gray }'
+        self.stylesheet.write_text(userContent, encoding='utf-8')
+        self.convertInFolder([RED + 'a</span>' + BLUE + 'b</span>'])
+        self.assertEqual(self.stylesheet.read_text(encoding='utf-8'), userContent + '\n.w2w-c2 { color:blue }\n')
+
+    def testNumbersOfDeletedRulesAreNotReused(self):
+        self.stylesheet.write_text('.w2w-c1 { color:red }\n.w2w-c5 { color:green }\n', encoding='utf-8')
+        self.assertIn('<span class="w2w-c6">', self.convertInFolder([BLUE + 'b</span>'])[0])
+
+    def testParallelConversions(self):
+        styles = ['<span style="font-size:{}pt">'.format(size) for size in range(8, 28)]
+        results = {}
+
+        def convert(number):
+            results[number] = self.convertInFolder([style + 'x</span>' for style in styles[number::4]])
+
+        threads = [threading.Thread(target=convert, args=(number,)) for number in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        registry = CssClassRegistry(self.stylesheet)
+        registry.load()
+        self.assertEqual(len(registry.getStylesheet().splitlines()), len(styles))
+        for number, parts in results.items():
+            # document's classes are the ones saved in the shared stylesheet
+            self.assertEqual(registry.replaceInlineStylesInParts([style + 'x</span>' for style in styles[number::4]]),
+                             parts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" MediaWiki XML dump of converted files, see `MediaWikiDumpWriter` and `FolderDump` """
+
+
+import gzip
+import json
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.MediaWikiDump import FolderDump, MediaWikiDumpWriter, pageTitleFromFile
+from writer2wiki.util import openW2wFile
+
+
+EXTENSION = '.wiki.txt'
+NS = {'mw': MediaWikiDumpWriter._XML_NS}
+
+
+class DumpTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpDir = tempfile.TemporaryDirectory()
+        self.folder = Path(self._tmpDir.name)
+
+    def tearDown(self):
+        self._tmpDir.cleanup()
+
+    def writePage(self, name, text):
+        path = self.folder / (name + EXTENSION)
+        with openW2wFile(path, 'w') as f:
+            f.write(text)
+        return path
+
+    @staticmethod
+    def readDump(dumpPath: Path):
+        """ :return list: (title, text) of every page revision in the dump """
+        if dumpPath.suffix == '.gz':
+            with gzip.open(str(dumpPath), 'rb') as f:
+                root = ElementTree.fromstring(f.read())
+        else:
+            root = ElementTree.parse(str(dumpPath)).getroot()
+        return [(page.find('mw:title', NS).text, page.find('mw:revision/mw:text', NS).text or '')
+                for page in root.findall('mw:page', NS)]
+
+
+class PageTitleTest(unittest.TestCase):
+
+    def testForbiddenCharsAreReplaced(self):
+        self.assertEqual(pageTitleFromFile(Path('Notes [draft] #1.wiki.txt'), EXTENSION), 'Notes -draft- -1')
+        self.assertEqual(pageTitleFromFile(Path('a{b}|c<d>.wiki.txt'), EXTENSION), 'a-b--c-d-')
+
+    def testAllowedCharsAreKept(self):
+        self.assertEqual(pageTitleFromFile(Path('Tom & Jerry: "x" (1).wiki.txt'), EXTENSION), 'Tom & Jerry: "x" (1)')
+
+
+class MediaWikiDumpWriterTest(DumpTestCase):
+
+    def testXmlIsEscaped(self):
+        text = "a < b && '''c''' > d <ref>x</ref>\n"
+        path = self.writePage('page', text)
+        dumpPath = self.folder / 'dump.xml'
+        with MediaWikiDumpWriter(dumpPath) as dump:
+            dump.addPageFromFile('Tom & Jerry <2>', path)
+
+        self.assertEqual(self.readDump(dumpPath), [('Tom & Jerry <2>', text)])
+        self.assertNotIn('<ref>', dumpPath.read_text(encoding='utf-8'))
+
+    def testFailedDumpIsNotWritten(self):
+        dumpPath = self.folder / 'dump.xml'
+        with self.assertRaises(RuntimeError):
+            with MediaWikiDumpWriter(dumpPath):
+                raise RuntimeError()
+        self.assertEqual(list(self.folder.iterdir()), [])
+
+    def testAppendAddsGzipMember(self):
+        first = self.writePage('first', 'one')
+        second = self.writePage('second', 'two')
+        dumpPath = self.folder / 'dump.xml.gz'
+        with MediaWikiDumpWriter(dumpPath) as dump:
+            dump.addPageFromFile('first', first)
+        sizeBefore = dumpPath.stat().st_size
+
+        appender = MediaWikiDumpWriter(dumpPath)
+        self.assertTrue(appender.append([('second', second)]))
+        self.assertEqual(appender.getWrittenSize(), len('two'))
+        self.assertEqual(self.readDump(dumpPath), [('first', 'one'), ('second', 'two')])
+
+        # the old members are kept as they are, new ones are written after them
+        with dumpPath.open('rb') as f:
+            start = f.read(sizeBefore - len(appender._encodedFooter()))
+        with gzip.open(str(dumpPath), 'rb') as f:
+            self.assertTrue(f.read().startswith(gzip.decompress(start)))
+
+    def testAppendToPlainDump(self):
+        dumpPath = self.folder / 'dump.xml'
+        with MediaWikiDumpWriter(dumpPath) as dump:
+            dump.addPageFromFile('first', self.writePage('first', 'one'))
+        self.assertTrue(MediaWikiDumpWriter(dumpPath).append([('second', self.writePage('second', 'two'))]))
+        self.assertEqual(self.readDump(dumpPath), [('first', 'one'), ('second', 'two')])
+
+    def testAppendFailsWithoutFooter(self):
+        dumpPath = self.folder / 'dump.xml.gz'
+        self.assertFalse(MediaWikiDumpWriter(dumpPath).append([]))
+
+        with gzip.open(str(dumpPath), 'wt') as f:
+            f.write('<mediawiki>\n  <page>')  # interrupted write
+        content = dumpPath.read_bytes()
+        self.assertFalse(MediaWikiDumpWriter(dumpPath).append([('page', self.writePage('page', 'x'))]))
+        self.assertEqual(dumpPath.read_bytes(), content)
+
+
+class FolderDumpTest(DumpTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dumpPath = self.folder / 'wiki.xml.gz'
+        self.dump = FolderDump(self.dumpPath, self.folder, EXTENSION, '.preview')
+
+    def readIndex(self):
+        with (self.folder / '.wiki.xml.gz.index.json').open(encoding='utf-8') as f:
+            return json.load(f)
+
+    def testFirstUpdateWritesAllPages(self):
+        a = self.writePage('a', 'aaa')
+        self.writePage('b', 'bb')
+        self.writePage('b.preview', 'skipped')
+
+        self.assertEqual(self.dump.update([a]), 2)
+        self.assertEqual(self.readDump(self.dumpPath), [('a', 'aaa'), ('b', 'bb')])
+        self.assertEqual(self.readIndex(), {'pages': {'a': 3, 'b': 2}, 'written': 5})
+
+    def testChangedPageIsAppended(self):
+        a = self.writePage('a', 'aaa')
+        self.writePage('b', 'bbbbbb')
+        self.dump.update([a])
+
+        self.writePage('a', 'AAAA')
+        c = self.writePage('c', 'cc')
+        self.assertEqual(self.dump.update([a, c]), 3)
+        self.assertEqual(self.readDump(self.dumpPath), [('a', 'aaa'), ('b', 'bbbbbb'), ('a', 'AAAA'), ('c', 'cc')])
+        self.assertEqual(self.readIndex(), {'pages': {'a': 4, 'b': 6, 'c': 2}, 'written': 15})
+
+    def testDumpIsRewrittenWhenOutdatedRevisionsGrow(self):
+        a = self.writePage('a', 'a' * 10)
+        self.dump.update([a])
+        self.writePage('a', 'b' * 10)
+        self.dump.update([a])  # 20 written for 10 live ones: still appended
+        self.assertEqual(len(self.readDump(self.dumpPath)), 2)
+
+        self.writePage('a', 'c' * 10)
+        self.dump.update([a])
+        self.assertEqual(self.readDump(self.dumpPath), [('a', 'c' * 10)])
+        self.assertEqual(self.readIndex()['written'], 10)
+
+    def testDumpIsRewrittenWithoutIndex(self):
+        a = self.writePage('a', 'aaa')
+        self.dump.update([a])
+        (self.folder / '.wiki.xml.gz.index.json').unlink()
+
+        self.writePage('a', 'new')
+        self.dump.update([a])
+        self.assertEqual(self.readDump(self.dumpPath), [('a', 'new')])
+        self.assertEqual(self.readIndex(), {'pages': {'a': 3}, 'written': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Repeated footnotes converted once and referred to by name, see `WikiConverter._renderFootnotes()` """
+
+
+import re
+import sys
+import tempfile
+import unittest
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.ConversionSettings import ConversionSettings
+from writer2wiki.convert.Paragraph import Paragraph
+from writer2wiki.convert.WikiConverter import WikiConverter
+from writer2wiki.w2w_office.lo_enums import FontWeight
+
+
+BOLD = ['CharWeight', FontWeight.BOLD]
+
+
+def makeParagraphDict(portions):
+    """ :param portions: (text, properties) """
+    return {'style': '', 'outlineLevel': 0, 'listLevel': 0, 'numbered': False,
+            'portions': [{'text': text, 'style': '', 'properties': properties} for text, properties in portions]}
+
+
+def makeParagraph(text, *footnotes):
+    """ :param footnotes: portions of each footnote, see `makeParagraphDict()` """
+    paragraph = makeParagraphDict([(text, [])])
+    for number, footnote in enumerate(footnotes, 1):
+        paragraph['portions'].append({'caption': str(number), 'footnote': [makeParagraphDict(footnote)]})
+    return Paragraph.fromDict(paragraph)
+
+
+class NamedFootnotesTest(unittest.TestCase):
+
+    def render(self, *paragraphs):
+        converter = WikiConverter(None)
+        converter._paragraphs = list(paragraphs)
+        with tempfile.TemporaryDirectory() as folder:
+            converter._prepareParagraphs(ConversionSettings(Path(folder) / 'doc.odt'))
+        return converter.getResult()
+
+    def testIdenticalFootnotesAreDefinedOnce(self):
+        note = [('see page 5', [])]
+        result = self.render(makeParagraph('a', note), makeParagraph('b', note, note))
+
+        match = re.search(r'a<ref name="(fn-\w+)">see page 5</ref>', result)
+        self.assertIsNotNone(match, result)
+        reference = '<ref name="{}"/>'.format(match.group(1))
+        self.assertIn('b' + reference + reference, result)
+        self.assertEqual(result.count('see page 5'), 1)
+        self.assertTrue(result.endswith('<references/>\n'))
+
+    def testSingleFootnoteHasNoName(self):
+        result = self.render(makeParagraph('a', [('one', [])]), makeParagraph('b', [('two', [])]))
+        self.assertIn('a<ref>one</ref>', result)
+        self.assertIn('b<ref>two</ref>', result)
+
+    def testFootnotesDifferingInFormattingAreNotMerged(self):
+        result = self.render(makeParagraph('a', [('note', [])]), makeParagraph('b', [('note', [BOLD])]))
+        self.assertIn('a<ref>note</ref>', result)
+        self.assertIn("b<ref>'''note'''</ref>", result)
+        self.assertNotIn('<ref name=', result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Merging of extracted portions, see `Paragraph.appendPortion()` and `Paragraph.prepare()` """
+
+
+import sys
+import tempfile
+import unittest
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.ConversionSettings import ConversionSettings
+from writer2wiki.convert.Paragraph import Paragraph
+from writer2wiki.convert.TextPortion import TextPortion, MarkupPortion, FootnotePortion
+
+
+def makeParagraph(*portions):
+    paragraph = Paragraph.fromDict({'style': '', 'outlineLevel': 0, 'listLevel': 0, 'numbered': False,
+                                    'portions': []})
+    for portion in portions:
+        paragraph.appendPortion(portion)
+    return paragraph
+
+
+def makeFootnote(text):
+    return FootnotePortion('1', [makeParagraph(TextPortion.makePlain(text))])
+
+
+class MergePortionsTest(unittest.TestCase):
+
+    def testPlainPortionsAreMerged(self):
+        paragraph = makeParagraph(TextPortion.makePlain('a'), TextPortion.makePlain('b'))
+        self.assertEqual(paragraph.getPlainText(), 'ab')
+        self.assertEqual(paragraph.getExtractedPortionsCount(), 1)
+
+    def testFootnoteAfterImageIsKept(self):
+        paragraph = makeParagraph(TextPortion.makePlain('text'), MarkupPortion('[[File:w2w-1.png]]'),
+                                  makeFootnote('note'))
+        self.assertTrue(paragraph.hasFootnotes())
+        self.assertEqual(paragraph.getExtractedPortionsCount(), 3)
+
+        with tempfile.TemporaryDirectory() as folder:
+            paragraph.prepare(ConversionSettings(Path(folder) / 'doc.odt'))
+        self.assertTrue(any(p.isFootnote() for p in paragraph.getPortions()))
+
+    def testMarkupIsNotMerged(self):
+        paragraph = makeParagraph(MarkupPortion('[[File:a.png]]'), MarkupPortion('[[File:b.png]]'))
+        self.assertEqual(paragraph.getExtractedPortionsCount(), 2)
+
+
+def makePortion(text, properties, style=''):
+    """ :param properties: (name, value) """
+    return TextPortion.fromDict({'text': text, 'style': style, 'properties': list(properties)})
+
+
+BOLD = ('CharWeight', 150.0)
+ITALIC = ('CharPosture', 2)
+RED = ('CharColor', 0xFF0000)
+LINK = ('HyperLinkURL', 'http://example.com')
+
+
+class CompactTest(unittest.TestCase):
+    """ Merging of nearly identical portions, see `Paragraph._compact()` """
+
+    @staticmethod
+    def describe(portion):
+        """ :return: portion as nested tuples: (style, properties, text or children) """
+        content = [__class__.describe(c) for c in portion.getChildren()] if portion.isComposite() \
+            else portion.getRawText()
+        return portion.getStyleName(), list(portion.getProperties().items()), content
+
+    def compact(self, *portions):
+        return [self.describe(p) for p in Paragraph._compact(list(portions))]
+
+    def testOnePropertyDifferenceIsMerged(self):
+        self.assertEqual(self.compact(makePortion('a', [ITALIC]), makePortion('b', [ITALIC, BOLD]),
+                                      makePortion('c', [ITALIC])),
+                         [('', [ITALIC], [(None, [], 'a'), (None, [BOLD], 'b'), (None, [], 'c')])])
+
+    def testLargerDifferenceIsNotMerged(self):
+        self.assertEqual(self.compact(makePortion('a', [ITALIC]), makePortion('b', [ITALIC, BOLD, RED])),
+                         [('', [ITALIC], 'a'), ('', [ITALIC, BOLD, RED], 'b')])
+
+        # the group is ended by the portion, which differs too much from the common properties
+        self.assertEqual(len(self.compact(makePortion('a', [ITALIC, BOLD]), makePortion('b', [ITALIC, RED]),
+                                          makePortion('c', [RED]))), 2)
+
+    def testNoCommonPropertiesAreNotMerged(self):
+        self.assertEqual(self.compact(makePortion('a', [BOLD]), makePortion('b', [ITALIC])),
+                         [('', [BOLD], 'a'), ('', [ITALIC], 'b')])
+
+    def testHyperlinksAreNotMerged(self):
+        self.assertEqual(self.compact(makePortion('a', [BOLD, LINK]), makePortion('b', [BOLD]),
+                                      makePortion('c', [BOLD, ITALIC])),
+                         [('', [BOLD, LINK], 'a'), ('', [BOLD], [(None, [], 'b'), (None, [ITALIC], 'c')])])
+
+    def testMarkupAndFootnotesAreBarriers(self):
+        for barrier in (MarkupPortion('[[File:a.png]]'), makeFootnote('note')):
+            result = Paragraph._compact([makePortion('a', [BOLD]), barrier, makePortion('b', [BOLD, ITALIC])])
+            self.assertEqual([p.isComposite() for p in result], [False, False, False])
+            self.assertEqual(result[1].getRawText(), barrier.getRawText())
+
+    def testSameNamedStyleIsWrapped(self):
+        self.assertEqual(self.compact(makePortion('a', [BOLD], 'Code'), makePortion('b', [ITALIC], 'Code'),
+                                      makePortion('c', [], 'Quote')),
+                         [('Code', [], [(None, [BOLD], 'a'), (None, [ITALIC], 'b')]), ('Quote', [], 'c')])
+
+    def testSameNamedStyleWithMergedPortions(self):
+        self.assertEqual(self.compact(makePortion('a', [BOLD], 'Code'), makePortion('b', [BOLD, ITALIC], 'Code'),
+                                      makePortion('c', [RED, ITALIC], 'Code')),
+                         [('Code', [], [(None, [BOLD], [(None, [], 'a'), (None, [ITALIC], 'b')]),
+                                        (None, [RED, ITALIC], 'c')])])
+
+
+class ImageFilesTest(unittest.TestCase):
+
+    def testImageFilesSurviveSerialization(self):
+        footnote = FootnotePortion('1', [makeParagraph(MarkupPortion('[[File:b.png]]', 'b.png'))])
+        paragraph = makeParagraph(MarkupPortion('[[File:a.png]]', 'a.png'), TextPortion.makePlain('text'), footnote)
+        self.assertEqual(Paragraph.fromDict(paragraph.toDict()).getImageFiles(), ['a.png', 'b.png'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Parsing of `paragraphs=<first>-<last>` argument, see `BaseConverter.convertParagraphRange()` """
+
+
+import sys
+import unittest
+from os.path import dirname, join, abspath, pardir
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.BaseConverter import BaseConverter
+
+
+class ParseParagraphRangeTest(unittest.TestCase):
+
+    def testValid(self):
+        self.assertEqual(BaseConverter.parseParagraphRange('3-7'), (3, 7))
+        self.assertEqual(BaseConverter.parseParagraphRange(' 2 - 2 '), (2, 2))
+
+    def testInvalid(self):
+        for rangeString in ('', '5', 'a-b', '1-', '-3', '0-3', '7-2', '1-2-3', '1.5-2'):
+            self.assertIsNone(BaseConverter.parseParagraphRange(rangeString), rangeString)
+
+
+if __name__ == '__main__':
+    unittest.main()
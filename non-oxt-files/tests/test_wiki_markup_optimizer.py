@@ -0,0 +1,87 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Reducing parser function calls in converted text, see `WikiMarkupOptimizer` """
+
+
+import sys
+import unittest
+from os.path import dirname, join, abspath, pardir
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.WikiMarkupOptimizer import WikiMarkupOptimizer
+
+
+def tagSpan(style, content):
+    return '{{#tag:span|<span style="' + style + '">' + content + '</span>}}'
+
+
+def span(style, content):
+    return '<span style="' + style + '">' + content + '</span>'
+
+
+class WikiMarkupOptimizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.optimizer = WikiMarkupOptimizer()
+
+    def optimize(self, text):
+        return self.optimizer.optimize(text)
+
+    def testTagIsReplacedOutsideTemplates(self):
+        self.assertEqual(self.optimize('a ' + tagSpan('color:red', 'b') + ' c'), 'a ' + span('color:red', 'b') + ' c')
+
+    def testTagIsKeptInsideTemplates(self):
+        text = '{{Quote|' + tagSpan('color:red', 'b') + '}}'
+        self.assertEqual(self.optimize(text), text)
+        self.assertEqual(self.optimizer.getSavedCallsCount(), 0)
+
+    def testAdjacentIdenticalSpansAreMerged(self):
+        text = tagSpan('color:red', 'a') + tagSpan('color:red', 'b') + tagSpan('color:red', 'c')
+        self.assertEqual(self.optimize(text), span('color:red', 'abc'))
+        self.assertEqual(self.optimizer.getOriginalCallsCount(), 3)
+        self.assertEqual(self.optimizer.getSavedCallsCount(), 3)
+
+    def testMergeInsideTemplate(self):
+        text = '{{Quote|' + tagSpan('color:red', 'a') + tagSpan('color:red', 'b') + '}}'
+        self.assertEqual(self.optimize(text), '{{Quote|' + tagSpan('color:red', 'ab') + '}}')
+        self.assertEqual(self.optimizer.getSavedCallsCount(), 1)
+
+    def testDifferentOrSeparatedSpansAreNotMerged(self):
+        text = tagSpan('color:red', 'a') + tagSpan('color:blue', 'b') + ' ' + tagSpan('color:blue', 'c')
+        self.assertEqual(self.optimize(text), span('color:red', 'a') + span('color:blue', 'b') + ' '
+                         + span('color:blue', 'c'))
+
+    def testNestedSpans(self):
+        text = tagSpan('color:red', 'a' + tagSpan('font-size:8pt', 'b')) + tagSpan('color:red', 'c')
+        self.assertEqual(self.optimize(text), span('color:red', 'a' + span('font-size:8pt', 'b') + 'c'))
+
+    def testEmptySpansAreDropped(self):
+        self.assertEqual(self.optimize('a' + tagSpan('color:red', '') + 'b'), 'ab')
+        self.assertEqual(self.optimize(tagSpan('color:red', tagSpan('font-size:8pt', ''))), '')
+
+        text = '{{Quote|a' + tagSpan('color:red', '') + '}}'
+        self.assertEqual(self.optimize(text), '{{Quote|a}}')
+        self.assertEqual(self.optimizer.getSavedCallsCount(), 4)  # all spans of this test were empty
+
+    def testNowikiAndPreAreNotChanged(self):
+        for text in ('<nowiki>{{#tag:span|<span style="x"></span>}}</nowiki>',
+                     '<pre>\n' + tagSpan('color:red', '') + '\n}}</pre>'):
+            self.assertEqual(self.optimize(text), text)
+
+        self.assertEqual(self.optimize('<nowiki>}}</nowiki>' + tagSpan('color:red', 'a<nowiki>{{</nowiki>')),
+                         '<nowiki>}}</nowiki>' + span('color:red', 'a<nowiki>{{</nowiki>'))
+        self.assertEqual(self.optimize('<pre>{{\n}}</pre>' + tagSpan('color:red', 'a')),
+                         '<pre>{{\n}}</pre>' + span('color:red', 'a'))
+
+    def testUnbalancedMarkupIsKept(self):
+        for text in ('{{a', 'a}}', '{{#tag:span|<span style="x">a', 'a</span>}}', '{{' + '</span>}}'):
+            self.assertEqual(self.optimize(text), text)
+
+
+if __name__ == '__main__':
+    unittest.main()
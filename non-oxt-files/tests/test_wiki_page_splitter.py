@@ -0,0 +1,109 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Splitting of converted document into pages, see `WikiPageSplitter` """
+
+
+import re
+import sys
+import tempfile
+import unittest
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.ConversionSettings import ConversionSettings
+from writer2wiki.convert.Paragraph import Paragraph
+from writer2wiki.convert.WikiConverter import WikiConverter
+from writer2wiki.convert.WikiPageSplitter import WikiPageSplitter
+
+
+TARGET_FILE = Path('/wiki/Doc.wiki.txt')
+
+
+def makeParagraph(text, heading=False, listLevel=0, footnote=None):
+    portions = [{'text': text, 'style': '', 'properties': []}]
+    if footnote is not None:
+        portions.append({'caption': '1', 'footnote': [makeParagraph(footnote).toDict()]})
+    return Paragraph.fromDict({'style': 'Heading' if heading else '', 'outlineLevel': 1 if heading else 0,
+                               'listLevel': listLevel, 'numbered': False, 'portions': portions})
+
+
+class WikiPageSplitterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.converter = WikiConverter(None)
+        self.renderCount = 0
+
+    def split(self, paragraphs, maxPageSize):
+        def renderSections(paras):
+            self.renderCount += 1
+            return self.converter._renderSections(paras, footnotesPerSection=True)
+
+        self.converter._paragraphs = paragraphs
+        with tempfile.TemporaryDirectory() as folder:
+            self.converter._prepareParagraphs(ConversionSettings(Path(folder) / 'doc.odt'))
+        return WikiPageSplitter(renderSections, '.wiki.txt', maxPageSize).split(paragraphs, TARGET_FILE)
+
+    @staticmethod
+    def makeChapters(count, bodySize):
+        paragraphs = []
+        for number in range(1, count + 1):
+            paragraphs += [makeParagraph('Chapter {}'.format(number), heading=True), makeParagraph('x' * bodySize)]
+        return paragraphs
+
+    def testSmallDocumentIsNotSplit(self):
+        paragraphs = self.makeChapters(2, 10)
+        pages = self.split(paragraphs, 10000)
+        self.assertEqual(pages, [(TARGET_FILE, self.converter.getResult())])
+
+    def testSplitAtHeadings(self):
+        pages = self.split(self.makeChapters(4, 400), 1500)
+        self.assertEqual(self.renderCount, 1)
+        self.assertEqual([path.name for path, _ in pages],
+                         ['Doc.wiki.txt', 'Doc (part 1).wiki.txt', 'Doc (part 2).wiki.txt'])
+        self.assertEqual(pages[0][1], '# [[Doc (part 1)|Chapter 1]]\n# [[Doc (part 2)|Chapter 3]]\n')
+
+        for _, content in pages[1:]:
+            self.assertLessEqual(len(content.encode('utf-8')), 1500)
+        first, second = (content for _, content in pages[1:])
+        self.assertTrue(first.startswith('{{Heading|Chapter 1}}'))
+        self.assertIn('Chapter 2', first)
+        self.assertTrue(second.startswith('{{Heading|Chapter 3}}'))
+        self.assertTrue(second.endswith('[[Doc|Contents]] | [[Doc (part 1)|previous part]]\n'))
+
+    def testLargeChapterGetsPageOfItsOwn(self):
+        paragraphs = self.makeChapters(1, 100) + self.makeChapters(1, 2000) + self.makeChapters(1, 100)
+        pages = self.split(paragraphs, 1000)
+        self.assertEqual(len(pages), 4)
+        self.assertGreater(len(pages[2][1]), 2000)
+
+    def testTextBeforeFirstHeading(self):
+        pages = self.split([makeParagraph('y' * 900)] + self.makeChapters(1, 900), 1500)
+        self.assertEqual(pages[0][1], '# [[Doc (part 1)|Doc (part 1)]]\n# [[Doc (part 2)|Chapter 1]]\n')
+
+    def testNoSplitInsideList(self):
+        paragraphs = [makeParagraph('y' * 900, listLevel=1), makeParagraph('item heading', heading=True, listLevel=1),
+                      makeParagraph('z' * 900, listLevel=1)]
+        pages = self.split(paragraphs, 1500)
+        self.assertEqual(len(pages), 2)  # index and the only part
+
+    def testRepeatedFootnoteIsDefinedOnEachPage(self):
+        paragraphs = self.makeChapters(2, 900)
+        paragraphs.insert(1, makeParagraph('a', footnote='note'))
+        paragraphs.append(makeParagraph('b', footnote='note'))
+        pages = self.split(paragraphs, 1500)
+        self.assertEqual(len(pages), 3)
+
+        for _, content in pages[1:]:
+            definitions = re.findall(r'<ref name="fn-\w+">note</ref>', content)
+            self.assertEqual(len(definitions), 1, content)
+            self.assertIn('<references/>\n----\n', content)
+
+
+if __name__ == '__main__':
+    unittest.main()
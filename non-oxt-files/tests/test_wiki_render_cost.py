@@ -0,0 +1,94 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Offline estimate of parser cost of converted pages, see `WikiRenderCost` """
+
+
+import logging
+import sys
+import tempfile
+import unittest
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.ConversionSettings import ConversionSettings
+from writer2wiki.convert.WikiConverter import WikiConverter
+from writer2wiki.convert.WikiRenderCost import WikiRenderCost
+
+
+class WikiRenderCostTest(unittest.TestCase):
+
+    def testCallsAndDepth(self):
+        cost = WikiRenderCost('{{Quote|a {{#tag:span|b {{#tag:span|c}}}}}} {{Note|d}}<ref>e</ref>')
+        self.assertEqual(cost.templateCalls, 2)
+        self.assertEqual(cost.parserFunctionCalls, 2)
+        self.assertEqual(cost.getCallsCount(), 4)
+        self.assertEqual(cost.maxDepth, 3)
+        self.assertEqual(cost.refsCount, 1)
+
+    def testPostExpandSizeCountsNestedArguments(self):
+        text = '{{A|{{#tag:span|xy}}}}'
+        cost = WikiRenderCost(text)
+        self.assertEqual(cost.largestArguments, [len('A|{{#tag:span|xy}}'), len('tag:span|xy')])
+        self.assertEqual(cost.postExpandSize, len(text) + sum(cost.largestArguments))
+
+    def testNowikiAndUnbalancedBracesAreIgnored(self):
+        cost = WikiRenderCost('}} <nowiki>{{</nowiki> {{#tag:span|a}} }}')
+        self.assertEqual(cost.getCallsCount(), 1)
+        self.assertEqual(cost.maxDepth, 1)
+
+
+class RenderCostLimitsTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpDir = tempfile.TemporaryDirectory()
+        self.folder = Path(self._tmpDir.name)
+
+    def tearDown(self):
+        self._tmpDir.cleanup()
+
+    def logRenderCost(self, text, options=''):
+        """ :return list: warnings logged for the page """
+        (self.folder / 'writer2wiki-folder-settings.txt').write_text('[options]\n' + options + '[styles]\n',
+                                                                    encoding='utf-8')
+        settings = ConversionSettings(self.folder / 'doc.odt')
+        with self.assertLogs(level=logging.INFO) as logs:
+            WikiConverter._logRenderCost([(self.folder / 'Doc.wiki.txt', text)], settings)
+        return [record.getMessage() for record in logs.records if record.levelno >= logging.WARNING]
+
+    @staticmethod
+    def nested(depth):
+        return '{{#tag:span|' * depth + 'x' + '}}' * depth
+
+    def testDefaultLimits(self):
+        self.assertEqual(self.logRenderCost(self.nested(40)), [])
+        self.assertEqual(self.logRenderCost(self.nested(41)),
+                         ['Doc.wiki.txt: template nesting depth 41 exceeds limit 40, '
+                          'page may fail to render in MediaWiki'])
+
+        warnings = self.logRenderCost('{{#tag:span|x}}' * 20001)
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('template calls 20001 exceeds limit 20000', warnings[0])
+
+    def testPostExpandSize(self):
+        text = '{{Quote|' + 'x' * 600 + '}}'
+        warnings = self.logRenderCost(text, 'max post-expand size = 1\n')
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('post-expand size {} exceeds limit 1024'.format(len(text) + 606), warnings[0])
+
+    def testLimitsFromSettings(self):
+        text = self.nested(3) + '{{Note|y}}'
+        self.assertEqual(len(self.logRenderCost(text, 'max template calls = 3\nmax template depth = 2\n')), 2)
+        self.assertEqual(self.logRenderCost(text, 'max template calls = 4\nmax template depth = 3\n'), [])
+
+    def testBlankLimitIsNotChecked(self):
+        self.assertEqual(self.logRenderCost(self.nested(50), 'max template depth =\n'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
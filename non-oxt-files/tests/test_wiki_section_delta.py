@@ -0,0 +1,94 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Changed sections of converted page, see `WikiSectionDelta` """
+
+
+import json
+import sys
+import tempfile
+import unittest
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.WikiSectionDelta import WikiSectionDelta
+
+
+LEAD = WikiSectionDelta.LEAD_ID
+
+
+class SectionIdsTest(unittest.TestCase):
+
+    def testIdsAreMadeOfHeadings(self):
+        self.assertEqual(WikiSectionDelta.makeSectionIds([None, 'First Chapter', 'What? Why!', '???']),
+                         [LEAD, 'first-chapter', 'what-why', 'section'])
+
+    def testRepeatedHeadingsGetSuffixes(self):
+        self.assertEqual(WikiSectionDelta.makeSectionIds(['Notes', 'Intro', 'Notes', 'notes']),
+                         ['notes', 'intro', 'notes-2', 'notes-3'])
+
+
+class WikiSectionDeltaTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpDir = tempfile.TemporaryDirectory()
+        folder = Path(self._tmpDir.name)
+        self.indexFile = folder / 'Doc.wiki.sections.json'
+        self.deltaFile = folder / 'Doc.wiki.delta.json'
+
+    def tearDown(self):
+        self._tmpDir.cleanup()
+
+    def convert(self, sections):
+        """ Save output files the way `WikiConverter` does and return delta
+
+        :param sections: (section id, text)
+        """
+        files = WikiSectionDelta(self.indexFile, self.deltaFile).makeOutputFiles('Doc', sections)
+        self.assertEqual([path for path, _ in files], [self.deltaFile, self.indexFile])
+        for path, content in files:
+            path.write_text(content, encoding='utf-8')
+        return json.loads(self.deltaFile.read_text(encoding='utf-8'))
+
+    def testFirstRunWithoutIndex(self):
+        delta = self.convert([(LEAD, 'lead'), ('a', '== A ==\ntext')])
+        self.assertEqual(delta, {'page': 'Doc', 'order': [LEAD, 'a'], 'removed': [],
+                                 'changed': [{'id': LEAD, 'index': 0, 'text': 'lead'},
+                                             {'id': 'a', 'index': 1, 'text': '== A ==\ntext'}]})
+
+    def testNothingChanged(self):
+        sections = [(LEAD, 'lead'), ('a', 'text a')]
+        self.convert(sections)
+        delta = self.convert(sections)
+        self.assertEqual(delta['changed'], [])
+        self.assertEqual(delta['removed'], [])
+        self.assertEqual(delta['order'], [LEAD, 'a'])
+
+    def testChangedAddedAndRemovedSections(self):
+        self.convert([(LEAD, 'lead'), ('a', 'text a'), ('b', 'text b'), ('c', 'text c')])
+        delta = self.convert([(LEAD, 'lead'), ('a', 'new text a'), ('new', 'text new'), ('c', 'text c')])
+        self.assertEqual(delta['order'], [LEAD, 'a', 'new', 'c'])
+        self.assertEqual(delta['changed'], [{'id': 'a', 'index': 1, 'text': 'new text a'},
+                                            {'id': 'new', 'index': 2, 'text': 'text new'}])
+        self.assertEqual(delta['removed'], ['b'])
+
+    def testMovedSectionIsNotChanged(self):
+        self.convert([('a', 'text a'), ('b', 'text b')])
+        delta = self.convert([('b', 'text b'), ('a', 'text a')])
+        self.assertEqual(delta['order'], ['b', 'a'])
+        self.assertEqual(delta['changed'], [])
+
+    def testBrokenIndexTreatedAsFirstRun(self):
+        self.indexFile.write_text('{"sections": [', encoding='utf-8')
+        delta = self.convert([('a', 'text a')])
+        self.assertEqual(delta['changed'], [{'id': 'a', 'index': 0, 'text': 'text a'}])
+        self.assertEqual(delta['removed'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+""" Escaping of adversarial text, see `WikiTextEscaper`.
+
+Doesn't need Office, run with any Python 3:
+    python -m unittest discover non-oxt-files/tests
+"""
+
+
+import sys
+import tempfile
+import unittest
+from os.path import dirname, join, abspath, pardir
+from pathlib import Path
+
+sys.path.append(abspath(join(dirname(__file__), pardir, pardir)))
+
+from writer2wiki.convert.ConversionSettings import ConversionSettings
+from writer2wiki.convert.Paragraph import Paragraph
+from writer2wiki.convert.WikiConverter import WikiConverter
+from writer2wiki.convert.WikiTextEscaper import WikiTextEscaper
+from writer2wiki.w2w_office.lo_enums import FontSlant, FontWeight
+
+
+def escape(text, **context):
+    return WikiTextEscaper.escape(text, **context)
+
+
+class LineStartTest(unittest.TestCase):
+
+    def testListAndIndentChars(self):
+        for char in '*#:;':
+            self.assertEqual(escape(char + ' a', atLineStart=True), '<nowiki>' + char + '</nowiki> a')
+
+    def testHeading(self):
+        self.assertEqual(escape('= h =', atLineStart=True), '<nowiki>=</nowiki> h =')
+
+    def testHorizontalLineAndTable(self):
+        self.assertEqual(escape('----', atLineStart=True), '<nowiki>----</nowiki>')
+        self.assertEqual(escape('{| x', atLineStart=True), '<nowiki>{|</nowiki> x')
+
+    def testLeadingSpace(self):
+        self.assertEqual(escape(' pre', atLineStart=True), '&#32;pre')
+
+    def testNotAtLineStart(self):
+        self.assertEqual(escape('* a = b ----'), '* a = b ----')
+        self.assertEqual(escape(' a'), ' a')
+
+    def testAfterLineFeed(self):
+        self.assertEqual(escape('a\n* b\n#c\n d'), 'a\n<nowiki>*</nowiki> b\n<nowiki>#</nowiki>c\n&#32;d')
+
+
+class SequencesTest(unittest.TestCase):
+
+    def testTemplatesAndLinks(self):
+        self.assertEqual(escape('{{t}}'), '<nowiki>{{</nowiki>t<nowiki>}}</nowiki>')
+        self.assertEqual(escape('[[l]]'), '<nowiki>[[</nowiki>l<nowiki>]]</nowiki>')
+
+    def testExternalLink(self):
+        self.assertEqual(escape('[http://x y]'), '<nowiki>[</nowiki>http://x y]')
+        self.assertEqual(escape('[x]'), '[x]')
+
+    def testBoldAndItalicQuotes(self):
+        self.assertEqual(escape("a''b'''c"), "a<nowiki>''</nowiki>b<nowiki>'''</nowiki>c")
+
+    def testQuotesNextToMarkup(self):
+        self.assertEqual(escape("'a'", quoteBefore=True, quoteAfter=True), '&#39;a&#39;')
+        self.assertEqual(escape("'a'", quoteAfter=True), "'a&#39;")
+        self.assertEqual(escape("'", quoteBefore=True, quoteAfter=True), '&#39;')
+        self.assertEqual(escape("a''", quoteAfter=True), "a<nowiki>''</nowiki>")
+
+    def testQuotesNotNextToMarkup(self):
+        self.assertEqual(escape("'a'"), "'a'")
+        self.assertEqual(escape("a'b", quoteBefore=True, quoteAfter=True), "a'b")
+
+    def testSignature(self):
+        self.assertEqual(escape('~~~'), '<nowiki>~~~</nowiki>')
+        self.assertEqual(escape('~~~~~'), '<nowiki>~~~~~</nowiki>')
+        self.assertEqual(escape('~~'), '~~')
+
+    def testBehaviorSwitch(self):
+        self.assertEqual(escape('__TOC__'), '<nowiki>__TOC__</nowiki>')
+        self.assertEqual(escape('__toc__ snake_case_name'), '__toc__ snake_case_name')
+
+    def testAdjacentSequencesAreMerged(self):
+        self.assertEqual(escape('[[{{x}}]]'), '<nowiki>[[{{</nowiki>x<nowiki>}}]]</nowiki>')
+        self.assertEqual(escape('[[ {{'), '<nowiki>[[</nowiki> <nowiki>{{</nowiki>')
+        self.assertEqual(escape('*[[', atLineStart=True), '<nowiki>*[[</nowiki>')
+
+
+class EntitiesTest(unittest.TestCase):
+
+    def testHtml(self):
+        self.assertEqual(escape('<b>'), '&lt;b>')
+        self.assertEqual(escape('&amp; &#39; & x;'), '&amp;amp; &amp;#39; & x;')
+
+    def testNonBreakingChars(self):
+        self.assertEqual(escape('a b‑c'), 'a&nbsp;b&#x2011;c')
+
+    def testInsideTemplate(self):
+        self.assertEqual(escape('a|b=c', insideTemplate=True), 'a&#124;b&#61;c')
+        self.assertEqual(escape('a|b=c'), 'a|b=c')
+
+    def testInsideLink(self):
+        self.assertEqual(escape('a]b', insideLink=True), 'a&#93;b')
+        self.assertEqual(escape('a]b'), 'a]b')
+
+    def testPlainText(self):
+        text = 'The quick brown fox, 2 + 2 = 4 (really) - isn\'t it?'
+        self.assertEqual(escape(text), text)
+
+
+class RoundTripTest(unittest.TestCase):
+    """ Escaped text next to bold/italic markup generated by converter """
+
+    BOLD = ['CharWeight', FontWeight.BOLD]
+    ITALIC = ['CharPosture', FontSlant.ITALIC]
+
+    def render(self, *portions):
+        """ :param portions: (text, properties) """
+        paragraph = Paragraph.fromDict({'style': '', 'outlineLevel': 0, 'listLevel': 0, 'numbered': False,
+                                        'portions': [{'text': text, 'style': '', 'properties': properties}
+                                                     for text, properties in portions]})
+        converter = WikiConverter(None)
+        converter._paragraphs = [paragraph]
+        with tempfile.TemporaryDirectory() as folder:
+            converter._prepareParagraphs(ConversionSettings(Path(folder) / 'doc.odt'))
+        return converter.getResult().rstrip('\n')
+
+    def testQuoteAtEndOfBoldPortion(self):
+        self.assertEqual(self.render(("it'", [self.BOLD]), ('s', [])), "'''it&#39;'''s")
+
+    def testQuoteAtStartOfItalicPortion(self):
+        self.assertEqual(self.render(("'quoted", [self.ITALIC])), "''&#39;quoted''")
+
+    def testQuotesInsideBoldItalicPortion(self):
+        self.assertEqual(self.render(("a''b", [self.BOLD, self.ITALIC])), "'''''a<nowiki>''</nowiki>b'''''")
+
+    def testPlainPortionAfterBold(self):
+        self.assertEqual(self.render(('bold', [self.BOLD]), ("''x", [])), "'''bold'''<nowiki>''</nowiki>x")
+
+    def testQuoteBeforeBoldPortion(self):
+        self.assertEqual(self.render(("it'", []), ('s', [self.BOLD])), "it&#39;'''s'''")
+
+    def testQuoteAfterBoldPortion(self):
+        self.assertEqual(self.render(('bold', [self.BOLD]), ("'x'", [])), "'''bold'''&#39;x'")
+
+    def testQuotesAwayFromMarkupAreKept(self):
+        self.assertEqual(self.render(("'quoted'", [])), "'quoted'")
+        self.assertEqual(self.render(("'sup'", [['CharEscapement', 33]]), ('a', [self.BOLD])),
+                         "<sup>'sup'</sup>'''a'''")
+
+    def testQuotesInsideCompositePortion(self):
+        self.assertEqual(self.render(("'a", [self.ITALIC]), ("b'", [self.ITALIC, self.BOLD]), ('c', [self.ITALIC])),
+                         "''&#39;a'''b&#39;'''c''")
+
+    def testLineStartInsideBold(self):
+        self.assertEqual(self.render(('* star', [self.BOLD])), "'''* star'''")
+        self.assertEqual(self.render(('* star', [])), '<nowiki>*</nowiki> star')
+
+    def testSequenceInsideBold(self):
+        self.assertEqual(self.render(('a ', []), ('[[x]]', [self.BOLD])),
+                         "a '''<nowiki>[[</nowiki>x<nowiki>]]</nowiki>'''")
+
+
+if __name__ == '__main__':
+    unittest.main()
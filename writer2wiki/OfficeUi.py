@@ -21,8 +21,14 @@ class OfficeUi:
 
     def messageBox(self, message, title='Writer to Wiki Converter',
                    boxType=MbType.MESSAGEBOX, buttons=MbButtons.BUTTONS_OK):
+        """ Show modal dialog and wait for user's response. Safe to call from conversion's worker thread """
+        from writer2wiki.w2w_office.main_thread import callInMainThread
+        return callInMainThread(self._context, self._showMessageBox, message, title, boxType, buttons)
+
+    def _showMessageBox(self, message, title, boxType, buttons):
+        import uno
         toolkit = Service.create(Service.TOOLKIT, self._context)
-        box = toolkit.createMessageBox(self._window, boxType, buttons, title, message)
+        box = toolkit.createMessageBox(self._window, uno.Enum(MbType.TYPE_NAME, boxType), buttons, title, message)
 
         self._log('user dialog:', message)
         dialogResult = box.execute()
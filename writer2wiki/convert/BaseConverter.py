@@ -4,24 +4,44 @@
 #           http://www.boost.org/LICENSE_1_0.txt)
 
 
-from typing import List
+import logging as log
+import os
+import re
+import sys
+import time
+from typing import List, Tuple
 from abc import ABCMeta, abstractmethod
 
-import uno
-
 from writer2wiki.convert.Paragraph import Paragraph
-from writer2wiki.convert.TextPortion import TextPortion
+from writer2wiki.convert.TextPortion import TextPortion, MarkupPortion
+from writer2wiki.convert.ImageExporter import ImageExporter
 from writer2wiki.convert.WikiParagraphDecorator import WikiParagraphDecorator
 from writer2wiki.OfficeUi import OfficeUi
-from writer2wiki.w2w_office.lo_enums import TextPortionType
+from writer2wiki.w2w_office.lo_enums import TextPortionType, PropertyState
 from writer2wiki.w2w_office.service import Service
+from writer2wiki.w2w_office.extraction_session import ExtractionSession
+from writer2wiki.w2w_office.special_content import SpecialContentIndex
+from writer2wiki.w2w_office.list_registry import ListRegistry
 from writer2wiki.convert.ConversionSettings import ConversionSettings
 from writer2wiki.util import *
-from writer2wiki import ui_text
-import writer2wiki.debug_utils as dbg
+
+
+class ConversionCancelled(Exception):
+    """ Raised at paragraph boundary when user has cancelled conversion, nothing is saved after that """
+    pass
+
 
 class BaseConverter(metaclass=ABCMeta):
 
+    PREVIEW_SUFFIX = '.preview'
+
+    # seconds from user's command to the first read paragraph, we log a warning if startup takes longer
+    STARTUP_BUDGET_ENV = 'WRITER2WIKI_STARTUP_BUDGET'
+    DEFAULT_STARTUP_BUDGET = 1.0
+
+    # read paragraphs without direct formatting with a single call, see `_isPlainText()`
+    USE_PLAIN_TEXT_FAST_PATH = True
+
     @classmethod
     @abstractmethod
     def makeParagraphDecorator(cls) -> WikiParagraphDecorator: pass
@@ -30,17 +50,48 @@ class BaseConverter(metaclass=ABCMeta):
     @abstractmethod
     def getFileExtension(cls) -> str: pass
 
+    @classmethod
+    @abstractmethod
+    def makeImageMarkup(cls, fileName: str) -> str: pass
+
     @abstractmethod
     def getResult(self) -> str: pass
 
-    def __init__(self, context):
-        desktop = Service.create(Service.DESKTOP, context)
+    def getOutputFiles(self, targetFile: Path, conversionSettings: ConversionSettings) -> List[Tuple[Path, str]]:
+        """ :return: list of (file path, file content) to save conversion result to """
+        return [(targetFile, self.getResult())]
+
+    def _afterResultSaved(self, targetFile: Path, savedFiles: List[Path],
+                          conversionSettings: ConversionSettings) -> None:
+        """ Hook for format-specific output in addition to the converted file
+
+        :param savedFiles: all files saved by conversion, see `getOutputFiles()`
+        """
+        pass
 
+    def __init__(self, context, startedAt: float = None, cancelEvent=None):
+        """
+        :param context: Office's component context. None to only render paragraphs extracted earlier (see
+                        `Paragraph.fromDict()`), this doesn't need Office at all
+        :param startedAt: `time.perf_counter()` value when user's command was received, None to not log startup time
+        :param threading.Event cancelEvent: set by user's cancel command, None if conversion can't be cancelled.
+                                            Conversion stops with `ConversionCancelled` at the next paragraph
+        """
         self._context = context
-        self._document = desktop.getCurrentComponent()
-        self._ui = OfficeUi(context)
-        self._hasFootnotes = False
+        self._document = None
+        self._ui = None  # type: OfficeUi
+        if context is not None:
+            self._document = Service.create(Service.DESKTOP, context).getCurrentComponent()
+            self._ui = OfficeUi(context)
         self._paragraphs = []  # type: List[Paragraph]
+        self._imageExporter = None  # type: ImageExporter
+        self._startedAt = startedAt
+        self._plainParagraphsCount = 0
+        self._listRegistry = ListRegistry()
+        self._checkpoint = None  # type: ExtractionCheckpoint
+        self._cancelEvent = cancelEvent
+        self._progress = None  # type: ProgressIndicator
+        self._styleSnapshot = None  # type: StyleSnapshot
 
     def addParagraph(self, p: Paragraph) -> None:
         if p.isEmpty():
@@ -49,7 +100,13 @@ class BaseConverter(metaclass=ABCMeta):
 
         self._paragraphs.append(p)
 
+    def getExtractedCounts(self) -> Tuple[int, int]:
+        """ :return: numbers of extracted paragraphs and their text portions, e.g. for profiling reports """
+        return len(self._paragraphs), sum(p.getExtractedPortionsCount() for p in self._paragraphs)
+
     def checkCanConvert(self) -> bool:
+        from writer2wiki import ui_text
+
         if not Service.objectSupports(self._document, Service.TEXT_DOCUMENT):
             # TODO more specific message: either no document is opened at all or we can't convert, for example, Calc
             self._ui.messageBox(ui_text.noWriterDocumentOpened())
@@ -61,17 +118,156 @@ class BaseConverter(metaclass=ABCMeta):
 
         return True
 
-    def convertCurrentDocument(self):
-        docPath = Path(uno.fileUrlToSystemPath(self._document.getLocation()))
+    def getUi(self) -> OfficeUi:
+        return self._ui
+
+    def getDocumentPath(self) -> Path:
+        import uno
+        return Path(uno.fileUrlToSystemPath(self._document.getLocation()))
+
+    def _makeConversionSettings(self, docPath: Path):
         conversionSettings = ConversionSettings(docPath)
+        if conversionSettings.exportImages():
+            self._imageExporter = ImageExporter(self._context, docPath.parent)
+        return conversionSettings
+
+    def _printImagesStatistics(self):
+        if self._imageExporter is not None:
+            print('images saved: {}, already existed: {}, repeated: {}'.format(
+                self._imageExporter.getWrittenCount(), self._imageExporter.getSkippedCount(),
+                self._imageExporter.getRepeatedCount()))
+
+    def _saveStyles(self, conversionSettings: ConversionSettings):
+        from writer2wiki import ui_text
+
+        if not conversionSettings.saveStyles():
+            self._ui.messageBox(ui_text.failedToSaveMappingsFile(conversionSettings.getFilePath()))
+
+    def getPreviewFile(self, docPath: Path) -> Path:
+        """ File for conversion result of a part of document """
+        return docPath.with_name(docPath.stem + self.PREVIEW_SUFFIX + self.getFileExtension())
+
+    def convertSelection(self):
+        """ Convert only text selected in document and copy the result to clipboard """
+        from writer2wiki import ui_text
+
+        selection = self._document.getCurrentController().getSelection()
+        if selection is None or not Service.objectSupports(selection, Service.TEXT_RANGES):
+            self._ui.messageBox(ui_text.noTextSelected())
+            return
+
+        conversionSettings = self._makeConversionSettings(self.getDocumentPath())
+        # there are several ranges if text is selected with CTRL key pressed
+        with self._makeExtractionSession():
+            for rangeIndex in range(selection.getCount()):
+                # text range enumerates only selected paragraphs, first and last ones contain only selected portions
+                self._convertXTextObject(selection.getByIndex(rangeIndex), conversionSettings)
+        self._saveStyleSnapshot()
+
+        if len(self._paragraphs) == 0:
+            self._ui.messageBox(ui_text.noTextSelected())
+            return
+
+        self._printImagesStatistics()
+        self._prepareParagraphs(conversionSettings)
+
+        from writer2wiki.w2w_office.clipboard import copyToClipboard
+        from writer2wiki.w2w_office.main_thread import callInMainThread
+        callInMainThread(self._context, copyToClipboard, self._context, self.getResult())
+        self._saveStyles(conversionSettings)
+        self._ui.messageBox(ui_text.selectionCopiedToClipboard())
+
+    @staticmethod
+    def parseParagraphRange(rangeString: str):
+        """ :return Tuple[int, int]|None: first and last paragraphs of '<first>-<last>' string, None if it's invalid """
+        match = re.fullmatch(r'\s*(\d+)\s*-\s*(\d+)\s*', rangeString)
+        if match is None:
+            return None
+
+        first, last = int(match.group(1)), int(match.group(2))
+        if first < 1 or last < first:
+            return None
+        return first, last
+
+    def convertParagraphRange(self, rangeString: str):
+        """ Convert paragraphs from first to last (inclusive, 1-based) and save the result to preview file.
+            Paragraphs of text tables are not counted.
+
+        :param rangeString: '<first>-<last>', e.g. '10-20'
+        """
+        from writer2wiki import ui_text
+
+        paragraphs = self.parseParagraphRange(rangeString)
+        if paragraphs is None:
+            self._ui.messageBox(ui_text.invalidParagraphRange(rangeString))
+            return
+        firstParagraph, lastParagraph = paragraphs
+
+        # a cursor is moved to the first paragraph: enumeration of text would create every paragraph before it
+        cursor = self._document.getText().createTextCursor()
+        cursor.gotoStart(False)
+        for _ in range(firstParagraph - 1):
+            if not cursor.gotoNextParagraph(False):
+                self._ui.messageBox(ui_text.paragraphRangeOutsideDocument(rangeString))
+                return
+        for _ in range(lastParagraph - firstParagraph):
+            if not cursor.gotoNextParagraph(True):
+                break  # last paragraph is beyond the end, convert till the end
+        cursor.gotoEndOfParagraph(True)
+
+        docPath = self.getDocumentPath()
+        conversionSettings = self._makeConversionSettings(docPath)
+
+        self._extractText(cursor, conversionSettings, paragraphsCount=lastParagraph - firstParagraph + 1)
+        self._printImagesStatistics()
+        self._prepareParagraphs(conversionSettings)
+
+        targetFile = self.getPreviewFile(docPath)
+        with openW2wFile(targetFile, 'w') as f:
+            f.write(self.getResult())
+
+        self._saveStyles(conversionSettings)
+        self._ui.messageBox(ui_text.previewSaved(targetFile))
+
+    def convertCurrentDocument(self):
+        from writer2wiki import ui_text
+        import writer2wiki.debug_utils as dbg
+
+        docPath = self.getDocumentPath()
+        conversionSettings = self._makeConversionSettings(docPath)
         textModel = self._document.getText()
 
-        self._convertXTextObject(textModel, conversionSettings)
+        # file's content is not the same as document's one if there are unsaved changes
+        isSaved = not self._document.isModified()
+        useCache = conversionSettings.useExtractionCache() and isSaved
+        useCheckpoint = conversionSettings.getCheckpointInterval() is not None and isSaved
+        from writer2wiki.convert.ExtractionCache import ExtractionCache
+        cache = ExtractionCache()
+        # hash of the whole file, computed only if it's needed
+        cacheKey = self._makeCacheKey(cache, docPath, conversionSettings) if useCache or useCheckpoint else None
 
-        dbg.printCentered('done')
-        print('result:\n', self.getResult())
+        if not useCache or not self._loadFromCache(cache, cacheKey, conversionSettings):
+            if useCheckpoint:
+                self._extractTextResumable(textModel, conversionSettings, cache.getCheckpointPath(docPath), cacheKey)
+            else:
+                self._extractText(textModel, conversionSettings)
+            self._printImagesStatistics()
+            # document's window is enabled while conversion runs in background, user may have edited it meanwhile
+            if useCache and self._document.isModified():
+                log.warning('document is changed during conversion, its content is not saved to extraction cache')
+            elif useCache:
+                cache.save(cacheKey, {'properties': self._getExtractedProperties(conversionSettings),
+                                      'charStyles': conversionSettings.readCharStyles(),
+                                      'paragraphs': [p.toDict() for p in self._paragraphs]})
+
+        self._prepareParagraphs(conversionSettings)
 
         targetFile = docPath.with_suffix(self.getFileExtension())
+        outputFiles = self.getOutputFiles(targetFile, conversionSettings)
+
+        dbg.printCentered('done')
+        print('result:\n', outputFiles[0][1])
+
         if targetFile.exists():
             from writer2wiki.w2w_office.lo_enums import MbType, MbButtons, MbResult
             answer = self._ui.messageBox(
@@ -83,51 +279,280 @@ class BaseConverter(metaclass=ABCMeta):
         else:
             self._ui.messageBox(ui_text.conversionDoneAndTargetFileDoesNotExist(targetFile, conversionSettings))
 
-        with openW2wFile(targetFile, 'w') as f:
-            f.write(self.getResult())
+        for path, content in outputFiles:
+            with openW2wFile(path, 'w') as f:
+                f.write(content)
 
-        if not conversionSettings.saveStyles():
-            self._ui.messageBox(ui_text.failedToSaveMappingsFile(conversionSettings.getFilePath()))
+        self._afterResultSaved(targetFile, [path for path, _ in outputFiles], conversionSettings)
+        self._saveStyles(conversionSettings)
 
-    def _convertXTextObject(self, textUno, conversionSettings):
+    def _makeExtractionSession(self):
+        return ExtractionSession(self._document, inBackground=self._cancelEvent is not None)
+
+    def _extractText(self, textUno, conversionSettings, paragraphRange: range = None, paragraphsCount: int = None):
+        """ Convert document's top level text object (or a range of it) inside extraction session, see
+            `_convertXTextObject`
+
+        :param paragraphsCount: number of paragraphs in `textUno` for progress indicator, None for the whole document
+        """
+        from writer2wiki.w2w_office.progress import ProgressIndicator
+
+        started = time.perf_counter()
+        if paragraphsCount is None:
+            # counted once: it's not cached by Office, each read counts paragraphs of the whole document
+            paragraphsCount = self._document.ParagraphCount
+        self._progress = ProgressIndicator(self._document, 'Export to Wiki-text', paragraphsCount)
+        try:
+            with self._makeExtractionSession():
+                self._convertXTextObject(textUno, conversionSettings, paragraphRange)
+        finally:
+            self._progress.end()
+            self._progress = None
+            self._saveStyleSnapshot()
+        log.info('extracted %d paragraphs in %.3f s, %d of them read as plain text, %d lists',
+                 len(self._paragraphs), time.perf_counter() - started, self._plainParagraphsCount,
+                 self._listRegistry.getListsCount())
+
+    def _extractTextResumable(self, textUno, conversionSettings: ConversionSettings, checkpointPath: Path, cacheKey):
+        """ `_extractText()`, which periodically saves its progress and continues from the saved one, if there is a
+            checkpoint left by previous conversion of the same document, see `ExtractionCheckpoint`
+        """
+        from writer2wiki.convert.ExtractionCheckpoint import ExtractionCheckpoint
+
+        # extraction cache's key identifies document's content and extraction parameters
+        header = {'document': cacheKey,
+                  'properties': self._getExtractedProperties(conversionSettings),
+                  'charStyles': conversionSettings.readCharStyles()}
+        # content must match the saved file: user may edit document while conversion runs in background
+        checkpoint = ExtractionCheckpoint(checkpointPath, header, conversionSettings.getCheckpointInterval(),
+                                          isValid=lambda: not self._document.isModified())
+
+        paragraphRange = None
+        loaded = checkpoint.load()
+        if loaded is not None:
+            paragraphDicts, nextIndex = loaded
+            self._paragraphs = [Paragraph.fromDict(p) for p in paragraphDicts]
+            paragraphRange = range(nextIndex, sys.maxsize)
+            log.info('resuming extraction from checkpoint: %d paragraphs already read, continue from #%d',
+                     len(self._paragraphs), nextIndex + 1)
+
+        try:
+            checkpoint.start(resumed=loaded is not None)
+        except OSError as e:
+            print('ERR: failed to create checkpoint file, converting without it:', e)
+            self._extractText(textUno, conversionSettings, paragraphRange)
+            return
+
+        self._checkpoint = checkpoint
+        try:
+            self._extractText(textUno, conversionSettings, paragraphRange)
+        except ConversionCancelled:
+            # checkpoint is for recovery after crash, conversion cancelled by user must not be resumed next time
+            checkpoint.delete()
+            raise
+        finally:
+            self._checkpoint = None
+
+        checkpoint.delete()
+        log.info('checkpoint saved %d times in %.3f s', checkpoint.getSavesCount(), checkpoint.getSavingTime())
+
+    def _getStyleSnapshot(self, conversionSettings: ConversionSettings):
+        """ :return StyleSnapshot: snapshot shared with other documents with the same styles, if it's allowed to
+                                    cache document's content, and it's possible to tell its styles by file
+        """
+        from writer2wiki.convert.StyleSnapshot import StyleSnapshot
+
+        if self._styleSnapshot is None:
+            fingerprint = None
+            # file's styles are not the same as document's ones if there are unsaved changes
+            if conversionSettings.useExtractionCache() and not self._document.isModified():
+                fingerprint = StyleSnapshot.fingerprintOfFile(self.getDocumentPath())
+            self._styleSnapshot = StyleSnapshot(self._document.getStyleFamilies(), fingerprint)
+        return self._styleSnapshot
+
+    def _saveStyleSnapshot(self):
+        if self._styleSnapshot is None:
+            return
+
+        # styles may have been edited during conversion running in background, they don't match the file then
+        if self._document.isModified():
+            self._styleSnapshot.discardNewValues()
+        else:
+            self._styleSnapshot.save()
+
+    def _getExtractedProperties(self, conversionSettings: ConversionSettings) -> List[str]:
+        """ :return: UNO properties to read from text portions, according to extraction profile """
+        supportedProperties = self.makeParagraphDecorator().makeTextPortionDecorator().getSupportedUnoProperties()
+        ignoredProperties = conversionSettings.getIgnoredProperties()
+        return [p for p in supportedProperties if p not in ignoredProperties]
+
+    def _makeCacheKey(self, cache, docPath: Path, conversionSettings: ConversionSettings):
+        # extracted properties are not part of the key: entry with more properties than needed is used as well
+        return cache.makeKey(docPath, self.__class__.__name__, conversionSettings.exportImages())
+
+    def _loadFromCache(self, cache, cacheKey, conversionSettings: ConversionSettings) -> bool:
+        started = time.perf_counter()
+        entry = cache.load(cacheKey)
+        if entry is None:
+            return False
+
+        if not set(self._getExtractedProperties(conversionSettings)) <= set(entry['properties']) \
+                or (conversionSettings.readCharStyles() and not entry['charStyles']):
+            log.info('extraction cache entry has less properties than needed')
+            return False
+
+        # properties not needed any more are dropped by `Paragraph.prepare()`
+        paragraphs = [Paragraph.fromDict(p) for p in entry['paragraphs']]
+
+        # entry may be made in another folder, or images may have been deleted since then
+        if self._imageExporter is not None:
+            folder = self._imageExporter.getFolder()
+            missingImages = {name for p in paragraphs for name in p.getImageFiles() if not (folder / name).exists()}
+            if missingImages:
+                log.info('%d images of extraction cache entry are missing in %s, export them again',
+                         len(missingImages), folder)
+                return False
+
+        self._paragraphs = paragraphs
+        log.info('loaded %d paragraphs from extraction cache in %.3f s',
+                 len(self._paragraphs), time.perf_counter() - started)
+        return True
+
+    def _prepareParagraphs(self, conversionSettings: ConversionSettings):
+        """ Apply conversion settings to extracted paragraphs, see `Paragraph.prepare()` """
+        for p in self._paragraphs:
+            p.prepare(conversionSettings)
+
+    def _logStartupTime(self):
+        """ Log time from user's command to the first read paragraph (once per conversion) """
+        if self._startedAt is None:
+            return
+
+        elapsed = time.perf_counter() - self._startedAt
+        self._startedAt = None
+
+        try:
+            budget = float(os.environ.get(self.STARTUP_BUDGET_ENV, self.DEFAULT_STARTUP_BUDGET))
+        except ValueError:
+            budget = self.DEFAULT_STARTUP_BUDGET
+
+        if elapsed > budget:
+            log.warning('first paragraph read in %.3f s after command, budget is %.3f s', elapsed, budget)
+        else:
+            log.info('first paragraph read in %.3f s after command', elapsed)
+
+    def _makeFootnoteConverter(self):
+        # TODO design: we don't need `context` here, this means the method should be in separate class -
+        #              XTextObjectConverter or something like that
+        converter = self.__class__(self._context)
+        # current component may be another document by now, if conversion runs in background
+        converter._document = self._document
+        converter._imageExporter = self._imageExporter
+        converter._listRegistry = self._listRegistry
+        converter._styleSnapshot = self._styleSnapshot
+        # footnotes are short, building index of special content would take longer than the fast path saves
+        converter.USE_PLAIN_TEXT_FAST_PATH = False
+        return converter
+
+    def _appendImages(self, paragraph: Paragraph, contentEnumerationAccess):
+        """ Export all images from `contentEnumerationAccess` (paragraph or frame portion) and add links to them """
+        for contentUno in iterUnoCollection(contentEnumerationAccess.createContentEnumeration(Service.TEXT_CONTENT)):
+            if not Service.objectSupports(contentUno, Service.TEXT_GRAPHIC_OBJECT):
+                print('skip not supported frame content')
+                continue
+
+            fileName = self._imageExporter.exportGraphicObject(contentUno)
+            if fileName is not None:
+                paragraph.appendPortion(MarkupPortion(self.makeImageMarkup(fileName), fileName))
+
+    def _isPlainText(self, paragraphUno, specialContent: SpecialContentIndex, stateProperties) -> bool:
+        """ :return: True if paragraph's text has no special content (footnotes etc) and none of `stateProperties` is
+                     set directly (i.e. not from styles) for any part of it. Such paragraph can be read as a single
+                     string, without enumeration of its portions
+        """
+        if specialContent.hasSpecialContent(paragraphUno):
+            return False
+
+        # for a range of text, property's state is ambiguous if it differs across the range
+        cursor = specialContent.getText().createTextCursorByRange(paragraphUno)
+        return all(state.value == PropertyState.DEFAULT_VALUE for state in cursor.getPropertyStates(stateProperties))
+
+    def _convertXTextObject(self, textUno, conversionSettings, paragraphRange: range = None):
+        """
+        :param textUno: any UNO object, which enumerates paragraphs (document's text, text range etc)
+        :param paragraphRange: indexes of paragraphs to convert, None to convert all paragraphs
+        """
         from writer2wiki.util import iterUnoCollection
 
+        extractedProperties = self._getExtractedProperties(conversionSettings)
+        readCharStyles = conversionSettings.readCharStyles()
+        styleSnapshot = self._getStyleSnapshot(conversionSettings)
+
+        stateProperties = extractedProperties + ['HyperLinkURL'] + (['CharStyleName'] if readCharStyles else [])
+        specialContent = None  # type: SpecialContentIndex
+
         for index, paragraphUno in enumerate(iterUnoCollection(textUno)):
-            if (index + 1) % 5 == 0:
-                print('iter #', index + 1, 'out of', self._document.ParagraphCount)
+            if paragraphRange is not None:
+                if index < paragraphRange.start:
+                    continue
+                if index >= paragraphRange.stop:
+                    break
+
+            if self._cancelEvent is not None and self._cancelEvent.is_set():
+                raise ConversionCancelled()
+            if self._checkpoint is not None:
+                self._checkpoint.maybeSave(index, self._paragraphs)
+            if self._progress is not None:
+                self._progress.update(index)
+
+            self._logStartupTime()
             if Service.objectSupports(paragraphUno, Service.TEXT_TABLE):
                 print('skip text table')
                 continue
 
-            paragraphDecorator = self.makeParagraphDecorator()
-            paragraph = Paragraph(paragraphUno, conversionSettings)
-            supportedProperties = paragraphDecorator.makeTextPortionDecorator().getSupportedUnoProperties()
-
-            for portionUno in iterUnoCollection(paragraphUno):
-                portionType = portionUno.TextPortionType
-                if portionType == TextPortionType.TEXT:
-
-                    portion = TextPortion(portionUno,
-                                          self._document.getStyleFamilies(),
-                                          conversionSettings,
-                                          supportedProperties
-                                          )
-                    if not portion.isEmpty():
-                        paragraph.appendPortion(portion)
-
-                elif portionType == TextPortionType.FOOTNOTE:
-                    # TODO convert: recognize endnotes - it has same portion type
-                    self._hasFootnotes = True
-                    caption = portionUno.getString()
-
-                    # TODO design: we don't need `context` here, this means the method should be in separate class -
-                    #              XTextObjectConverter or something like that
-                    footConverter = self.__class__(self._context)
-                    footConverter._convertXTextObject(portionUno.Footnote, conversionSettings)
-                    paragraph.appendFootnote(caption, footConverter.getResult())
-
-                else:
-                    print('skip portion with not supported type: ' + portionType)
-                    continue
+            paragraph = Paragraph(paragraphUno, self._listRegistry)
+
+            if self._imageExporter is not None:
+                # images anchored to paragraph (as opposed to character) are not enumerated as text portions
+                self._appendImages(paragraph, paragraphUno)
+
+            if self.USE_PLAIN_TEXT_FAST_PATH and specialContent is None:
+                # `textUno` may be a text range (e.g. selection), which doesn't know positions of text content.
+                # Only content inside it is indexed
+                specialContent = SpecialContentIndex(self._document, paragraphUno.getText(), textUno)
+
+            if self.USE_PLAIN_TEXT_FAST_PATH and self._isPlainText(paragraphUno, specialContent, stateProperties):
+                text = paragraphUno.getString()
+                if text:
+                    paragraph.appendPortion(TextPortion.makePlain(text))
+                self._plainParagraphsCount += 1
+            else:
+                for portionUno in iterUnoCollection(paragraphUno):
+                    portionType = portionUno.TextPortionType
+                    if portionType == TextPortionType.TEXT:
+
+                        portion = TextPortion(portionUno,
+                                              styleSnapshot,
+                                              extractedProperties,
+                                              readCharStyles
+                                              )
+                        if not portion.isEmpty():
+                            paragraph.appendPortion(portion)
+
+                    elif portionType == TextPortionType.FOOTNOTE:
+                        # TODO convert: recognize endnotes - it has same portion type
+                        caption = portionUno.getString()
+
+                        footConverter = self._makeFootnoteConverter()
+                        footConverter._convertXTextObject(portionUno.Footnote, conversionSettings)
+                        paragraph.appendFootnote(caption, footConverter._paragraphs)
+
+                    elif portionType == TextPortionType.FRAME and self._imageExporter is not None:
+                        self._appendImages(paragraph, portionUno)
+
+                    else:
+                        print('skip portion with not supported type: ' + portionType)
+                        continue
+
 
             self.addParagraph(paragraph)
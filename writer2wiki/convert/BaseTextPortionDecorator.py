@@ -5,6 +5,7 @@
 
 
 from abc import abstractmethod, ABCMeta
+from typing import List, Tuple
 
 from writer2wiki.convert.TextPortion import TextPortion
 
@@ -15,22 +16,62 @@ class BaseTextPortionDecorator(metaclass=ABCMeta):
     @abstractmethod
     def getSupportedUnoProperties(cls): pass
 
-    @classmethod
     @abstractmethod
-    def _replaceNonBreakingChars(cls, text: str) -> str: pass
+    def _escapeText(self, text: str) -> str:
+        """ Escape markup-significant chars of plain text, see `getDecoratedText()` args for the context """
+        pass
 
     @abstractmethod
     def _afterPropertiesApplied(self) -> None: pass
 
+    @abstractmethod
+    def _wrapsInTemplate(self, properties) -> bool:
+        """ :return: True if text decorated with `properties` is put inside a template, see `insideTemplate` arg """
+        pass
+
+    @abstractmethod
+    def _getWrappers(self, properties) -> List[Tuple[str, str]]:
+        """ :return: (opening, closing) markup put around the text by decorating it with `properties`, the innermost
+                     first. Only edge chars of markup are used, see `markupBefore` arg of `getDecoratedText()` """
+        pass
+
     def __init__(self):
         self._originalText = ''
         self._result = ''
         self._isLink = False
+        self._atLineStart = False
+        self._insideTemplate = False
+        self._markupBefore = ''
+        self._markupAfter = ''
+
+    def getDecoratedText(self, textPortion: TextPortion, atLineStart=False, insideTemplate=False,
+                         markupBefore='', markupAfter=''):
+        """
+        :param atLineStart: portion is at the beginning of a line
+        :param insideTemplate: decorated text will be put inside a template (i.e. a named style)
+        :param markupBefore: output, which directly precedes decorated text (e.g. decorated previous portion). Text
+                             is escaped, so that it isn't merged with that markup
+        :param markupAfter: output, which directly follows decorated text, see `getOpeningMarkup()`
+        """
+        if textPortion.isMarkup():
+            return textPortion.getRawText()
 
-    def getDecoratedText(self, textPortion: TextPortion):
         self._originalText = textPortion.getRawText()
-        self._result = self._replaceNonBreakingChars(self._originalText)
         self._isLink = 'HyperLinkURL' in textPortion.getProperties()
+        # the innermost markup of portion's own properties is the only thing text touches then
+        wrappers = self._getWrappers(textPortion.getProperties())
+        if wrappers:
+            self._atLineStart = False
+            self._markupBefore, self._markupAfter = wrappers[0]
+        else:
+            self._atLineStart = atLineStart
+            self._markupBefore, self._markupAfter = markupBefore, markupAfter
+        # text may be put inside a template by decorator itself
+        self._insideTemplate = insideTemplate or self._wrapsInTemplate(textPortion.getProperties())
+        if textPortion.isComposite():
+            self._result = self._decorateChildren(textPortion)
+        else:
+            self._result = self._escapeText(self._originalText)
 
         # call decorator's methods to apply char properties to raw text, all method names
         # must start with 'apply', e.g. applyCharWeight(...)
@@ -45,3 +86,25 @@ class BaseTextPortionDecorator(metaclass=ABCMeta):
         self._afterPropertiesApplied()
 
         return self._result
+
+    def getOpeningMarkup(self, textPortion: TextPortion) -> str:
+        """ :return: beginning of decorated text as far as it's known without decorating: the outermost markup of
+                     portion or its raw text """
+        if textPortion.isMarkup():
+            return textPortion.getRawText()
+        wrappers = self._getWrappers(textPortion.getProperties())
+        return wrappers[-1][0] if wrappers else textPortion.getRawText()
+
+    def _decorateChildren(self, composite):
+        result = ''
+        children = composite.getChildren()
+        for index, child in enumerate(children):
+            isLast = index == len(children) - 1
+            # decorator keeps state of the portion being decorated, so children need their own decorators
+            result += self.__class__().getDecoratedText(
+                child,
+                atLineStart=self._atLineStart and index == 0,
+                insideTemplate=self._insideTemplate,
+                markupBefore=result or self._markupBefore,
+                markupAfter=self._markupAfter if isLast else self.getOpeningMarkup(children[index + 1]))
+        return result
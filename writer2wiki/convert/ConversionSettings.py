@@ -5,10 +5,11 @@
 
 
 import configparser
-from collections import Counter
+import os
+from collections import Counter, OrderedDict
 from pathlib import Path
 
-from writer2wiki.util import openW2wFile
+from writer2wiki.util import openW2wFile, lockFile
 
 
 class ConversionSettings:
@@ -19,6 +20,39 @@ class ConversionSettings:
     _KEY_STYLES_SECTION = 'styles'
     _KEY_OPTIONS_SECTION = 'options'
     _OPTION_IGNORE_FONT_COLOR = 'ignore font color'
+    _OPTION_EXPORT_IMAGES = 'export images'
+    _OPTION_XML_DUMP_FILE = 'xml dump file'
+    _OPTION_MAX_PAGE_SIZE = 'max page size'
+    _OPTION_OPTIMIZE_MARKUP = 'optimize markup'
+    _OPTION_CSS_CLASSES = 'css classes'
+    _OPTION_EXTRACTION_CACHE = 'extraction cache'
+    _OPTION_IGNORED_PROPERTIES = 'ignored properties'
+    _OPTION_EXTRACTION_PROFILE = 'extraction profile'
+    _OPTION_CHECKPOINT_INTERVAL = 'checkpoint interval'
+    _OPTION_DELTA_OUTPUT = 'delta output'
+    _OPTION_MAX_TEMPLATE_CALLS = 'max template calls'
+    _OPTION_MAX_TEMPLATE_DEPTH = 'max template depth'
+    _OPTION_MAX_POST_EXPAND_SIZE = 'max post-expand size'
+    _OPTION_PROFILE = 'profile'
+
+    PROFILE_FULL = 'full'
+    PROFILE_STRUCTURE_ONLY = 'structure only'
+
+    # names for `ignored properties` option -> UNO character properties
+    _CHAR_PROPERTIES = OrderedDict([
+        ('bold',            'CharWeight'),
+        ('italic',          'CharPosture'),
+        ('underline',       'CharUnderline'),
+        ('underline color', 'CharUnderlineColor'),
+        ('strikeout',       'CharStrikeout'),
+        ('case map',        'CharCaseMap'),
+        ('color',           'CharColor'),
+        ('escapement',      'CharEscapement'),
+    ])
+
+    CSS_CLASSES_NONE = 'no'
+    CSS_CLASSES_PER_DOCUMENT = 'document'
+    CSS_CLASSES_PER_FOLDER = 'folder'
 
     def __init__(self, documentFilePath: Path):
         self._docPath = documentFilePath
@@ -56,8 +90,111 @@ class ConversionSettings:
         if self.hadOnlyLegacyMapFile():
             self._initStyleMapFromFile()
 
+    def _getYesNoOption(self, name, default):
+        return self._options.get(name, default).strip().lower() == 'yes'
+
     def ignoreFontColor(self) -> bool:
-        return self._options.get(self._OPTION_IGNORE_FONT_COLOR, 'no').strip().lower() == 'yes'
+        return self._getYesNoOption(self._OPTION_IGNORE_FONT_COLOR, 'no')
+
+    def exportImages(self) -> bool:
+        return self._getYesNoOption(self._OPTION_EXPORT_IMAGES, 'yes')
+
+    def getExtractionProfile(self):
+        """ :return str: one of PROFILE_* constants """
+        profile = ' '.join(self._options.get(self._OPTION_EXTRACTION_PROFILE, self.PROFILE_FULL).lower().split())
+        if profile not in (self.PROFILE_FULL, self.PROFILE_STRUCTURE_ONLY):
+            print("ERR: unexpected value of option '{}': '{}'".format(self._OPTION_EXTRACTION_PROFILE, profile))
+            return self.PROFILE_FULL
+        return profile
+
+    def readCharStyles(self) -> bool:
+        """ :return: False if character styles should not be read from document (and converted) at all """
+        return self.getExtractionProfile() != self.PROFILE_STRUCTURE_ONLY
+
+    def getIgnoredProperties(self):
+        """ :return set: UNO names of character properties, which should not be read from document at all """
+        if self.getExtractionProfile() == self.PROFILE_STRUCTURE_ONLY:
+            return set(self._CHAR_PROPERTIES.values())
+
+        ignored = set()
+        for name in self._options.get(self._OPTION_IGNORED_PROPERTIES, '').split(','):
+            name = ' '.join(name.lower().split())
+            if not name:
+                continue
+            if name not in self._CHAR_PROPERTIES:
+                print("ERR: unknown property in option '{}': '{}'".format(self._OPTION_IGNORED_PROPERTIES, name))
+                continue
+            ignored.add(self._CHAR_PROPERTIES[name])
+
+        if self.ignoreFontColor():
+            ignored.add(self._CHAR_PROPERTIES['color'])
+
+        return ignored
+
+    def useExtractionCache(self) -> bool:
+        return self._getYesNoOption(self._OPTION_EXTRACTION_CACHE, 'yes')
+
+    def getCheckpointInterval(self):
+        """ :return int|None: seconds between saves of extraction progress, None if it should not be saved """
+        return self._getPositiveIntOption(self._OPTION_CHECKPOINT_INTERVAL)
+
+    def optimizeMarkup(self) -> bool:
+        return self._getYesNoOption(self._OPTION_OPTIMIZE_MARKUP, 'yes')
+
+    def getCssClassesMode(self):
+        """ :return str: one of CSS_CLASSES_* constants """
+        mode = self._options.get(self._OPTION_CSS_CLASSES, self.CSS_CLASSES_NONE).strip().lower()
+        if mode not in (self.CSS_CLASSES_NONE, self.CSS_CLASSES_PER_DOCUMENT, self.CSS_CLASSES_PER_FOLDER):
+            print("ERR: unexpected value of option '{}': '{}'".format(self._OPTION_CSS_CLASSES, mode))
+            return self.CSS_CLASSES_NONE
+        return mode
+
+    def getCssStylesheetFile(self):
+        """ :return Path: stylesheet for `css classes` option """
+        if self.getCssClassesMode() == self.CSS_CLASSES_PER_FOLDER:
+            return self._docPath.parent / 'writer2wiki-folder-styles.css'
+        return self._docPath.with_suffix('.wiki.css')
+
+    def getXmlDumpFile(self):
+        """ :return Path|None: path to MediaWiki XML dump of all converted files in the folder """
+        fileName = self._options.get(self._OPTION_XML_DUMP_FILE, '').strip()
+        if not fileName:
+            return None
+        return self._docPath.parent / fileName
+
+    def profile(self) -> bool:
+        return self._getYesNoOption(self._OPTION_PROFILE, 'no')
+
+    def writeDelta(self) -> bool:
+        return self._getYesNoOption(self._OPTION_DELTA_OUTPUT, 'no')
+
+    def _getPositiveIntOption(self, name, default=''):
+        """ :return int|None: None if option is blank, 0 or not a number """
+        value = self._options.get(name, default).strip()
+        if not value:
+            return None
+
+        try:
+            number = int(value)
+        except ValueError:
+            print("ERR: option '{}' must be a number, got '{}'".format(name, value))
+            return None
+
+        return number if number > 0 else None
+
+    def getMaxPageSize(self):
+        """ :return int|None: max size of converted page in bytes, None if document should not be split """
+        kilobytes = self._getPositiveIntOption(self._OPTION_MAX_PAGE_SIZE)
+        return kilobytes * 1024 if kilobytes is not None else None
+
+    def getRenderCostLimits(self):
+        """ :return dict: limits of `WikiRenderCost` values, a warning is logged for a page exceeding them.
+                           Keys are 'calls', 'depth' and 'postExpandSize' (bytes), values are None if not limited
+        """
+        postExpandKilobytes = self._getPositiveIntOption(self._OPTION_MAX_POST_EXPAND_SIZE, '2048')
+        return {'calls': self._getPositiveIntOption(self._OPTION_MAX_TEMPLATE_CALLS, '20000'),
+                'depth': self._getPositiveIntOption(self._OPTION_MAX_TEMPLATE_DEPTH, '40'),
+                'postExpandSize': postExpandKilobytes * 1024 if postExpandKilobytes is not None else None}
 
     # TODO delete
     def hadOnlyLegacyMapFile(self):
@@ -157,6 +294,96 @@ class ConversionSettings:
             # Default: no
             {opt_ignore_font_color} = no
 
+            # Merge adjacent text spans with identical styles and don't use {{{{#tag:span|...}}}} for
+            # spans outside of templates. Converted pages are rendered faster by MediaWiki.
+            # Values: yes/no
+            # Default: yes
+            {opt_optimize_markup} = yes
+
+            # Replace inline styles of text (e.g. <span style="color:#FF0000">) with short CSS classes
+            # (<span class="w2w-c1">), defined in a stylesheet for MediaWiki's TemplateStyles extension.
+            # The stylesheet is saved either to `<document>.wiki.css` (one for each document) or to
+            # `writer2wiki-folder-styles.css` (shared by all documents in this folder). Create a page
+            # `Template:<stylesheet file name>` in your wiki with stylesheet's content.
+            # Values: no/document/folder
+            # Default: no
+            {opt_css_classes} = no
+
+            # Save document's images to this folder and insert links to them ([[File:...]]).
+            # Images are named by their content, so the same image is saved only once.
+            # Values: yes/no
+            # Default: yes
+            {opt_export_images} = yes
+
+            # What to read from document: `{profile_full}` - everything supported; `{profile_structure}` -
+            # only text, links, lists, footnotes, images and paragraph styles, without any character
+            # formatting and character styles. The latter is much faster for big documents.
+            # Values: {profile_full}/{profile_structure}
+            # Default: {profile_full}
+            {opt_extraction_profile} = {profile_full}
+
+            # Character properties which are not read from document and not converted, comma-separated.
+            # Values: any of: {property_names}
+            # Default: blank
+            {opt_ignored_properties} =
+
+            # Keep document's content read from Office in `.writer2wiki-cache` folder in your home
+            # folder. When you change only settings in this file, saved document is converted again
+            # much faster. Documents with unsaved changes are always read from Office. Styles are kept
+            # too and reused by all documents made from the same template.
+            # Values: yes/no
+            # Default: yes
+            {opt_extraction_cache} = yes
+
+            # Save progress of reading a document from Office every this many seconds, to a file in
+            # `.writer2wiki-cache` folder in your home folder. If Office crashes on a big document, next
+            # conversion continues from the last save instead of starting over. The file is deleted when
+            # document is read. Only saved documents are resumed.
+            # Values: seconds, or blank (or 0) to disable
+            # Default: blank
+            {opt_checkpoint_interval} =
+
+            # Write all converted files of this folder to a single MediaWiki XML dump, which can be
+            # loaded into a wiki with `php maintenance/importDump.php <file name>`. Page titles are
+            # file names without extension, characters not allowed in titles ([]{{}}|#<>) are replaced
+            # with '-'. Each conversion adds its pages as new revisions. If file name ends with `.gz`,
+            # dump is compressed.
+            # Values: file name in this folder, e.g. `wiki-import.xml.gz`, or blank to disable
+            # Default: blank
+            {opt_xml_dump_file} =
+
+            # Split big documents into several wiki pages at headings, so that each page is not larger
+            # than this size (MediaWiki's default limit, $wgMaxArticleSize, is 2048 kilobytes). Parts
+            # are saved to files `<document> (part N).wiki.txt`, converted file will contain links
+            # to all parts.
+            # Values: size in kilobytes, or blank (or 0) to disable
+            # Default: blank
+            {opt_max_page_size} =
+
+            # Besides converted file, save `<document>.wiki.delta.json` with only those sections
+            # (parts of text starting at headings), which have changed since the previous conversion.
+            # Hashes of sections are kept in `<document>.wiki.sections.json`. Not used for documents
+            # split into several pages, see `{opt_max_page_size}` option.
+            # Values: yes/no
+            # Default: no
+            {opt_delta_output} = no
+
+            # Warn (in the log file) about converted pages, which may be too expensive for MediaWiki
+            # to render: number of template and parser function calls, their max nesting depth and
+            # estimated post-expand size in kilobytes (MediaWiki's limit is $wgMaxArticleSize).
+            # Values: numbers, or blank (or 0) to not check
+            # Default: 20000, 40, 2048
+            {opt_max_template_calls} = 20000
+            {opt_max_template_depth} = 40
+            {opt_max_post_expand_size} = 2048
+
+            # Measure where conversion spends time and memory and save reports next to document:
+            # `<document>.w2w-profile.prof` and `<document>.w2w-profile.txt`. Conversion is much slower
+            # with this option, turn it on only to send reports about slow documents to developers.
+            # Values: yes/no
+            # Default: no
+            {opt_profile} = no
+
             
             #{section_sep}
             # This section sets mappings of Office user-defined (custom) styles to wiki templates.
@@ -173,7 +400,25 @@ class ConversionSettings:
             [{styles}]  
             
             """.format(options=self._KEY_OPTIONS_SECTION, styles=self._KEY_STYLES_SECTION,
-                       opt_ignore_font_color=self._OPTION_IGNORE_FONT_COLOR, section_sep='-' * 79))
+                       opt_ignore_font_color=self._OPTION_IGNORE_FONT_COLOR,
+                       opt_optimize_markup=self._OPTION_OPTIMIZE_MARKUP,
+                       opt_css_classes=self._OPTION_CSS_CLASSES,
+                       opt_export_images=self._OPTION_EXPORT_IMAGES,
+                       opt_extraction_cache=self._OPTION_EXTRACTION_CACHE,
+                       opt_checkpoint_interval=self._OPTION_CHECKPOINT_INTERVAL,
+                       opt_extraction_profile=self._OPTION_EXTRACTION_PROFILE,
+                       opt_ignored_properties=self._OPTION_IGNORED_PROPERTIES,
+                       profile_full=self.PROFILE_FULL,
+                       profile_structure=self.PROFILE_STRUCTURE_ONLY,
+                       property_names=', '.join(self._CHAR_PROPERTIES.keys()),
+                       opt_xml_dump_file=self._OPTION_XML_DUMP_FILE,
+                       opt_max_page_size=self._OPTION_MAX_PAGE_SIZE,
+                       opt_delta_output=self._OPTION_DELTA_OUTPUT,
+                       opt_max_template_calls=self._OPTION_MAX_TEMPLATE_CALLS,
+                       opt_max_template_depth=self._OPTION_MAX_TEMPLATE_DEPTH,
+                       opt_max_post_expand_size=self._OPTION_MAX_POST_EXPAND_SIZE,
+                       opt_profile=self._OPTION_PROFILE,
+                       section_sep='-' * 79))
 
     def saveStyles(self):
 
@@ -190,14 +435,51 @@ class ConversionSettings:
         # but comments on newly appended styles (see code below) would be lost.
         # If in future we would need more flexibility (e.g. change [options] programmatically),
         # probably the easiest solution would be to use ConfigObj library.
-        with openW2wFile(self._settingsFilePath, 'a') as f:
-            if not f.writable():
-                return False
+        #
+        # Several conversions in the same folder may run in parallel: file is re-read and rewritten under a lock,
+        # so that styles added by others are kept and not added twice. Readers (see `__init__()`) don't need the
+        # lock, as the file is replaced atomically.
+        try:
+            with lockFile(self._settingsFilePath):
+                self._mergeStylesIntoFile()
+        except OSError as e:  # TimeoutError as well
+            print('ERR: failed to save settings file:', e)
+            return False
+
+        return True
 
-            if self.settingsFileExisted():
+    def _mergeStylesIntoFile(self):
+        existingText = None
+        existingStyles = set()
+        if self._settingsFilePath.exists():
+            # universal newlines: the file is written back with `openW2wFile()` line endings
+            with self._settingsFilePath.open('r', encoding='utf-8') as f:
+                existingText = f.read()
+
+            current = configparser.ConfigParser(comment_prefixes=('#',), delimiters=('=',),
+                                                empty_lines_in_values=False, strict=False)
+            current.optionxform = lambda option: option
+            try:
+                current.read_string(existingText)
+                if current.has_section(self._KEY_STYLES_SECTION):
+                    existingStyles = set(current[self._KEY_STYLES_SECTION].keys())
+            except configparser.Error as e:
+                # e.g. user has broken the file while conversion was running: keep user's text as is and append
+                # all missing styles, some of them may be already there
+                print('ERR: failed to re-read settings file, append styles without checking it:', e)
+
+        # added by another conversion since this one has read the file
+        newStyles = sorted(self.getMissingStyles() - existingStyles)
+        if existingText is not None and not newStyles:
+            return
+
+        tmpPath = self._settingsFilePath.with_name('.' + self._settingsFilePath.name + '.tmp')
+        with openW2wFile(tmpPath, 'w') as f:
+            if existingText is not None:
                 from datetime import datetime
+                f.write(existingText)
                 f.write("\n\n# below are styles automatically added by Writer2Wiki from '{}' "
-                        "on {:%Y-%m-%d %H:%M:%S}, change them as you see fit"
+                        "on {:%Y-%m-%d %H:%M:%S}, change them as you see fit\n"
                         .format(self._docPath.name, datetime.today()))
             else:
                 f.write(self._newFileIntroText())
@@ -207,10 +489,10 @@ class ConversionSettings:
                     for styleName in sorted(self._styleMap.keys() - self._missingStyles):
                         f.write('{} = {}\n'.format(styleName, self._styleMap[styleName]))
 
-            for styleName in sorted(self.getMissingStyles()):
+            for styleName in newStyles:
                 f.write('{0} = {0}\n'.format(styleName))
 
-        return True
+        os.replace(str(tmpPath), str(self._settingsFilePath))
 
     def settingsFileExisted(self):
         return self._settingsFileExisted
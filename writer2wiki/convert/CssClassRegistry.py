@@ -0,0 +1,122 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+
+from writer2wiki.util import openW2wFile
+
+
+class CssClassRegistry:
+    """ Replaces inline styles of converted text (<span style="...">) with short class names (<span class="w2w-c3">),
+        one class for each distinct style. Classes are defined in a stylesheet for MediaWiki's TemplateStyles
+        extension, which is included into pages with `<templatestyles src="..." />` tag.
+
+        Stylesheet can be shared by all documents in a folder: existing classes are read from the stylesheet file,
+        so class names stay the same across conversions and new styles are appended to the end (other content of the
+        file, e.g. rules added by user, is kept). Parallel
+        conversions must hold `lockFile(getPath())` from `load()` till `save()`.
+    """
+
+    _CLASS_PREFIX = 'w2w-c'
+    _INLINE_STYLE_RE = re.compile(r'<span style="([^"]*)">')
+    _RULE_RE = re.compile(r'^\.(' + _CLASS_PREFIX + r'\d+)\s*\{\s*(.*?)\s*\}\s*$')
+
+    def __init__(self, stylesheetPath: Path):
+        """
+        :param stylesheetPath: file to save stylesheet to. File name is used as page name of stylesheet in wiki
+        """
+        self._path = stylesheetPath
+        self._classes = OrderedDict()  # css style => class name
+        self._lastNumber = 0
+        self._newClassesCount = 0
+        self._loadedText = ''
+
+    def getPath(self):
+        return self._path
+
+    def load(self):
+        """ Continue numbering of classes from stylesheet file, if it exists """
+        if not self._path.exists():
+            return
+
+        with openW2wFile(self._path, 'r', newline=None) as f:
+            self._loadedText = f.read()
+
+        for line in self._loadedText.splitlines():
+            match = self._RULE_RE.match(line)
+            if match:
+                className = match.group(1)
+                self._classes[match.group(2)] = className
+                # rules may have been deleted from the file, their numbers must not be reused
+                self._lastNumber = max(self._lastNumber, int(className[len(self._CLASS_PREFIX):]))
+
+    def save(self):
+        """ Write stylesheet file if classes were added since `load()` """
+        if self._newClassesCount == 0:
+            return
+
+        text = self._loadedText
+        if text and not text.endswith('\n'):
+            text += '\n'
+        newClasses = list(self._classes.items())[-self._newClassesCount:]
+        text += ''.join(self._makeRule(className, style) for style, className in newClasses)
+
+        tmpPath = self._path.with_name('.{}.{}.tmp'.format(self._path.name, os.getpid()))
+        with openW2wFile(tmpPath, 'w') as f:
+            f.write(text)
+        os.replace(str(tmpPath), str(self._path))
+        self._loadedText = text
+        self._newClassesCount = 0
+
+    def getClassName(self, cssStyle):
+        if cssStyle not in self._classes:
+            self._lastNumber += 1
+            self._newClassesCount += 1
+            self._classes[cssStyle] = self._CLASS_PREFIX + str(self._lastNumber)
+        return self._classes[cssStyle]
+
+    def replaceInlineStyles(self, text):
+        """
+        :return str: text with inline styles replaced by classes. If text had any styles, stylesheet is included
+                     at the beginning of the text
+        """
+        return self.replaceInlineStylesInParts([text])[0]
+
+    def replaceInlineStylesInParts(self, parts):
+        """ Same as `replaceInlineStyles()` for a page made of several parts (e.g. sections)
+
+        :param List[str] parts:
+        :return List[str]: stylesheet is included at the beginning of the first part
+        """
+        replacedCount = 0
+
+        def replace(match):
+            nonlocal replacedCount
+            replacedCount += 1
+            return '<span class="{}">'.format(self.getClassName(match.group(1)))
+
+        parts = [self._INLINE_STYLE_RE.sub(replace, text) for text in parts]
+        if replacedCount == 0:
+            return parts
+
+        parts[0] = '<templatestyles src="{}" />\n'.format(self._path.name) + parts[0]
+        return parts
+
+    @staticmethod
+    def _makeRule(className, style):
+        return '.{} {{ {} }}\n'.format(className, style)
+
+    def getStylesheet(self):
+        return ''.join(self._makeRule(className, style) for style, className in self._classes.items())
+
+    def getPath(self):
+        return self._path
+
+    def isEmpty(self):
+        return len(self._classes) == 0
@@ -0,0 +1,94 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+class ExtractionCache:
+    """ On-disk cache of documents' content extracted from Office, see `Paragraph.toDict()`.
+
+        Entries are keyed by hash of document file's content and everything else extraction depends on (converter
+        version etc), so a stale entry is never used. Conversion settings, which are applied after extraction
+        (styles mapping etc), are not part of the key: if only they changed, document is converted from cache
+        without reading it from Office again. Entry records which properties were extracted, so it can serve
+        conversions which need less of them, see `BaseConverter._loadFromCache()`.
+
+        Entries are gzip-compressed JSON files. The least recently used entries are deleted when there are more
+        than `_MAX_ENTRIES`.
+    """
+
+    # increase when format of extracted paragraphs changes
+    FORMAT_VERSION = 3
+
+    _MAX_ENTRIES = 50
+    _CHUNK_SIZE = 64 * 1024
+    _FILE_SUFFIX = '.json.gz'
+    _CHECKPOINTS_FOLDER = 'checkpoints'
+
+    def __init__(self, folder: Path = None):
+        # TODO Py3.5: use pathlib.Path.home()
+        self._folder = folder or Path(os.path.expanduser('~/.writer2wiki-cache'))
+
+    def makeKey(self, docPath: Path, *extractionParams) -> str:
+        """
+        :param extractionParams: anything that affects extracted content, must have stable `str()` representation
+        """
+        sha1 = hashlib.sha1()
+        with docPath.open('rb') as f:
+            for chunk in iter(lambda: f.read(self._CHUNK_SIZE), b''):
+                sha1.update(chunk)
+
+        sha1.update(repr((self.FORMAT_VERSION,) + extractionParams).encode('utf-8'))
+        return sha1.hexdigest()
+
+    def getCheckpointPath(self, docPath: Path) -> Path:
+        """ :return: file for progress of document's extraction, see `ExtractionCheckpoint`. It's named by document's
+                     path, document's content is checked by checkpoint's header """
+        name = hashlib.sha1(str(docPath.resolve()).encode('utf-8')).hexdigest()
+        return self._folder / self._CHECKPOINTS_FOLDER / (name + self._FILE_SUFFIX)
+
+    def _getPath(self, key) -> Path:
+        return self._folder / (key + self._FILE_SUFFIX)
+
+    def load(self, key):
+        """ :return dict|None: entry saved with `save()`, None if there is no such entry """
+        path = self._getPath(key)
+        try:
+            with gzip.open(str(path), 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError):
+            print('ERR: broken extraction cache entry, deleting it:', path)
+            path.unlink()
+            return None
+
+        os.utime(str(path))  # mark as recently used
+        return data
+
+    def save(self, key, entry: dict):
+        """ :param entry: JSON-serializable extracted content, e.g. paragraphs' dicts """
+        self._folder.mkdir(parents=True, exist_ok=True)
+
+        path = self._getPath(key)
+        tmpPath = path.with_name('.' + path.name + '.tmp')
+        with gzip.open(str(tmpPath), 'wt', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(str(tmpPath), str(path))
+
+        self._deleteOldEntries()
+
+    def _deleteOldEntries(self):
+        entries = sorted(self._folder.glob('*' + self._FILE_SUFFIX), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in entries[self._MAX_ENTRIES:]:
+            try:
+                path.unlink()
+            except OSError:
+                print('ERR: failed to delete extraction cache entry:', path)
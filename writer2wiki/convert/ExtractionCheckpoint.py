@@ -0,0 +1,144 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import gzip
+import json
+import time
+import zlib
+from pathlib import Path
+
+
+class ExtractionCheckpoint:
+    """ File with progress of document's extraction, so that conversion can be resumed after Office crash
+        instead of starting from the beginning.
+
+        File is gzip-compressed JSON lines, the first one is a header which identifies the document and extraction
+        parameters. Each save appends a new gzip member with paragraphs extracted since the previous save and a line
+        with index of the next paragraph to read. So cost of a save doesn't depend on document's size, and a save
+        interrupted by crash only loses its own member.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: Path, header: dict, interval: float, isValid=None):
+        """
+        :param header: JSON-serializable document's and extraction's identity, checkpoint is resumed only if it's equal
+        :param interval: min seconds between saves
+        :param Callable[[], bool] isValid: checked before each save. Once it returns False (e.g. document doesn't
+                                           match the header any more), checkpoint is deleted and not saved again
+        """
+        self._path = path
+        self._header = dict(header, version=self.FORMAT_VERSION)
+        self._interval = interval
+        self._isValid = isValid
+        self._isDisabled = False
+        self._lastSaveTime = time.perf_counter()
+        self._savedParagraphsCount = 0
+        self._savesCount = 0
+        self._savingTime = 0.0
+        self._loaded = None  # type: tuple
+        self._isBroken = False
+
+    def load(self):
+        """
+        :return tuple|None: (list of paragraphs' dicts, index of paragraph to continue from), None if there is no
+                            checkpoint of the same document and extraction parameters
+        """
+        paragraphDicts = []
+        nextIndex = None
+        try:
+            with gzip.open(str(self._path), 'rt', encoding='utf-8') as f:
+                if json.loads(f.readline()) != self._header:
+                    print('checkpoint is from another version of document, ignore it:', self._path)
+                    return None
+
+                pending = []
+                for line in f:
+                    record = json.loads(line)
+                    if 'next' in record:
+                        paragraphDicts.extend(pending)
+                        pending = []
+                        nextIndex = record['next']
+                    else:
+                        pending.append(record['paragraph'])
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, zlib.error):
+            # the last save was interrupted, everything up to it is fine
+            self._isBroken = True
+            print('checkpoint has incomplete save, resuming from the previous one:', self._path)
+
+        if nextIndex is None:
+            return None
+
+        self._savedParagraphsCount = len(paragraphDicts)
+        self._loaded = paragraphDicts, nextIndex
+        return self._loaded
+
+    def start(self, resumed: bool):
+        """ :param resumed: continue existing checkpoint (after successful `load()`) or start a new one """
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        if not resumed:
+            self._write([], None)
+        elif self._isBroken:
+            # new saves would be unreadable after the broken one
+            self._write(*self._loaded)
+
+        self._loaded = None
+
+        self._lastSaveTime = time.perf_counter()
+
+    def _write(self, paragraphDicts, nextIndex):
+        with gzip.open(str(self._path), 'wt', encoding='utf-8') as f:
+            f.write(json.dumps(self._header) + '\n')
+            for p in paragraphDicts:
+                f.write(self._dumpParagraph(p))
+            if nextIndex is not None:
+                f.write(json.dumps({'next': nextIndex}) + '\n')
+
+        self._savedParagraphsCount = len(paragraphDicts)
+        self._isBroken = False
+
+    @staticmethod
+    def _dumpParagraph(paragraphDict):
+        return json.dumps({'paragraph': paragraphDict}, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    def maybeSave(self, nextIndex, paragraphs):
+        """ Save if interval has passed since the previous save
+
+        :param nextIndex: index of the next paragraph to be extracted, all before it are extracted
+        :param List[Paragraph] paragraphs: all paragraphs extracted so far, including saved ones
+        """
+        started = time.perf_counter()
+        if self._isDisabled or started - self._lastSaveTime < self._interval:
+            return
+
+        if self._isValid is not None and not self._isValid():
+            print('WARN: checkpoint is not valid any more, delete it:', self._path)
+            self._isDisabled = True
+            self.delete()
+            return
+
+        with gzip.open(str(self._path), 'at', encoding='utf-8') as f:
+            for p in paragraphs[self._savedParagraphsCount:]:
+                f.write(self._dumpParagraph(p.toDict()))
+            f.write(json.dumps({'next': nextIndex}) + '\n')
+
+        self._savedParagraphsCount = len(paragraphs)
+        self._savesCount += 1
+        self._lastSaveTime = time.perf_counter()
+        self._savingTime += self._lastSaveTime - started
+
+    def delete(self):
+        if self._path.exists():
+            self._path.unlink()
+
+    def getSavesCount(self):
+        return self._savesCount
+
+    def getSavingTime(self):
+        """ :return float: seconds spent on saves """
+        return self._savingTime
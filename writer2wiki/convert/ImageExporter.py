@@ -0,0 +1,159 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from writer2wiki.w2w_office.service import Service
+
+
+class ImageExporter:
+    """ Saves document's images to the folder of converted file.
+
+        Files are named by hash of their content, so an image used many times (logos, icons) is saved only once
+        per folder, and images which already exist in the folder are not overwritten.
+        Office writes image directly to disk and we hash it by chunks, so images are never held in memory.
+        An image repeated in the document is written and hashed only the first time, the next ones are recognized
+        by graphic's URL (older Office versions) or by graphic's UNO object.
+    """
+
+    _HASH_CHUNK_SIZE = 64 * 1024
+    _HASH_LENGTH = 16  # hex digits of sha1 used in file name, more than enough for a single folder
+    _DEFAULT_MIME_TYPE = 'image/png'
+
+    # Office can store graphic in any format it can read, but we keep original format whenever possible
+    _MIME_TO_EXTENSION = {
+        'image/png':     '.png',
+        'image/jpeg':    '.jpg',
+        'image/gif':     '.gif',
+        'image/bmp':     '.bmp',
+        'image/tiff':    '.tif',
+        'image/svg+xml': '.svg',
+    }
+
+    def __init__(self, context, targetFolder: Path):
+        self._context = context
+        self._folder = targetFolder
+        self._graphicProvider = None
+        self._writtenCount = 0
+        self._skippedCount = 0
+        self._repeatedCount = 0
+        self._fileByUrl = {}  # GraphicURL => exported file name
+        self._exportedGraphics = []  # (XGraphic, exported file name), UNO objects are compared by identity
+
+    def _getGraphicProvider(self):
+        if self._graphicProvider is None:
+            self._graphicProvider = Service.create(Service.GRAPHIC_PROVIDER, self._context)
+        return self._graphicProvider
+
+    @staticmethod
+    def _makeProperty(name, value):
+        import uno
+        prop = uno.createUnoStruct('com.sun.star.beans.PropertyValue')
+        prop.Name = name
+        prop.Value = value
+        return prop
+
+    @classmethod
+    def _fileHash(cls, path: Path):
+        hasher = hashlib.sha1()
+        with path.open('rb') as f:
+            for chunk in iter(lambda: f.read(cls._HASH_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()[:cls._HASH_LENGTH]
+
+    @staticmethod
+    def _getGraphicUrl(graphicObjectUno):
+        """ :return str: URL, which identifies graphic's content, empty if Office doesn't provide it """
+        try:
+            # removed in LibreOffice 6.1, e.g. 'vnd.sun.star.GraphicObject:10000000000000...' before that
+            return getattr(graphicObjectUno, 'GraphicURL', '') or ''
+        except Exception:  # RuntimeException: property is write-only
+            return ''
+
+    def _findExported(self, graphicUrl, graphic):
+        if graphicUrl:
+            return self._fileByUrl.get(graphicUrl)
+        for exportedGraphic, fileName in self._exportedGraphics:
+            if exportedGraphic == graphic:
+                return fileName
+        return None
+
+    def exportGraphicObject(self, graphicObjectUno):
+        """
+        :param graphicObjectUno: UNO object supporting `com.sun.star.text.TextGraphicObject` service
+        :return str|None: name of the image file (without folder) or None if image can't be exported
+        """
+        graphic = getattr(graphicObjectUno, 'Graphic', None)
+        if graphic is None:
+            print('ERR: graphic object has no `Graphic` property, skip it')
+            return None
+
+        graphicUrl = self._getGraphicUrl(graphicObjectUno)
+        fileName = self._findExported(graphicUrl, graphic)
+        if fileName is not None:
+            self._repeatedCount += 1
+            return fileName
+
+        fileName = self._exportGraphic(graphic)
+        if fileName is not None:
+            if graphicUrl:
+                self._fileByUrl[graphicUrl] = fileName
+            else:
+                self._exportedGraphics.append((graphic, fileName))
+        return fileName
+
+    def _exportGraphic(self, graphic):
+        import uno
+
+        mimeType = getattr(graphic, 'MimeType', '')
+        if mimeType not in self._MIME_TO_EXTENSION:
+            mimeType = self._DEFAULT_MIME_TYPE
+        extension = self._MIME_TO_EXTENSION[mimeType]
+
+        # unique name: conversions may run in parallel in the same folder
+        fd, tmpPath = tempfile.mkstemp(prefix='.writer2wiki-image.', suffix=extension, dir=str(self._folder))
+        os.close(fd)
+        tmpFile = Path(tmpPath)
+        try:
+            # Office may fail silently, existence of the file must mean it's written by Office
+            tmpFile.unlink()
+            self._getGraphicProvider().storeGraphic(graphic, (
+                self._makeProperty('URL', uno.systemPathToFileUrl(str(tmpFile))),
+                self._makeProperty('MimeType', mimeType)
+            ))
+
+            if not tmpFile.exists():
+                print('ERR: Office failed to save image to', tmpFile)
+                return None
+
+            fileName = 'w2w-' + self._fileHash(tmpFile) + extension
+            targetFile = self._folder / fileName
+            if targetFile.exists():
+                self._skippedCount += 1
+            else:
+                os.replace(str(tmpFile), str(targetFile))
+                self._writtenCount += 1
+        finally:
+            if tmpFile.exists():
+                tmpFile.unlink()
+
+        return fileName
+
+    def getFolder(self) -> Path:
+        return self._folder
+
+    def getWrittenCount(self):
+        return self._writtenCount
+
+    def getSkippedCount(self):
+        return self._skippedCount
+
+    def getRepeatedCount(self):
+        """ :return int: images, which were already exported during this conversion """
+        return self._repeatedCount
@@ -0,0 +1,277 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import gzip
+import io
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+from xml.sax.saxutils import escape
+
+from writer2wiki.util import openW2wFile, lockFile
+
+
+# characters MediaWiki doesn't allow in page titles, importDump.php silently skips such pages
+_FORBIDDEN_TITLE_CHARS_RE = re.compile(r'[\[\]{}|#<>\x00-\x1f\x7f]')
+
+
+def sanitizePageTitle(title: str) -> str:
+    """ Replace characters MediaWiki doesn't allow in page titles with '-' """
+    return _FORBIDDEN_TITLE_CHARS_RE.sub('-', title)
+
+
+def pageTitleFromFile(path: Path, fileExtension: str) -> str:
+    """ 'My document.wiki.txt' -> 'My document', 'Notes [draft].wiki.txt' -> 'Notes -draft-' """
+    name = path.name
+    if name.endswith(fileExtension):
+        name = name[:-len(fileExtension)]
+    return sanitizePageTitle(name)
+
+
+class MediaWikiDumpWriter:
+    """ Streaming writer of MediaWiki XML dump (the format of Special:Export), which can be loaded into a wiki with
+        `maintenance/importDump.php`.
+
+        Pages are written by chunks, so memory usage doesn't depend on pages' sizes. If file name ends with '.gz',
+        dump is gzip-compressed (importDump.php reads such files directly).
+        New dump is written to a temporary file and renamed when complete, so a half-written dump is never imported.
+        In append mode pages are added to the end of existing dump as new revisions (each one is a gzip member of
+        its own for compressed dump). If append is interrupted, dump is left without closing tag and `append()`
+        fails for it next time, so that it's rewritten.
+
+        Usage:
+            with MediaWikiDumpWriter(path) as dump:
+                dump.addPageFromFile('Title', wikiTextFilePath)
+    """
+
+    _CHUNK_SIZE = 64 * 1024
+    _XML_NS = 'http://www.mediawiki.org/xml/export-0.10/'
+    _CONTRIBUTOR = 'Writer2Wiki'
+    _FOOTER = '</mediawiki>\n'
+
+    def __init__(self, path: Path):
+        self._path = path
+        # unique per process: conversions may run in parallel in the same folder
+        self._tmpPath = path.with_name('.{}.{}.tmp'.format(path.name, os.getpid()))
+        self._file = None
+        self._rawFile = None  # underlying binary file in append mode
+        self._pagesCount = 0
+        self._writtenSize = 0
+
+    def _isCompressed(self):
+        return self._path.suffix == '.gz'
+
+    def __enter__(self):
+        if self._isCompressed():
+            self._file = gzip.open(str(self._tmpPath), 'wt', encoding='utf-8', newline='\n')
+        else:
+            self._file = open(str(self._tmpPath), 'w', encoding='utf-8', newline='\n')
+
+        self._file.write('<mediawiki xmlns="{0}" version="0.10" xml:lang="en">\n'.format(self._XML_NS))
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self._file.close()
+
+        if excType is None:
+            # written separately (as a gzip member of its own), so that `append()` can find it
+            with self._tmpPath.open('ab') as f:
+                f.write(self._encodedFooter())
+            os.replace(str(self._tmpPath), str(self._path))
+        else:
+            self._tmpPath.unlink()
+
+        return False
+
+    def _encodedFooter(self):
+        if not self._isCompressed():
+            return self._FOOTER.encode('utf-8')
+
+        # fixed header fields, so that footer's member is the same in every dump and can be found at its end
+        buffer = io.BytesIO()
+        with gzip.GzipFile(filename='', mode='wb', fileobj=buffer, mtime=0) as member:
+            member.write(self._FOOTER.encode('utf-8'))
+        return buffer.getvalue()
+
+    def append(self, pages):
+        """ Add pages to the end of existing dump written by this class
+
+        :param Iterable[Tuple[str, Path]] pages: (title, wiki-text file)
+        :return bool: False if there is no dump or its end is not the expected one, nothing is written then
+        """
+        footer = self._encodedFooter()
+        try:
+            self._rawFile = self._path.open('r+b')
+        except FileNotFoundError:
+            return False
+
+        try:
+            self._rawFile.seek(0, io.SEEK_END)
+            footerOffset = self._rawFile.tell() - len(footer)
+            if footerOffset < 0:
+                return False
+            self._rawFile.seek(footerOffset)
+            if self._rawFile.read() != footer:
+                return False
+
+            self._rawFile.seek(footerOffset)
+            self._rawFile.truncate()
+            for title, path in pages:
+                if self._isCompressed():
+                    member = gzip.GzipFile(filename='', mode='wb', fileobj=self._rawFile)
+                    self._file = io.TextIOWrapper(member, encoding='utf-8', newline='\n')
+                else:
+                    self._file = io.TextIOWrapper(self._rawFile, encoding='utf-8', newline='\n')
+                self.addPageFromFile(title, path)
+                self._file.flush()
+                # detach, so that closing wrapper (or gzip member) doesn't close the dump file
+                self._file.detach()
+                if self._isCompressed():
+                    member.close()
+                self._file = None
+
+            self._rawFile.write(footer)
+            return True
+        finally:
+            self._rawFile.close()
+            self._rawFile = None
+
+    def addPage(self, title, textChunks, timestamp: datetime):
+        """
+        :param str title: page title
+        :param Iterable[str] textChunks: page's wikitext
+        :param timestamp: time of page's revision
+        """
+        w = self._file.write
+        w('  <page>\n')
+        w('    <title>{}</title>\n'.format(escape(title)))
+        w('    <ns>0</ns>\n')
+        w('    <revision>\n')
+        w('      <timestamp>{:%Y-%m-%dT%H:%M:%SZ}</timestamp>\n'.format(timestamp))
+        w('      <contributor><username>{}</username></contributor>\n'.format(self._CONTRIBUTOR))
+        w('      <model>wikitext</model>\n')
+        w('      <format>text/x-wiki</format>\n')
+        w('      <text xml:space="preserve">')
+        for chunk in textChunks:
+            self._writtenSize += len(chunk)
+            w(escape(chunk))
+        w('</text>\n')
+        w('    </revision>\n')
+        w('  </page>\n')
+
+        self._pagesCount += 1
+
+    def addPageFromFile(self, title, path: Path):
+        def readChunks():
+            # read with universal newlines, we don't need Windows line endings in wiki
+            with openW2wFile(path, 'r', newline=None) as f:
+                for chunk in iter(lambda: f.read(self._CHUNK_SIZE), ''):
+                    yield chunk
+
+        self.addPage(title, readChunks(), datetime.fromtimestamp(path.stat().st_mtime, timezone.utc))
+
+    def getPagesCount(self):
+        return self._pagesCount
+
+    def getWrittenSize(self):
+        """ :return int: characters of wiki-text written by this writer """
+        return self._writtenSize
+
+
+class FolderDump:
+    """ MediaWiki XML dump of all converted files in a folder, kept up to date by every conversion.
+
+        Converted files are appended to the dump as new revisions of their pages, so each conversion costs only the
+        size of its own pages. The dump is rewritten from all files of the folder when there is none yet, or when
+        outdated revisions take more space than the current ones. Sizes of the current revisions are kept in a
+        hidden index file next to the dump. Updates of the dump by parallel conversions are serialized by a lock.
+    """
+
+    # dump is rewritten when it contains this many times more text than the current revisions
+    _MAX_OVERHEAD = 2
+
+    def __init__(self, dumpPath: Path, folder: Path, fileExtension: str, excludedSuffix: str):
+        """
+        :param excludedSuffix: skip files ending with `excludedSuffix` + `fileExtension` (e.g. previews)
+        """
+        self._dumpPath = dumpPath
+        self._folder = folder
+        self._fileExtension = fileExtension
+        self._excludedSuffix = excludedSuffix
+        self._indexPath = dumpPath.with_name('.' + dumpPath.name + '.index.json')
+
+    def _isPage(self, path: Path):
+        return path.name.endswith(self._fileExtension) \
+               and not path.name.endswith(self._excludedSuffix + self._fileExtension)
+
+    def _titledPages(self, paths):
+        pages = []
+        for path in paths:
+            title = pageTitleFromFile(path, self._fileExtension)
+            if title != path.name[:-len(self._fileExtension)]:
+                print("WARN: file name '{}' has characters not allowed in page titles, page is titled '{}'"
+                      .format(path.name, title))
+            pages.append((title, path))
+        return pages
+
+    def _loadIndex(self):
+        try:
+            with self._indexPath.open('r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index['pages'], index['written']
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            print('ERR: broken index of XML dump, dump is rewritten:', self._indexPath)
+            return None
+
+    def _saveIndex(self, pageSizes, writtenSize):
+        tmpPath = self._indexPath.with_name('{}.{}.tmp'.format(self._indexPath.name, os.getpid()))
+        with tmpPath.open('w', encoding='utf-8') as f:
+            json.dump({'pages': pageSizes, 'written': writtenSize}, f, ensure_ascii=False)
+        os.replace(str(tmpPath), str(self._indexPath))
+
+    @staticmethod
+    def _fileSize(path: Path):
+        """ :return int: characters of wiki-text in the file, as counted by `MediaWikiDumpWriter.getWrittenSize()` """
+        with openW2wFile(path, 'r', newline=None) as f:
+            return sum(len(chunk) for chunk in iter(lambda: f.read(MediaWikiDumpWriter._CHUNK_SIZE), ''))
+
+    def _rewrite(self):
+        pages = self._titledPages(sorted(p for p in self._folder.glob('*' + self._fileExtension) if self._isPage(p)))
+        with MediaWikiDumpWriter(self._dumpPath) as dump:
+            for title, path in pages:
+                dump.addPageFromFile(title, path)
+
+        self._saveIndex({title: self._fileSize(path) for title, path in pages}, dump.getWrittenSize())
+        return len(pages)
+
+    def update(self, changedFiles: List[Path]):
+        """
+        :param changedFiles: files just saved by conversion, the ones which are not pages are ignored
+        :return int: number of pages in dump
+        """
+        with lockFile(self._dumpPath):
+            index = self._loadIndex()
+            if index is None:
+                return self._rewrite()
+
+            pageSizes, writtenSize = index
+            pages = self._titledPages(p for p in changedFiles if self._isPage(p))
+            for title, path in pages:
+                pageSizes[title] = self._fileSize(path)
+
+            liveSize = sum(pageSizes.values())
+            appender = MediaWikiDumpWriter(self._dumpPath)
+            if writtenSize + sum(pageSizes[title] for title, _ in pages) > self._MAX_OVERHEAD * liveSize \
+                    or not appender.append(pages):
+                return self._rewrite()
+
+            self._saveIndex(pageSizes, writtenSize + appender.getWrittenSize())
+            return len(pageSizes)
@@ -4,40 +4,75 @@
 #           http://www.boost.org/LICENSE_1_0.txt)
 
 
+from collections import OrderedDict
 from typing import List
 
-from writer2wiki.convert.TextPortion import TextPortion
+from writer2wiki.convert.TextPortion import TextPortion, MarkupPortion, FootnotePortion, CompositePortion
 from writer2wiki.convert.ConversionSettings import ConversionSettings
+from writer2wiki.w2w_office.list_registry import ListRegistry
 
 
 class Paragraph:
     """ Wrapper for Office's Paragraph UNO object.
         Merges TextPortions with identical CharProperties upon addition of new portions
+
+        Extracted paragraph doesn't depend on conversion settings: it keeps Office's style names and all supported
+        properties. `prepare()` must be called before the paragraph is converted. Extracted paragraphs can be
+        saved with `toDict()` and restored without Office with `fromDict()`.
     """
 
-    # Improvement idea: it would be nice to merge text portions with nearly identical char properties.
-    # Example:
-    #   * we have 3 portions: {"aaa", italic}, {"bbb", bold, italic}, {"ccc", italic}
-    #   * merge them to: {["aaa", {"bbb", bold}, "ccc"], italic}
-    #
-    # Implementation ideas:
-    #   * Of course do it after all paragraph's portions are added to the list (initial compacting is
-    #     done and portions with identical styles are already merged)
-    #   * TextPortion._rawText should be able to hold either plain text or array
-    #     of TextPortion's. See "Composite pattern" on Wikipedia.
-    #   * Do merge only if portions differ by 1 property
-    #   * Think if we should do merge for 2 portions or better to set a minimum bar of 3
-    #   * Think what if we merge portions [{1,2,3}, {4,5}], but [{1,2},{3,4,5}] would be a better match
-    #     (at a first glance, this shouldn't be a problem at least if we keep "differ by 1 property"
-    #      rule, because if {3,4,5} have had same properties, they would be already merged on prev step)
+    # When settings are applied, `_compact()` merges portions with nearly identical char properties:
+    #   * 3 portions: {"aaa", italic}, {"bbb", bold, italic}, {"ccc", italic}
+    #   * are merged to: {["aaa", {"bbb", bold}, "ccc"], italic}
+    # and then portions with the same named style are merged to a single portion with that style. So decorators
+    # output each property and each named style once, and a decorator doesn't need to know how to merge portions.
     #
-    # If that's implemented, we can do merge for named styles directly on Paragraph
-    # instead of doing it in ParagraphDecorator (and hence make the merger format-agnostic)
+    # Portions are merged only if each of them differs from the common properties by 1 property at most.
+    # Otherwise nesting gets deep and doesn't make markup any shorter.
+    # Nothing is merged to hyperlinks: link's text can't contain other links and is escaped differently.
+
+    def __init__(self, paragraphUno, listRegistry: ListRegistry):
+        """ :param listRegistry: lists of the document being converted """
+        self._styleName = paragraphUno.ParaStyleName
+        self._outlineLevel = paragraphUno.OutlineLevel
+
+        listId = paragraphUno.ListId
+        if listId != '':
+            numberingLevel = paragraphUno.NumberingLevel
+            self._listLevel = numberingLevel + 1
+            self._isNumberedList = listRegistry.isNumbered(paragraphUno, listId, numberingLevel)
+        else:
+            self._listLevel = 0
+            self._isNumberedList = False
 
-    def __init__(self, paragraphUno, conversionSettings: ConversionSettings):
-        self._uno = paragraphUno
-        self._namedStyle = conversionSettings.getMappedStyle(paragraphUno.ParaStyleName)
         self._portions = []  # type: List[TextPortion]
+        self._namedStyle = None
+        self._preparedPortions = None  # type: List[TextPortion]
+
+    def toDict(self):
+        """ :return: JSON-serializable representation of extracted paragraph """
+        return {'style': self._styleName, 'outlineLevel': self._outlineLevel, 'listLevel': self._listLevel,
+                'numbered': self._isNumberedList, 'portions': [p.toDict() for p in self._portions]}
+
+    @classmethod
+    def fromDict(cls, data):
+        para = cls.__new__(cls)
+        para._styleName = data['style']
+        para._outlineLevel = data['outlineLevel']
+        para._listLevel = data['listLevel']
+        para._isNumberedList = data['numbered']
+        para._portions = [cls._portionFromDict(p) for p in data['portions']]
+        para._namedStyle = None
+        para._preparedPortions = None
+        return para
+
+    @classmethod
+    def _portionFromDict(cls, data):
+        if 'footnote' in data:
+            return FootnotePortion(data['caption'], [cls.fromDict(p) for p in data['footnote']])
+        if 'markup' in data:
+            return MarkupPortion.fromDict(data)
+        return TextPortion.fromDict(data)
 
     def __str__(self) -> str:
         return self.__class__.__name__ + "({})".format([str(p) for p in self._portions])
@@ -61,58 +96,134 @@ class Paragraph:
         else:
             self._portions.append(portion)
 
-    def appendFootnote(self, caption, content):
-        # TODO convert: this implementation is wiki-specific
-        # To make it format agnostic, one solution would be to create subclass for footnote portions:
-        #   1. char properties and raw text are taken from caption
-        #   2. content is completely converted to text and assigned in BaseConverter (as is now already)
-        #   3. this portion is appended to the `_portions` as usual portion
-        #   4. if styles of caption and the last portion are the same, merge them by ??"promoting"
-        #      the last portion to footnote portion??
-        #
-        # This will also allow to handle footnotes at the beginning of paragraph
-
-        if self.isEmpty():
-            print("NOT IMPLEMENTED: can't handle footnote at the start of paragraph")
-            return
-
-        if len(content) >= 2:
-            content = content[:-2]  # remove the last paragraph separator: '\n\n'
-
-        self._portions[-1].appendRawText('<ref>{}</ref>'.format(content))
+    def prepare(self, conversionSettings: ConversionSettings):
+        """ Apply conversion settings (styles mapping etc) to the extracted paragraph, can be called several times """
+        self._namedStyle = conversionSettings.getMappedStyle(self._styleName)
+        # document may be extracted with more properties than needed, e.g. loaded from cache
+        ignoredProperties = conversionSettings.getIgnoredProperties()
+        readCharStyles = conversionSettings.readCharStyles()
+
+        portions = []  # type: List[TextPortion]
+        for portion in self._portions:
+            # extracted portions are not changed, so the paragraph can be prepared again with other settings
+            if portion.isMarkup():
+                prepared = portion.copyWith(None, portion.getProperties())
+            else:
+                style = conversionSettings.getMappedStyle(portion.getStyleName()) if readCharStyles else None
+                prepared = portion.copyWith(style,
+                                            OrderedDict((name, value) for name, value in portion.getProperties().items()
+                                                        if name not in ignoredProperties))
+            if prepared.isFootnote():
+                for footnoteParagraph in prepared.getParagraphs():
+                    footnoteParagraph.prepare(conversionSettings)
+
+            # different Office styles may be mapped to the same wiki style
+            if portions and portions[-1].hasSameProperties(prepared):
+                portions[-1].appendRawText(prepared.getRawText())
+            else:
+                portions.append(prepared)
+
+        self._preparedPortions = __class__._compact(portions)
+
+    @staticmethod
+    def _compact(portions: List[TextPortion]) -> List[TextPortion]:
+        """ Merge portions with nearly identical properties and same named styles, see comment at class' top """
+        result = []  # type: List[TextPortion]
+        runStart = 0
+        for index in range(1, len(portions) + 1):
+            if index < len(portions) and portions[index].getStyleName() == portions[runStart].getStyleName():
+                continue
+
+            style = portions[runStart].getStyleName()
+            merged = __class__._mergeNearlyIdentical(portions[runStart:index])
+            if style and len(merged) > 1:
+                result.append(CompositePortion(style, OrderedDict(),
+                                               [p.copyWith(None, p.getProperties()) for p in merged]))
+            else:
+                result.extend(merged)
+            runStart = index
+
+        return result
+
+    @staticmethod
+    def _mergeNearlyIdentical(portions: List[TextPortion]) -> List[TextPortion]:
+        """ :param portions: portions with the same named style """
+
+        def canMerge(portion):
+            return not portion.isMarkup() and 'HyperLinkURL' not in portion.getProperties()
+
+        def commonProperties(first, second):
+            return OrderedDict((name, value) for name, value in first.items()
+                               if name in second and second[name] == value)
+
+        result = []
+        index = 0
+        while index < len(portions):
+            group = [portions[index]]
+            common = portions[index].getProperties()
+            if canMerge(portions[index]):
+                for candidate in portions[index + 1:]:
+                    if not canMerge(candidate):
+                        break
+                    newCommon = commonProperties(common, candidate.getProperties())
+                    if not newCommon or any(len(p.getProperties()) - len(newCommon) > 1 for p in group + [candidate]):
+                        break
+                    group.append(candidate)
+                    common = newCommon
+
+            if len(group) == 1:
+                result.append(group[0])
+            else:
+                children = [p.copyWith(None, OrderedDict((name, value) for name, value in p.getProperties().items()
+                                                         if name not in common))
+                            for p in group]
+                result.append(CompositePortion(group[0].getStyleName(), common, children))
+            index += len(group)
+
+        return result
+
+    def appendFootnote(self, caption, paragraphs):
+        """ :param List[Paragraph] paragraphs: footnote's content """
+        self.appendPortion(FootnotePortion(caption, paragraphs))
+
+    def hasFootnotes(self):
+        return any(p.isFootnote() for p in self._portions)
+
+    def getImageFiles(self):
+        """ :return List[str]: names of exported image files the paragraph refers to, including footnotes' ones """
+        result = []
+        for portion in self._portions:
+            if portion.isFootnote():
+                for footnoteParagraph in portion.getParagraphs():
+                    result.extend(footnoteParagraph.getImageFiles())
+            elif portion.isMarkup() and portion.getImageFile() is not None:
+                result.append(portion.getImageFile())
+        return result
 
     def getPortions(self):
-        return self._portions
+        """ :return: portions with applied settings, see `prepare()` """
+        return self._preparedPortions
 
     def getStyleName(self):
         return self._namedStyle
 
-    def isListItem(self):
-        return self._uno.ListId != ''
+    def getPlainText(self):
+        return ''.join(p.getPlainText() for p in self._portions)
 
-    def getListLevel(self):
-        # In ideal world `getListLevel` and `isNumberedList` methods should be removed from this class and defined in
-        # separate class like WikiListItemParagraphDecorator, which inherits from this one.
-        # But since I hasn't learned yet how to init base sub-object (which holds `_paragraphUNO` etc), I think that
-        # would be an overkill for these 2 one-liners.
-        #
-        # Maybe something like
-        #   from copy import copy
-        #   ...
-        #       self = copy(arg)
-
-        return self._uno.NumberingLevel + 1
-
-    def isNumberedList(self):
-        # TODO convert. ListLabelString is empty for unordered list items and contains strings like "1.",  "I.", "(a)"
-        #      for numbered lists. Most likely, code below is not going to work in case of numbered list with custom
-        #      icons instead of text labels. But this should be OK in most cases.
-        #
-        #      I hadn't found out what proper solution should be, check with MRI extension contents of
-        #      Paragraph::NumberingStyleName and Document::getStyleFamilies() and then getByName("NumberingStyles")
-        #      or something like that
+    def getExtractedPortionsCount(self):
+        """ :return int: portions read from document, including footnotes' ones """
+        return sum(sum(para.getExtractedPortionsCount() for para in p.getParagraphs()) if p.isFootnote() else 1
+                   for p in self._portions)
 
-        return len(self._uno.ListLabelString) > 0
+    def isHeading(self):
+        """ Paragraphs with outline level (e.g. with 'Heading N' styles) are document's chapters """
+        return self._outlineLevel > 0
 
+    def isListItem(self):
+        return self._listLevel > 0
 
+    def getListLevel(self):
+        return self._listLevel
 
+    def isNumberedList(self):
+        return self._isNumberedList
@@ -0,0 +1,135 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import hashlib
+import json
+import logging as log
+import os
+import zipfile
+from pathlib import Path
+
+from writer2wiki.convert.TextPortion import TextPortion
+
+
+class StyleSnapshot:
+    """ Values of properties of document's named styles (paragraph and character ones), read from Office once and
+        reused for all text portions, see `TextPortion._propertyIsInStyleOrIsDefault()`.
+
+        Documents created from the same template have identical style definitions, so snapshot is shared by them:
+        it's keyed by fingerprint of `<office:styles>` element of document file's `styles.xml`, kept in memory for
+        conversions in the same process and saved to disk for the next ones. Without fingerprint (e.g. document has
+        unsaved changes or isn't ODF) values are cached only during one conversion.
+    """
+
+    # increase when format of values changes
+    FORMAT_VERSION = 1
+
+    # fingerprint => values, for conversions in the same process
+    _inProcessSnapshots = {}
+
+    def __init__(self, styleFamilies, fingerprint: str = None, folder: Path = None):
+        """
+        :param styleFamilies: document's XStyleFamiliesSupplier.getStyleFamilies()
+        :param fingerprint: see `fingerprintOfFile()`, None to not share snapshot with other conversions
+        """
+        self._families = styleFamilies
+        self._fingerprint = fingerprint
+        # TODO Py3.5: use pathlib.Path.home()
+        self._folder = folder or Path(os.path.expanduser('~/.writer2wiki-cache/styles'))
+
+        # JSON of [family, style, property] => [style exists, property's value]
+        self._values = {}
+        # values read from Office by this snapshot, they are shared with other conversions by `save()`
+        self._newValues = {}
+        if fingerprint is not None:
+            if fingerprint not in self._inProcessSnapshots:
+                self._inProcessSnapshots[fingerprint] = self._load()
+            self._values = self._inProcessSnapshots[fingerprint]
+
+    @classmethod
+    def fingerprintOfFile(cls, docPath: Path):
+        """ :return str|None: hash of named styles' definitions of ODF document, None if file has no such """
+        try:
+            with zipfile.ZipFile(str(docPath)) as odf:
+                stylesXml = odf.read('styles.xml')
+        except (OSError, KeyError, zipfile.BadZipFile):
+            return None
+
+        start = stylesXml.find(b'<office:styles>')
+        end = stylesXml.find(b'</office:styles>')
+        if start == -1 or end == -1:
+            return None
+
+        sha1 = hashlib.sha1(stylesXml[start:end])
+        sha1.update(str(cls.FORMAT_VERSION).encode('utf-8'))
+        return sha1.hexdigest()
+
+    def _getPath(self):
+        return self._folder / (self._fingerprint + '.json')
+
+    def _load(self):
+        if not self._getPath().exists():
+            return {}
+
+        try:
+            with self._getPath().open('r', encoding='utf-8') as f:
+                values = json.load(f)
+        except (OSError, ValueError):
+            print('ERR: broken style snapshot, ignore it:', self._getPath())
+            return {}
+
+        log.info('loaded %d style values from snapshot %s', len(values), self._fingerprint)
+        return values
+
+    def getStyleValue(self, familyName, styleName, propertyName):
+        """
+        :param propertyName: UNO property of style, JSON-serializable after `TextPortion._toPlainValue()`
+        :return tuple: (style exists, property's value or None)
+        """
+        key = json.dumps([familyName, styleName, propertyName], ensure_ascii=False)
+        value = self._values.get(key) or self._newValues.get(key)
+        if value is None:
+            familyStyles = self._families.getByName(familyName)
+            if familyStyles.hasByName(styleName):
+                styleValue = familyStyles.getByName(styleName).getPropertyValue(propertyName)
+                value = [True, TextPortion._toPlainValue(styleValue)]
+            else:
+                value = [False, None]
+            self._newValues[key] = value
+
+        return tuple(value)
+
+    def discardNewValues(self):
+        """ Don't share values read from Office with other conversions, e.g. if document's styles were changed """
+        self._newValues = {}
+
+    def save(self):
+        """ Save values read from Office since the snapshot was loaded, merging them with values saved by other
+            conversions meanwhile
+        """
+        newValuesCount = len(self._newValues)
+        if self._fingerprint is None or newValuesCount == 0:
+            return
+
+        # values are shared with conversions in the same process even if they can't be saved
+        self._values.update(self._newValues)
+        self._newValues = {}
+        try:
+            self._folder.mkdir(parents=True, exist_ok=True)
+            saved = self._load()
+            saved.update(self._values)
+            self._values.update(saved)
+
+            path = self._getPath()
+            tmpPath = path.with_name('.{}.{}.tmp'.format(path.name, os.getpid()))
+            with tmpPath.open('w', encoding='utf-8') as f:
+                json.dump(saved, f, ensure_ascii=False)
+            os.replace(str(tmpPath), str(path))
+        except OSError as e:
+            print('ERR: failed to save style snapshot:', e)
+            return
+
+        log.info('saved %d new style values to snapshot %s', newValuesCount, self._fingerprint)
@@ -5,22 +5,32 @@
 
 
 from collections import OrderedDict
+from copy import copy
 from typing import List
 
-from writer2wiki.convert.ConversionSettings import ConversionSettings
-
 
 class TextPortion:
     """
     Wrapper class for Office's TextPortion UNO. Used to merge adjacent portions with identical styles
+
+    Named style is Office's style name, it's replaced with the mapped one in a copy of the portion made by
+    `Paragraph.prepare()`. So extracted portions don't depend on conversion settings and can be cached.
     """
 
     def __init__(self, portionUno,
-                 styleFamilies,
-                 conversionSettings: ConversionSettings,
-                 supportedStyles: List[str]):
+                 styleSnapshot,
+                 supportedStyles: List[str],
+                 readCharStyle=True):
+        """
+        :param StyleSnapshot styleSnapshot: values of document's styles
+        :param supportedStyles: UNO properties to read, the rest are never read from UNO
+        :param readCharStyle: read or not portion's character style
+        """
         self._rawText = portionUno.getString()
-        self._namedStyle = conversionSettings.getMappedStyle(portionUno.CharStyleName)
+        # style names are read only if needed: each read is a call to Office
+        charStyleName = portionUno.CharStyleName if readCharStyle or supportedStyles else ''
+        paraStyleName = portionUno.ParaStyleName if supportedStyles else ''
+        self._namedStyle = charStyleName if readCharStyle else ''
         self._nonDefaultProperties = OrderedDict()
 
         if portionUno.HyperLinkURL:
@@ -31,42 +41,47 @@ class TextPortion:
             if propValue is None:
                 print('ERR: portion UNO has no property `{}`'.format(unoPropName))
                 continue
-            if __class__._propertyIsInStyleOrIsDefault(portionUno, unoPropName, styleFamilies):
+            if __class__._propertyIsInStyleOrIsDefault(portionUno, unoPropName, propValue,
+                                                       charStyleName, paraStyleName, styleSnapshot):
                 continue
 
-            self._nonDefaultProperties[unoPropName] = propValue
+            self._nonDefaultProperties[unoPropName] = __class__._toPlainValue(propValue)
 
     def __str__(self) -> str:
         return __class__.__name__ + "(text: {}, style: {}, properties: {})".format(
             self._rawText, self._namedStyle, self._nonDefaultProperties)
 
     @staticmethod
-    def _propertyIsInStyleOrIsDefault(portionUno, unoPropName, styleFamilies):
+    def _toPlainValue(propValue):
+        # UNO enum values are `uno.Enum` objects, we keep names of the values instead - see `lo_enums`
+        if hasattr(propValue, 'typeName') and hasattr(propValue, 'value'):
+            return propValue.value
+        return propValue
+
+    @staticmethod
+    def _propertyIsInStyleOrIsDefault(portionUno, unoPropName, portionPropValue, charStyleName, paraStyleName,
+                                      styleSnapshot):
         # styles docs: https://wiki.openoffice.org/wiki/Documentation/DevGuide/Text/Overall_Document_Features
 
+        plainPortionValue = __class__._toPlainValue(portionPropValue)
+
         def propertyIsInStyle(styleFamilyName, styleName):
-            nonlocal portionUno, unoPropName, styleFamilies
+            nonlocal unoPropName, plainPortionValue, styleSnapshot
 
             if styleName == '':  # no para or char style for property
                 # print('style `{:<18}` is not set'.format(styleFamilyName))
                 return False
 
-            familyStyles = styleFamilies.getByName(styleFamilyName)
-
-            if not familyStyles.hasByName(styleName):
+            # read from Office once per style and property, see `StyleSnapshot`
+            styleExists, stylePropValue = styleSnapshot.getStyleValue(styleFamilyName, styleName, unoPropName)
+            if not styleExists:
                 print("ERR. Style family '{}' has no style '{}'".format(styleFamilyName, styleName))
                 return False
 
-            style = familyStyles.getByName(styleName)
-            # stylePropValue = getattr(style, unoPropName)
-            stylePropValue = style.getPropertyValue(unoPropName)
-            # portionPropValue = getattr(portionUno, unoPropName)
-            portionPropValue = portionUno.getPropertyValue(unoPropName)
-
             # print('style `{:<18}`, prop {:<14} | portionVal: {}, styleVal: {} | equals: {}'.
             #       format(styleName, unoPropName, portionPropValue, stylePropValue, stylePropValue==portionPropValue))
 
-            return stylePropValue == portionPropValue
+            return stylePropValue == plainPortionValue
 
         # It would be nice to handle 'Default Style' uniformly with portion and paragraph styles,
         # but I've failed to figure out how to get its' XStyle object in locale-agnostic way.
@@ -79,9 +94,9 @@ class TextPortion:
         #
         # [1] https://api.libreoffice.org/docs/idl/ref/servicecom_1_1sun_1_1star_1_1style_1_1CharacterStyle.html
 
-        inDefaultStyle = portionUno.getPropertyDefault(unoPropName) == portionUno.getPropertyValue(unoPropName)
-        inPortionStyle = propertyIsInStyle('CharacterStyles', portionUno.CharStyleName)
-        inParaStyle    = propertyIsInStyle('ParagraphStyles', portionUno.ParaStyleName)
+        inDefaultStyle = portionUno.getPropertyDefault(unoPropName) == portionPropValue
+        inPortionStyle = propertyIsInStyle('CharacterStyles', charStyleName)
+        inParaStyle    = propertyIsInStyle('ParagraphStyles', paraStyleName)
 
         # print("'{:<5}' prop: {:<18}, def: {:<1}, port: {:<1}, para: {:<1}"
         #       .format(portionUno.getString(), unoPropName, inDefaultStyle, inPortionStyle, inParaStyle))
@@ -89,7 +104,7 @@ class TextPortion:
         if not inDefaultStyle and inPortionStyle:
             return True
 
-        if portionUno.ParaStyleName != '':
+        if paraStyleName != '':
             return inParaStyle
 
         return inDefaultStyle
@@ -97,18 +112,184 @@ class TextPortion:
     def isEmpty(self) -> bool:
         return not bool(self._rawText)
 
+    def isMarkup(self) -> bool:
+        return False
+
+    def isComposite(self) -> bool:
+        return False
+
+    def isFootnote(self) -> bool:
+        return False
+
     def appendRawText(self, text):
         self._rawText += text
 
     def getRawText(self):
         return self._rawText
 
+    def getPlainText(self):
+        """ Text without markup portions """
+        return self._rawText
+
     def getStyleName(self):
         return self._namedStyle
 
     def hasSameProperties(self, other):  # type: (TextPortion) -> bool
         return    self._namedStyle           == other._namedStyle           \
-              and self._nonDefaultProperties == other._nonDefaultProperties
+              and self._nonDefaultProperties == other._nonDefaultProperties \
+              and self.isMarkup()            == other.isMarkup()            \
+              and self.isFootnote()          == other.isFootnote()
 
     def getProperties(self):
         return self._nonDefaultProperties
+
+    def copyWith(self, namedStyle, properties):
+        """ :return: shallow copy of the portion with another named style and properties """
+        result = copy(self)
+        result._namedStyle = namedStyle
+        result._nonDefaultProperties = properties
+        return result
+
+    @classmethod
+    def makePlain(cls, text):
+        """ :return: portion without any properties and character style """
+        return cls.fromDict({'text': text, 'style': '', 'properties': []})
+
+    def toDict(self):
+        """ :return: JSON-serializable representation of extracted portion, see `Paragraph.fromDict()` """
+        # properties are a list to keep their order
+        return {'text': self._rawText, 'style': self._namedStyle,
+                'properties': [[name, value] for name, value in self._nonDefaultProperties.items()]}
+
+    @classmethod
+    def fromDict(cls, data):
+        portion = cls.__new__(cls)
+        portion._rawText = data['text']
+        portion._namedStyle = data['style']
+        portion._nonDefaultProperties = OrderedDict((name, value) for name, value in data['properties'])
+        return portion
+
+
+class MarkupPortion(TextPortion):
+    """
+    Portion which text is already converted to target markup (e.g. image reference). Decorators output it as is
+    """
+
+    # noinspection PyMissingConstructor
+    def __init__(self, markup: str, imageFile: str = None):
+        """ :param imageFile: name of image file exported to the folder of converted file, if markup refers to it """
+        self._rawText = markup
+        self._imageFile = imageFile
+        self._namedStyle = None
+        self._nonDefaultProperties = OrderedDict()
+
+    def isMarkup(self) -> bool:
+        return True
+
+    def hasSameProperties(self, other):
+        # markup is never merged: the next one may be a footnote, which text is rendered later
+        return False
+
+    def getPlainText(self):
+        return ''
+
+    def getImageFile(self):
+        return self._imageFile
+
+    def toDict(self):
+        if self._imageFile is None:
+            return {'markup': self._rawText}
+        return {'markup': self._rawText, 'image': self._imageFile}
+
+    @classmethod
+    def fromDict(cls, data):
+        return cls(data['markup'], data.get('image'))
+
+
+class FootnotePortion(MarkupPortion):
+    """
+    Footnote's content. Footnote is converted along with the document, when conversion settings are known, see
+    `setRenderedText()`
+    """
+
+    def __init__(self, caption: str, paragraphs):
+        """
+        :param caption: footnote's anchor in text, e.g. '1' or '*'
+        :param List[Paragraph] paragraphs: footnote's content
+        """
+        super().__init__('')
+        self._caption = caption
+        self._paragraphs = paragraphs
+        self._contentKey = None
+
+    def __str__(self) -> str:
+        return __class__.__name__ + "(caption: {}, paragraphs: {})".format(
+            self._caption, [str(p) for p in self._paragraphs])
+
+    def isEmpty(self) -> bool:
+        # footnote's anchor is in text even if content is empty
+        return False
+
+    def isFootnote(self) -> bool:
+        return True
+
+    def getCaption(self):
+        return self._caption
+
+    def getParagraphs(self):
+        return self._paragraphs
+
+    def getContentKey(self) -> str:
+        """ :return: hash of footnote's extracted content, the same for footnotes with identical text and formatting """
+        if self._contentKey is None:
+            import hashlib
+            import json
+            content = json.dumps([p.toDict() for p in self._paragraphs], ensure_ascii=False, sort_keys=True)
+            self._contentKey = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        return self._contentKey
+
+    def setRenderedText(self, text):
+        self._rawText = text
+
+    def toDict(self):
+        return {'caption': self._caption, 'footnote': [p.toDict() for p in self._paragraphs]}
+
+
+class CompositePortion(TextPortion):
+    """
+    Portion with properties common for all its child portions, e.g. {italic: ["aaa", {bold: "bbb"}, "ccc"]}.
+    See `Paragraph._compact()`
+    """
+
+    # noinspection PyMissingConstructor
+    def __init__(self, namedStyle, properties: OrderedDict, children: List[TextPortion]):
+        self._namedStyle = namedStyle
+        self._nonDefaultProperties = properties
+        self._children = children
+
+    def __str__(self) -> str:
+        return __class__.__name__ + "(style: {}, properties: {}, children: {})".format(
+            self._namedStyle, self._nonDefaultProperties, [str(c) for c in self._children])
+
+    def isEmpty(self) -> bool:
+        return len(self._children) == 0
+
+    def isComposite(self) -> bool:
+        return True
+
+    def appendRawText(self, text):
+        # unreachable: text is appended only to portions with the same properties, see `hasSameProperties()` below
+        assert False, 'composite portion has no own text'
+
+    def getRawText(self):
+        return ''.join(c.getRawText() for c in self._children)
+
+    def getPlainText(self):
+        return ''.join(c.getPlainText() for c in self._children)
+
+    def getChildren(self) -> List[TextPortion]:
+        return self._children
+
+    def hasSameProperties(self, other):
+        # composites are made when all portions are added, they are not merged any more
+        return False
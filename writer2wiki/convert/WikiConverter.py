@@ -4,17 +4,24 @@
 #           http://www.boost.org/LICENSE_1_0.txt)
 
 
-from typing import List
+import logging as log
+from collections import Counter
+from typing import List, Optional, Set, Tuple
 
 from writer2wiki.convert.BaseConverter import BaseConverter
+from writer2wiki.convert.Paragraph import Paragraph
 from writer2wiki.convert.WikiTextPortionDecorator import WikiTextPortionDecorator
 from writer2wiki.convert.WikiParagraphDecorator import WikiParagraphDecorator
 
 
 class WikiConverter(BaseConverter):
 
-    def __init__(self, context):
-        super(WikiConverter, self).__init__(context)
+    # prefix of names of repeated footnotes, see `_renderFootnotes()`
+    _REF_NAME_PREFIX = 'fn-'
+
+    def __init__(self, context, startedAt: float = None, cancelEvent=None):
+        super(WikiConverter, self).__init__(context, startedAt, cancelEvent)
+        self._footnoteBodies = {}  # footnote's content key => converted text, see `FootnotePortion.getContentKey()`
 
     @classmethod
     def makeParagraphDecorator(cls):
@@ -24,40 +31,208 @@ class WikiConverter(BaseConverter):
     def getFileExtension(cls):
         return '.wiki.txt'
 
-    def getResult(self):
+    @classmethod
+    def makeImageMarkup(cls, fileName):
+        return '[[File:{}]]'.format(fileName)
+
+    def _afterResultSaved(self, targetFile, savedFiles, conversionSettings):
+        dumpFile = conversionSettings.getXmlDumpFile()
+        if dumpFile is None:
+            return
+
+        from writer2wiki.convert.MediaWikiDump import FolderDump
+        dump = FolderDump(dumpFile, targetFile.parent, self.getFileExtension(), self.PREVIEW_SUFFIX)
+        pagesCount = dump.update(savedFiles)
+        print('saved {} pages to XML dump {}'.format(pagesCount, dumpFile))
+
+    def getOutputFiles(self, targetFile, conversionSettings):
+        maxPageSize = conversionSettings.getMaxPageSize()
+        writeDelta = conversionSettings.writeDelta() and maxPageSize is None
+        sectionIds = None
+        if writeDelta:
+            from writer2wiki.convert.WikiSectionDelta import WikiSectionDelta
+            sections = self._renderSections(self._paragraphs)
+            sectionIds = WikiSectionDelta.makeSectionIds([title for title, _ in sections])
+            pages = [(targetFile, [text for _, text in sections])]
+        elif maxPageSize is None:
+            pages = [(targetFile, [self.getResult()])]
+        else:
+            from writer2wiki.convert.WikiPageSplitter import WikiPageSplitter
+            splitter = WikiPageSplitter(lambda paragraphs: self._renderSections(paragraphs, footnotesPerSection=True),
+                                        self.getFileExtension(), maxPageSize)
+            pages = [(path, [content]) for path, content in splitter.split(self._paragraphs, targetFile)]
+
+        # pages are processed by parts (sections), so that delta contains the same text as converted file.
+        # Parts are whole style runs, so processing them one by one gives the same result as for the whole page
+        if conversionSettings.optimizeMarkup():
+            from writer2wiki.convert.WikiMarkupOptimizer import WikiMarkupOptimizer
+            optimizer = WikiMarkupOptimizer()
+            pages = [(path, [optimizer.optimize(part) for part in parts]) for path, parts in pages]
+            log.info('markup optimizer removed %d of %d parser function calls',
+                     optimizer.getSavedCallsCount(), optimizer.getOriginalCallsCount())
+
+        cssClassesMode = conversionSettings.getCssClassesMode()
+        registry = None
+        if cssClassesMode == conversionSettings.CSS_CLASSES_PER_FOLDER:
+            from writer2wiki.convert.CssClassRegistry import CssClassRegistry
+            from writer2wiki.util import lockFile
+            # shared stylesheet is saved right away: parallel conversions must see classes numbered by this one.
+            # Classes are only added to it, so it's fine even if user doesn't save conversion result
+            sharedRegistry = CssClassRegistry(conversionSettings.getCssStylesheetFile())
+            with lockFile(sharedRegistry.getPath()):
+                sharedRegistry.load()
+                pages = [(path, sharedRegistry.replaceInlineStylesInParts(parts)) for path, parts in pages]
+                sharedRegistry.save()
+        elif cssClassesMode != conversionSettings.CSS_CLASSES_NONE:
+            from writer2wiki.convert.CssClassRegistry import CssClassRegistry
+            registry = CssClassRegistry(conversionSettings.getCssStylesheetFile())
+            pages = [(path, registry.replaceInlineStylesInParts(parts)) for path, parts in pages]
+
+        outputFiles = [(path, ''.join(parts)) for path, parts in pages]
+        self._logRenderCost(outputFiles, conversionSettings)
+
+        if writeDelta:
+            from writer2wiki.convert.MediaWikiDump import pageTitleFromFile
+            baseName = pageTitleFromFile(targetFile, self.getFileExtension())
+            delta = WikiSectionDelta(targetFile.with_name(baseName + '.wiki.sections.json'),
+                                     targetFile.with_name(baseName + '.wiki.delta.json'))
+            outputFiles += delta.makeOutputFiles(baseName, list(zip(sectionIds, pages[0][1])))
+
+        if registry is not None and not registry.isEmpty():
+            outputFiles.append((registry.getPath(), registry.getStylesheet()))
+
+        return outputFiles
+
+    @staticmethod
+    def _logRenderCost(pages, conversionSettings):
+        """ :param pages: (file path, converted text) of pages to be saved """
+        from writer2wiki.convert.WikiRenderCost import WikiRenderCost
+
+        limits = conversionSettings.getRenderCostLimits()
+        for path, content in pages:
+            cost = WikiRenderCost(content)
+            log.info('render cost of %s: %s', path.name, cost)
+
+            for value, limit, description in ((cost.getCallsCount(), limits['calls'], 'template calls'),
+                                              (cost.maxDepth, limits['depth'], 'template nesting depth'),
+                                              (cost.postExpandSize, limits['postExpandSize'], 'post-expand size')):
+                if limit is not None and value > limit:
+                    log.warning('%s: %s %d exceeds limit %d, page may fail to render in MediaWiki',
+                                path.name, description, value, limit)
+
+    def _renderSections(self, paragraphs: List[Paragraph], footnotesPerSection=False) \
+            -> List[Tuple[Optional[str], str]]:
+        """ Same as `_renderParagraphs()`, but split into sections at headings, see `WikiSectionDelta`
+
+        :param footnotesPerSection: see `_renderParagraphs()`
+        :return: (heading's plain text or None for the text before the first heading, section's converted text)
+        """
+        sectionStarts = []
+        result = self._renderParagraphs(paragraphs, sectionStarts, footnotesPerSection)
+
+        if not sectionStarts or sectionStarts[0][0] != 0:
+            sectionStarts.insert(0, (0, None))
+
+        ends = [start for start, _ in sectionStarts[1:]] + [len(result)]
+        return [(title, result[start:end]) for (start, title), end in zip(sectionStarts, ends)]
+
+    def _renderParagraphs(self, paragraphs: List[Paragraph], sectionStarts: list = None,
+                          footnotesPerSection=False) -> str:
+        """
+        :param sectionStarts: if not None, (offset in result, heading's plain text) is added to it for each style run
+                              starting with a heading. Boundaries between style runs are the only places where
+                              result can be split without breaking templates
+        :param footnotesPerSection: define repeated footnotes anew in each section, so that sections can be put to
+                                    different pages. MediaWiki accepts a named footnote defined many times with the
+                                    same text
+        """
         # TODO handle ParagraphAdjust {LEFT, RIGHT, ...}
 
-        if len(self._paragraphs) == 0:
+        if len(paragraphs) == 0:
             return ''
 
         paraDecorator = self.makeParagraphDecorator()
-        result = ''
-        currentStyle = self._paragraphs[0].getStyleName()
-        sameStyleBuffer = ''
+        # Text is collected in lists and joined once: `+=` on a string captured by closure copies it every time,
+        # which makes conversion time grow quadratically with document's size
+        result = []
+        resultLength = 0
+        currentStyle = paragraphs[0].getStyleName()
+        sameStyleBuffer = []
 
         def flushBuffer():
             from writer2wiki.convert.wiki_util import getStyledContent
-            nonlocal sameStyleBuffer, result
-
-            sameStyleBuffer = sameStyleBuffer[: -2]  # remove last para separator before wrapping in style
-            result += getStyledContent(currentStyle, sameStyleBuffer) + '\n\n'
-            sameStyleBuffer = ''
-
-        for para in self._paragraphs:
+            nonlocal resultLength
+
+            content = ''.join(sameStyleBuffer)[: -2]  # remove last para separator before wrapping in style
+            styledContent = getStyledContent(currentStyle, content) + '\n\n'
+            result.append(styledContent)
+            resultLength += len(styledContent)
+            sameStyleBuffer.clear()
+
+        def addSectionStart(para):
+            # heading continuing a list from previous paragraph is not a section start, see `WikiPageSplitter`
+            if sectionStarts is not None and para.isHeading() and not para.isListItem():
+                sectionStarts.append((resultLength, para.getPlainText()))
+                if footnotesPerSection:
+                    definedFootnotes.clear()
+
+        # identical footnotes of the page are converted once and referred to by name, see `_renderFootnotes()`
+        footnoteCounts = Counter(p.getContentKey() for para in paragraphs for p in para.getPortions() if p.isFootnote())
+        repeatedFootnotes = {key for key, count in footnoteCounts.items() if count > 1}
+        definedFootnotes = set()
+
+        addSectionStart(paragraphs[0])
+        for para in paragraphs:
             if para.getStyleName() != currentStyle:
                 flushBuffer()
                 currentStyle = para.getStyleName()
+                addSectionStart(para)
 
+            self._renderFootnotes(para, repeatedFootnotes, definedFootnotes)
             if para.isListItem():
-                sameStyleBuffer = sameStyleBuffer[:-1]  # remove 1 line feed
+                if sameStyleBuffer:
+                    sameStyleBuffer[-1] = sameStyleBuffer[-1][:-1]  # remove 1 line feed
                 listChar = '#' if para.isNumberedList() else '*'
-                sameStyleBuffer += listChar * para.getListLevel() + ' '
+                sameStyleBuffer.append(listChar * para.getListLevel() + ' ')
 
-            sameStyleBuffer += paraDecorator.getDecorated(para) + '\n\n'
+            sameStyleBuffer.append(paraDecorator.getDecorated(para) + '\n\n')
 
         flushBuffer()  # the last style in text will not be flushed inside loop
 
-        if self._hasFootnotes:
-            result += '<references/>\n'
+        if any(p.hasFootnotes() for p in paragraphs):
+            result.append('<references/>\n')
+
+        return ''.join(result)
+
+    def _renderFootnotes(self, para: Paragraph, repeatedFootnotes: Set[str], definedFootnotes: Set[str]):
+        """ Footnote repeated on the page is given a name: its first occurrence is `<ref name="...">text</ref>`,
+            the rest are `<ref name="..."/>`
+
+        :param repeatedFootnotes: content keys of footnotes, which are repeated on the page
+        :param definedFootnotes: content keys of repeated footnotes, which text is already on the page. Updated
+        """
+        for portion in para.getPortions():
+            if not portion.isFootnote():
+                continue
+
+            key = portion.getContentKey()
+            if key not in repeatedFootnotes:
+                portion.setRenderedText('<ref>{}</ref>'.format(self._renderFootnoteBody(portion)))
+                continue
+
+            name = self._REF_NAME_PREFIX + key[:10]
+            if key in definedFootnotes:
+                portion.setRenderedText('<ref name="{}"/>'.format(name))
+            else:
+                definedFootnotes.add(key)
+                portion.setRenderedText('<ref name="{}">{}</ref>'.format(name, self._renderFootnoteBody(portion)))
+
+    def _renderFootnoteBody(self, portion) -> str:
+        key = portion.getContentKey()
+        if key not in self._footnoteBodies:
+            content = self._renderParagraphs(portion.getParagraphs())
+            self._footnoteBodies[key] = content[:-2]  # remove the last paragraph separator: '\n\n'
+        return self._footnoteBodies[key]
 
-        return result
+    def getResult(self):
+        return self._renderParagraphs(self._paragraphs)
@@ -0,0 +1,131 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import re
+
+
+class WikiMarkupOptimizer:
+    """ Reduces the number of parser function calls in converted text, which are expensive for MediaWiki.
+
+        Each styled text portion is wrapped into `{{#tag:span|<span style="...">...</span>}}`, because plain <span>
+        isn't rendered inside templates. Optimizer:
+        * merges adjacent spans with identical styles into one span
+        * drops empty spans
+        * replaces `{{#tag:span|...}}` with plain <span> when span is not inside a template
+
+        Optimizer works on converted text in a single pass, so it doesn't depend on how the text was produced
+        (e.g. footnotes' text inside templates is handled same way as any other text). Content of <nowiki> and
+        <pre> is left as is.
+    """
+
+    _SPAN_CLOSE_SUFFIX = '}}'
+
+    _TOKENS_RE = re.compile(r'(?P<nowiki><nowiki>.*?</nowiki>|<pre>.*?</pre>)'
+                            r'|(?P<spanOpen>\{\{#tag:span\|<span style="(?P<style>[^"]*)">)'
+                            r'|(?P<spanClose></span>\}\})'
+                            r'|(?P<templateOpen>\{\{)'
+                            r'|(?P<templateClose>\}\})', re.DOTALL)
+
+    def __init__(self):
+        self._tagCallsBefore = 0
+        self._tagCallsAfter = 0
+
+    def optimize(self, text: str) -> str:
+        result = []
+        # Items are either None for templates or [style, isTagKept, index of span's content in result] for spans.
+        # Templates and spans wrapped in {{#tag}} are both template calls, content of which is template argument
+        stack = []
+        templatesDepth = 0
+        lastEnd = 0
+        tagCallsBefore = 0
+        tagCallsAfter = 0
+        pendingClose = None  # type: list   # span, closing of which is postponed to check if next span can be merged
+
+        def emitPendingClose():
+            nonlocal pendingClose, templatesDepth
+            style, isTagKept, _ = pendingClose
+            if isTagKept:
+                result.append('</span>' + self._SPAN_CLOSE_SUFFIX)
+                templatesDepth -= 1
+            else:
+                result.append('</span>')
+            pendingClose = None
+
+        for match in self._TOKENS_RE.finditer(text):
+            if pendingClose is not None:
+                if match.start() == lastEnd and match.group('spanOpen') and match.group('style') == pendingClose[0]:
+                    # merge: drop closing of previous span and opening of this one
+                    tagCallsBefore += 1
+                    stack.append(pendingClose)
+                    pendingClose = None
+                    lastEnd = match.end()
+                    continue
+                emitPendingClose()
+
+            if match.start() > lastEnd:
+                result.append(text[lastEnd:match.start()])
+            lastEnd = match.end()
+
+            if match.group('nowiki'):
+                # escaped text may contain braces
+                result.append(match.group('nowiki'))
+
+            elif match.group('spanOpen'):
+                tagCallsBefore += 1
+                style = match.group('style')
+                isTagKept = templatesDepth > 0
+                if isTagKept:
+                    result.append(match.group('spanOpen'))
+                    templatesDepth += 1
+                    tagCallsAfter += 1
+                else:
+                    result.append('<span style="{}">'.format(style))
+                stack.append([style, isTagKept, len(result)])
+
+            elif match.group('spanClose'):
+                if not stack or stack[-1] is None:
+                    print('BUG: unbalanced span in markup, optimization skipped')
+                    return text
+                span = stack.pop()
+                _, isTagKept, contentIndex = span
+                if len(result) > contentIndex:
+                    pendingClose = span
+                    continue
+
+                result.pop()  # empty span: drop its opening
+                if isTagKept:
+                    templatesDepth -= 1
+                    tagCallsAfter -= 1
+
+            elif match.group('templateOpen'):
+                result.append(match.group('templateOpen'))
+                stack.append(None)
+                templatesDepth += 1
+
+            else:
+                if not stack or stack[-1] is not None:
+                    print('BUG: unbalanced template in markup, optimization skipped')
+                    return text
+                result.append(match.group('templateClose'))
+                stack.pop()
+                templatesDepth -= 1
+
+        if pendingClose is not None:
+            emitPendingClose()
+        if stack:
+            print('BUG: unclosed template or span in markup, optimization skipped')
+            return text
+        result.append(text[lastEnd:])
+
+        self._tagCallsBefore += tagCallsBefore
+        self._tagCallsAfter += tagCallsAfter
+        return ''.join(result)
+
+    def getSavedCallsCount(self):
+        return self._tagCallsBefore - self._tagCallsAfter
+
+    def getOriginalCallsCount(self):
+        return self._tagCallsBefore
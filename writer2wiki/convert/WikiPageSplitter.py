@@ -0,0 +1,102 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from writer2wiki.convert.MediaWikiDump import pageTitleFromFile
+from writer2wiki.convert.Paragraph import Paragraph
+from writer2wiki.convert.WikiTextEscaper import WikiTextEscaper
+
+
+class WikiPageSplitter:
+    """ Splits converted document into several wiki pages, each not larger than given size, plus an index page
+        with links to all parts.
+
+        Document is rendered once and split only at sections starting with a heading: boundaries between them
+        are the only places where all style templates are closed. Split never happens inside a list (when heading
+        itself is an item of the list, which continues from the previous paragraph).
+        Chapter larger than the limit is not split and will be saved to a page of its own.
+    """
+
+    # bytes reserved for navigation links at the end of each part
+    _NAVIGATION_RESERVE = 512
+    _REFERENCES = '<references/>\n'
+
+    def __init__(self, renderSections: Callable[[List[Paragraph]], List[Tuple[Optional[str], str]]],
+                 fileExtension: str, maxPageSize: int):
+        """
+        :param renderSections: function to convert paragraphs to sections: (heading's plain text or None, text).
+                               Repeated footnotes must be defined in each section, which refers to them
+        :param fileExtension: extension of converted files, e.g. '.wiki.txt'
+        :param maxPageSize: in bytes of UTF-8 encoded text
+        """
+        self._render = renderSections
+        self._fileExtension = fileExtension
+        self._maxPageSize = maxPageSize
+
+    @staticmethod
+    def _byteSize(text):
+        return len(text.encode('utf-8'))
+
+    def _makePartTitle(self, baseTitle, partNumber):
+        return '{} (part {})'.format(baseTitle, partNumber)
+
+    def _makeNavigation(self, baseTitle, partNumber, partsCount):
+        links = ['[[{}|Contents]]'.format(baseTitle)]
+        if partNumber > 1:
+            links.append('[[{}|previous part]]'.format(self._makePartTitle(baseTitle, partNumber - 1)))
+        if partNumber < partsCount:
+            links.append('[[{}|next part]]'.format(self._makePartTitle(baseTitle, partNumber + 1)))
+        return '----\n' + ' | '.join(links) + '\n'
+
+    def split(self, paragraphs: List[Paragraph], targetFile: Path) -> List[Tuple[Path, str]]:
+        """
+        :param targetFile: file name for the whole document, it will contain index page
+        :return: list of (file path, file content). Single element if whole document fits into one page
+        """
+        sections = self._render(paragraphs)
+        wholeText = ''.join(text for _, text in sections)
+        if self._byteSize(wholeText) <= self._maxPageSize:
+            return [(targetFile, wholeText)]
+
+        # footnotes' list is added to each page, which has footnotes
+        lastTitle, lastText = sections[-1]
+        if lastText.endswith(self._REFERENCES):
+            sections[-1] = (lastTitle, lastText[:-len(self._REFERENCES)])
+
+        pageLimit = self._maxPageSize - self._NAVIGATION_RESERVE - self._byteSize(self._REFERENCES)
+        pages = []  # type: List[List[Tuple[Optional[str], str]]]
+        pageSize = 0
+        for title, text in sections:
+            chapterSize = self._byteSize(text)
+            if chapterSize > pageLimit:
+                print('WARN: chapter `{}` is larger than page size limit, {} bytes'.format(title or '', chapterSize))
+
+            if pages and pageSize + chapterSize <= pageLimit:
+                pages[-1].append((title, text))
+                pageSize += chapterSize
+            else:
+                pages.append([(title, text)])
+                pageSize = chapterSize
+
+        baseTitle = pageTitleFromFile(targetFile, self._fileExtension)
+        result = []
+        index = ''
+        for number, pageSections in enumerate(pages, start=1):
+            partTitle = self._makePartTitle(baseTitle, number)
+            partFile = targetFile.with_name(partTitle + self._fileExtension)
+            content = ''.join(text for _, text in pageSections)
+            if '<ref' in content:
+                content += self._REFERENCES
+            result.append((partFile, content + self._makeNavigation(baseTitle, number, len(pages))))
+
+            firstTitle = pageSections[0][0]
+            caption = partTitle if firstTitle is None else WikiTextEscaper.escape(firstTitle)
+            index += '# [[{}|{}]]\n'.format(partTitle, caption)
+
+        print('split document into {} pages'.format(len(pages)))
+        return [(targetFile, index)] + result
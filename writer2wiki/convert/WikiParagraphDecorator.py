@@ -15,26 +15,35 @@ class WikiParagraphDecorator:
     def makeTextPortionDecorator(cls):
         return WikiTextPortionDecorator()
 
+    @staticmethod
+    def _getOpeningMarkup(portionDecorator, portion):
+        return '{{' if portion.getStyleName() else portionDecorator.getOpeningMarkup(portion)
+
     def getDecorated(self, para: Paragraph):
         if para.isEmpty():
             print('BUG: empty paragraph')
             return ''
 
-        portions = para.getPortions()
+        # portions with the same named style are already merged, see `Paragraph._compact()`
         portionDecorator = self.makeTextPortionDecorator()
+        paraHasTemplate = bool(para.getStyleName())
         result = ''
-        currentStyle = portions[0].getStyleName()
-        sameStyleBuffer = ''
-
-        for p in portions:
-            if p.getStyleName() != currentStyle:
-                result += getStyledContent(currentStyle, sameStyleBuffer)
-                sameStyleBuffer = ''
-                currentStyle = p.getStyleName()
 
-            sameStyleBuffer += portionDecorator.getDecoratedText(p)
-
-        # the last style in paragraph will not be flushed inside loop
-        result += getStyledContent(currentStyle, sameStyleBuffer)
+        portions = para.getPortions()
+        for index, p in enumerate(portions):
+            style = p.getStyleName()
+            if style:
+                markupBefore, markupAfter = '{{' + style + '|', '}}'
+            else:
+                markupBefore = result
+                markupAfter = self._getOpeningMarkup(portionDecorator, portions[index + 1]) \
+                    if index + 1 < len(portions) else ''
+
+            decorated = portionDecorator.getDecoratedText(p,
+                                                          atLineStart=index == 0,
+                                                          insideTemplate=paraHasTemplate or bool(style),
+                                                          markupBefore=markupBefore,
+                                                          markupAfter=markupAfter)
+            result += getStyledContent(style, decorated)
 
         return result
@@ -0,0 +1,68 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import heapq
+import re
+from typing import List
+
+
+class WikiRenderCost:
+    """ Estimate of how expensive converted text is for MediaWiki's parser, computed offline from the text.
+
+        Counts calls of templates (`{{style|...}}`) and parser functions (`{{#tag:span|...}}`), their max nesting
+        depth, footnotes (<ref>) and sizes of templates' arguments. Post-expand size is estimated as page size plus
+        sizes of all calls' arguments: text of a nested call is included into each of its parents, the way MediaWiki
+        counts it against `$wgMaxArticleSize` limit of post-expand include size.
+    """
+
+    _LARGEST_ARGUMENTS_COUNT = 3
+
+    _TOKENS_RE = re.compile(r'(?P<nowiki><nowiki>.*?</nowiki>)'
+                            r'|(?P<parserFunctionOpen>\{\{#)'
+                            r'|(?P<templateOpen>\{\{)'
+                            r'|(?P<close>\}\})'
+                            r'|(?P<ref><ref\b)', re.DOTALL)
+
+    def __init__(self, text: str):
+        self.pageSize = len(text.encode('utf-8'))
+        self.templateCalls = 0
+        self.parserFunctionCalls = 0
+        self.maxDepth = 0
+        self.refsCount = 0
+        self.postExpandSize = self.pageSize
+        self.largestArguments = []  # type: List[int]   # sizes in bytes, the largest first
+
+        argumentSizes = []
+        openings = []  # offsets of arguments of currently open calls
+        for match in self._TOKENS_RE.finditer(text):
+            if match.group('parserFunctionOpen') or match.group('templateOpen'):
+                if match.group('parserFunctionOpen'):
+                    self.parserFunctionCalls += 1
+                else:
+                    self.templateCalls += 1
+                openings.append(match.end())
+                self.maxDepth = max(self.maxDepth, len(openings))
+
+            elif match.group('close'):
+                if not openings:
+                    continue  # not balanced, e.g. `}}` in user's text
+                argumentSize = len(text[openings.pop():match.start()].encode('utf-8'))
+                argumentSizes.append(argumentSize)
+                self.postExpandSize += argumentSize
+
+            elif match.group('ref'):
+                self.refsCount += 1
+
+        self.largestArguments = heapq.nlargest(self._LARGEST_ARGUMENTS_COUNT, argumentSizes)
+
+    def getCallsCount(self):
+        return self.templateCalls + self.parserFunctionCalls
+
+    def __str__(self):
+        return ('size: {} bytes, post-expand size: ~{} bytes, template calls: {}, parser function calls: {}, '
+                'max depth: {}, refs: {}, largest arguments: {}'
+                .format(self.pageSize, self.postExpandSize, self.templateCalls, self.parserFunctionCalls,
+                        self.maxDepth, self.refsCount, self.largestArguments))
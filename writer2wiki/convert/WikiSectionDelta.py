@@ -0,0 +1,91 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from writer2wiki.util import openW2wFile
+
+
+class WikiSectionDelta:
+    """ Difference between converted page and its previous conversion, section by section, so that only changed
+        sections have to be updated in wiki.
+
+        Section starts at a heading, text before the first heading is section `LEAD_ID`. Section's id is made of
+        heading's text, so it stays the same while heading isn't renamed; repeated headings get suffixes `-2`, `-3`
+        etc. Hashes of sections are kept in index file next to converted file, delta is compared against it.
+
+        Delta is a JSON object:
+            page    - page title
+            order   - ids of all sections of the page, in order
+            changed - list of {id, index, text} for new and changed sections, `index` is position in `order`
+            removed - ids of sections which are not on the page any more
+    """
+
+    LEAD_ID = '_lead'
+
+    _SLUG_RE = re.compile(r'[^\w]+')
+
+    def __init__(self, indexFile: Path, deltaFile: Path):
+        self._indexFile = indexFile
+        self._deltaFile = deltaFile
+
+    @classmethod
+    def makeSectionIds(cls, titles: List[Optional[str]]) -> List[str]:
+        """ :param titles: plain text of sections' headings, None for lead section """
+        ids = []
+        usedIds = set()
+        for title in titles:
+            baseId = cls.LEAD_ID if title is None else (cls._SLUG_RE.sub('-', title.lower()).strip('-') or 'section')
+            sectionId = baseId
+            number = 1
+            while sectionId in usedIds:
+                number += 1
+                sectionId = '{}-{}'.format(baseId, number)
+            usedIds.add(sectionId)
+            ids.append(sectionId)
+        return ids
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _loadPreviousHashes(self) -> dict:
+        if not self._indexFile.exists():
+            return {}
+
+        try:
+            with openW2wFile(self._indexFile, 'r', newline=None) as f:
+                return {s['id']: s['hash'] for s in json.load(f)['sections']}
+        except (ValueError, KeyError, TypeError):
+            print('ERR: broken sections index, all sections are treated as changed:', self._indexFile)
+            return {}
+
+    def makeOutputFiles(self, pageTitle, sections: List[Tuple[str, str]]) -> List[Tuple[Path, str]]:
+        """
+        :param sections: (section id, converted text) in page order, see `makeSectionIds()`
+        :return: delta and new index as (file path, file content), to be saved with converted page
+        """
+        previousHashes = self._loadPreviousHashes()
+        hashes = [self._hash(text) for _, text in sections]
+
+        changed = [{'id': sectionId, 'index': index, 'text': text}
+                   for index, ((sectionId, text), sectionHash) in enumerate(zip(sections, hashes))
+                   if previousHashes.get(sectionId) != sectionHash]
+        currentIds = [sectionId for sectionId, _ in sections]
+        removed = sorted(previousHashes.keys() - set(currentIds))
+
+        print('sections: {}, changed: {}, removed: {}'.format(len(sections), len(changed), len(removed)))
+
+        delta = {'page': pageTitle, 'order': currentIds, 'changed': changed, 'removed': removed}
+        index = {'page': pageTitle,
+                 'sections': [{'id': sectionId, 'hash': h} for sectionId, h in zip(currentIds, hashes)]}
+
+        return [(self._deltaFile, json.dumps(delta, ensure_ascii=False, indent=1) + '\n'),
+                (self._indexFile, json.dumps(index, ensure_ascii=False, indent=1) + '\n')]
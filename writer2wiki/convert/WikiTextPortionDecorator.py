@@ -6,16 +6,25 @@
 
 from writer2wiki.convert.BaseTextPortionDecorator import BaseTextPortionDecorator
 from writer2wiki.convert.css_enums import CssTextDecorationStyle
+from writer2wiki.convert.WikiTextEscaper import WikiTextEscaper
 from writer2wiki.w2w_office.lo_enums import *
 from writer2wiki.util import *
 
 
 class WikiTextPortionDecorator(BaseTextPortionDecorator):
 
+    # properties output as wikitext, the rest are CSS styles inside {{#tag:span|...}}, see `_afterPropertiesApplied`
+    _WIKITEXT_PROPERTIES = {'HyperLinkURL', 'CharPosture', 'CharWeight', 'CharEscapement'}
+
     def __init__(self):
         super().__init__()
         self._cssStyles = {}
 
+    def getDecoratedText(self, textPortion, atLineStart=False, insideTemplate=False, markupBefore='', markupAfter=''):
+        # decorator is reused for all portions of paragraph, styles of the previous portion must not leak
+        self._cssStyles = {}
+        return super().getDecoratedText(textPortion, atLineStart, insideTemplate, markupBefore, markupAfter)
+
     @classmethod
     def getSupportedUnoProperties(cls):
         return [
@@ -29,23 +38,31 @@ class WikiTextPortionDecorator(BaseTextPortionDecorator):
             'CharUnderlineColor'
         ]
 
-    @classmethod
-    def _replaceNonBreakingChars(cls, text: str) -> str:
-        """
-        Replace non-breaking space and dash with html entities for better readability of wiki-pages sources and safe
-        copy-pasting to editors without proper Unicode support
-
-        :param str text:
-        :return: modified text
-        """
-
-        # full list of non-breaking (glue) chars: http://unicode.org/reports/tr14/#GL
-
-        return text.translate({
-            0x00A0: '&nbsp;',       # non-breaking space
-            0x2011: '&#x2011;',     # non-breaking dash
-            '*'   : '<nowiki>*</nowiki>'  # fixme: doesn't work, see https://webapps.stackexchange.com/q/23463/185067
-        })
+    def _escapeText(self, text):
+        # apostrophes next to bold/italic markup would change it
+        return WikiTextEscaper.escape(text, self._atLineStart, self._insideTemplate, self._isLink,
+                                      quoteBefore=self._markupBefore.endswith("'"),
+                                      quoteAfter=self._markupAfter.startswith("'"))
+
+    def _wrapsInTemplate(self, properties):
+        return any(name not in self._WIKITEXT_PROPERTIES for name in properties)
+
+    def _getWrappers(self, properties):
+        # same order as markup is applied in, see `BaseTextPortionDecorator.getDecoratedText()`
+        wrappers = []
+        for name, value in properties.items():
+            if name == 'HyperLinkURL':
+                wrappers.append(('[', ']'))
+            elif name == 'CharPosture':
+                wrappers.append(("''", "''"))
+            elif name == 'CharWeight' and value >= FontWeight.NORMAL:
+                wrappers.append(("'''", "'''"))
+            elif name == 'CharEscapement' and value != 0:
+                wrappers.append(('<sup>', '</sup>') if value > 0 else ('<sub>', '</sub>'))
+
+        if self._wrapsInTemplate(properties):
+            wrappers.append(('{{#tag:span|', '}}'))
+        return wrappers
 
     def _addCssStyle(self, name, value, appendIfExist=False):
         if name in self._cssStyles:
@@ -174,12 +191,7 @@ class WikiTextPortionDecorator(BaseTextPortionDecorator):
         if len(self._cssStyles) == 0:
             return
 
-        style = ''
-
-        # TODO PY: replace with something like `str.join()`
-        for name, value in sorted(self._cssStyles.items()):
-            style += name + ':' + value + ';'
-        style = style[:-1]  # remove last semicolon
+        style = ';'.join(name + ':' + value for name, value in sorted(self._cssStyles.items()))
         self._result = surroundWithTag(self._result, 'span', 'style="%s"' % style)
 
         # workaround for wikitext limitation: <span> tag not rendered inside wiki {{templates}}
@@ -6,7 +6,6 @@
 
 # TODO before release:
 #       print() -> logging
-#       delete unused files (lo_import ?)
 #       inline simple functions used once (Service.objectSupports ?)
 #       put licence into all files, see http://www.boost.org/users/license.html
 #       localize dialogs
@@ -22,17 +21,39 @@ import unohelper
 from com.sun.star.task import XJobExecutor
 
 import logging as log
-import os.path
+import os
+import threading
+import time
 
 # TODO Py3.5: use pathlib.Path.home()
 # '~' will be expanded to: 'C:\Users\my-user-name\' on Windows, '/home/my-user-name/' on Linux
 LOG_FILE_NAME = os.path.normpath(os.path.expanduser('~/.writer2wiki.log'))
 
-log.basicConfig(
-    filename=LOG_FILE_NAME,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    level=log.DEBUG)
-log.debug(' logging has started '.center(80, '-'))
+# e.g. WRITER2WIKI_LOG_LEVEL=WARNING to skip debug output; DEBUG by default, see README.md
+LOG_LEVEL_ENV = 'WRITER2WIKI_LOG_LEVEL'
+
+# WRITER2WIKI_PROFILE=yes to profile all conversions, same as `profile` option of settings file
+PROFILE_ENV = 'WRITER2WIKI_PROFILE'
+
+def initLogging():
+    root = log.getLogger()
+    if root.handlers:  # same as `logging.basicConfig()`: don't override configuration done by someone else
+        return
+
+    # `delay`: log file is not opened until the first record passes the level, e.g. never for quiet levels
+    handler = log.FileHandler(LOG_FILE_NAME, encoding='utf-8', delay=True)
+    handler.setFormatter(log.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+
+    levelName = os.environ.get(LOG_LEVEL_ENV, 'DEBUG').upper()
+    level = log.getLevelName(levelName)
+    if not isinstance(level, int):  # unknown level name
+        level = log.DEBUG
+
+    root.addHandler(handler)
+    root.setLevel(level)
+    log.debug(' logging has started '.center(80, '-'))
+
+initLogging()
 
 def fixPythonImportPath():
     """
@@ -46,11 +67,16 @@ def fixPythonImportPath():
     """
 
     import sys
-    from inspect import getsourcefile
     from os.path import dirname, join, abspath, pardir
 
-    # a hack to get this file's location, because `__file__` and `sys.argv` are not defined inside macro
-    thisFilePath = getsourcefile(lambda: 0)
+    try:
+        # defined when we are loaded as UNO component or run from command line
+        thisFilePath = __file__
+    except NameError:
+        # a hack to get this file's location, because `__file__` and `sys.argv` are not defined inside macro.
+        # `inspect` is slow to import, so it's only a fallback
+        from inspect import getsourcefile
+        thisFilePath = getsourcefile(lambda: 0)
 
     # relative path to parent dir like `<path to py macros or extension>\writer2wiki-ext\writer2wiki\..`
     parentDir = join(dirname(thisFilePath), pardir)
@@ -65,9 +91,6 @@ def fixPythonImportPath():
 
 try:
     fixPythonImportPath()
-
-    from writer2wiki.util import flushLogger
-    flushLogger()
 except:
     log.critical("failed to init module 'main'", exc_info=True)
     log.shutdown()
@@ -103,7 +126,7 @@ def getOfficeAppContext(haveTriedToStartOffice=False):
 
     return context
 
-def convertToWiki(appContext=None):
+def convertToWiki(appContext=None, argsString='', startedAt=None, cancelEvent=None):
     """
     This is effectively our "main" function, which performs conversion of the document.
 
@@ -113,8 +136,18 @@ def convertToWiki(appContext=None):
     * from command line / IDE
 
     (see entry points setup at the end file)
+
+    :param argsString: what to convert:
+        * '' - whole document
+        * 'selection' - selected text, result is copied to clipboard
+        * 'paragraphs=<first>-<last>' - paragraphs range (1-based, inclusive), result is saved to preview file
+    :param startedAt: `time.perf_counter()` value when user's command was received, used to log startup time
+    :param cancelEvent: `threading.Event`, conversion stops without saving anything when it's set
     """
 
+    if startedAt is None:
+        startedAt = time.perf_counter()
+
     log.info(' Conversion started '.center(80, '-'))
     try:
         from writer2wiki.convert.WikiConverter import WikiConverter
@@ -127,9 +160,22 @@ def convertToWiki(appContext=None):
                 # when not running as a macro, try to connect to Office through socket
                 appContext = getOfficeAppContext()
 
-        c = WikiConverter(appContext)
-        if c.checkCanConvert():
-            c.convertCurrentDocument()
+        from writer2wiki.convert.BaseConverter import ConversionCancelled
+
+        c = WikiConverter(appContext, startedAt=startedAt, cancelEvent=cancelEvent)
+        try:
+            if c.checkCanConvert():
+                if _isProfilingEnabled(c):
+                    from writer2wiki.profiling import ConversionProfiler
+                    with ConversionProfiler(c.getDocumentPath().with_suffix('.w2w-profile'), c):
+                        _runConversion(c, argsString)
+                else:
+                    _runConversion(c, argsString)
+        except ConversionCancelled:
+            from writer2wiki import ui_text
+            log.info(' Conversion cancelled '.center(80, '-'))
+            c.getUi().messageBox(ui_text.conversionCancelled())
+            return
 
         log.info(' Conversion done OK '.center(80, '-'))
     except Exception:
@@ -139,6 +185,55 @@ def convertToWiki(appContext=None):
     finally:
         log.shutdown()
 
+def _runConversion(converter, argsString):
+    """ :param argsString: see `convertToWiki()` """
+    if argsString == 'selection':
+        converter.convertSelection()
+    elif argsString.startswith('paragraphs='):
+        converter.convertParagraphRange(argsString[len('paragraphs='):])
+    else:
+        converter.convertCurrentDocument()
+
+def _isProfilingEnabled(converter):
+    if os.environ.get(PROFILE_ENV, '').strip().lower() in ('yes', '1'):
+        return True
+
+    from writer2wiki.convert.ConversionSettings import ConversionSettings
+    return ConversionSettings(converter.getDocumentPath()).profile()
+
+def convertSelectionToWiki(appContext=None):
+    convertToWiki(appContext, 'selection')
+
+
+# conversion started from extension's menu runs in a background thread, so that Office's UI is not blocked
+_backgroundConversion = None  # type: threading.Thread
+_cancelEvent = threading.Event()
+
+def startBackgroundConversion(appContext, argsString, startedAt):
+    """ Run `convertToWiki()` in a background thread, only one conversion may run at a time """
+    global _backgroundConversion, _cancelEvent
+
+    if _backgroundConversion is not None and _backgroundConversion.is_alive():
+        from writer2wiki import ui_text
+        from writer2wiki.OfficeUi import OfficeUi
+        log.info('previous conversion is still running, ignore the command')
+        OfficeUi(appContext).messageBox(ui_text.conversionIsRunning())
+        return
+
+    from writer2wiki.w2w_office.main_thread import startWorkerThread
+    _cancelEvent = threading.Event()
+    # dialogs and clipboard are used by it only through the main thread, see `callInMainThread()`
+    _backgroundConversion = startWorkerThread(convertToWiki, (appContext, argsString, startedAt, _cancelEvent),
+                                              name='writer2wiki conversion')
+
+def cancelBackgroundConversion():
+    """ Stop running conversion at the next paragraph, its result is not saved """
+    if _backgroundConversion is not None and _backgroundConversion.is_alive():
+        log.info('cancelling conversion')
+        _cancelEvent.set()
+    else:
+        log.info('no conversion to cancel')
+
 
 class Writer2WikiComp(unohelper.Base, XJobExecutor):
     # IMPORTANT. This must be the same string as description.xml::<identifier value>
@@ -150,8 +245,12 @@ class Writer2WikiComp(unohelper.Base, XJobExecutor):
 
     # method from XJobExecutor
     def trigger(self, argsString):
+        startedAt = time.perf_counter()
         log.debug("`trigger` start with args: '%s'", str(argsString))
-        convertToWiki(self._context)
+        if argsString == 'cancel':
+            cancelBackgroundConversion()
+        else:
+            startBackgroundConversion(self._context, argsString, startedAt)
 
 
 # For use as UNO component in extension
@@ -163,10 +262,12 @@ g_ImplementationHelper.addImplementation(
 # For use from IDE or command line.
 # Use Python interpreter from LibreOffice's distribution.
 # On Windows it's <Program Files>\LibreOffice\program\python.exe
+# Pass 'selection' or 'paragraphs=<first>-<last>' as an argument to convert a part of document.
 if __name__ == '__main__':
-    convertToWiki()
+    import sys
+    convertToWiki(argsString=sys.argv[1] if len(sys.argv) > 1 else '')
 
 
 # For use as a macro.
 # Comma (,) at the end is significant, don't remove
-g_exportedScripts = convertToWiki,
+g_exportedScripts = convertToWiki, convertSelectionToWiki
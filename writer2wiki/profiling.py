@@ -0,0 +1,86 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import cProfile
+import logging as log
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+
+from writer2wiki.util import openW2wFile
+
+
+class ConversionProfiler:
+    """ Context manager to profile CPU time (cProfile) and memory allocations (tracemalloc) of a conversion.
+
+        Writes two files:
+        * `<base path>.prof` - cProfile's statistics, open with `python -m pstats` or snakeviz
+        * `<base path>.txt` - document's size, the most expensive functions and the largest allocations
+
+        Conversion is several times slower while tracemalloc is on, compare timings inside the report only.
+        Only the thread which entered the context is profiled.
+
+        Usage:
+            with ConversionProfiler(basePath, converter):
+                converter.convertCurrentDocument()
+    """
+
+    TOP_FUNCTIONS_COUNT = 40
+    TOP_ALLOCATIONS_COUNT = 30
+
+    def __init__(self, basePath: Path, converter):
+        """ :param BaseConverter converter: source of document's statistics after conversion """
+        self._basePath = basePath
+        self._converter = converter
+        self._profile = cProfile.Profile()
+        self._started = None
+
+    def __enter__(self):
+        tracemalloc.start()
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        snapshot = tracemalloc.take_snapshot()
+        _, peakMemory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        try:
+            self._writeReports(elapsed, snapshot, peakMemory, excType)
+        except OSError:
+            log.error('failed to write profiling reports', exc_info=True)
+
+        return False
+
+    def _writeReports(self, elapsed, snapshot, peakMemory, excType):
+        profFile = self._basePath.with_name(self._basePath.name + '.prof')
+        reportFile = self._basePath.with_name(self._basePath.name + '.txt')
+
+        self._profile.dump_stats(str(profFile))
+
+        paragraphsCount, portionsCount = self._converter.getExtractedCounts()
+        # tracemalloc's own frames are not interesting
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+        with openW2wFile(reportFile, 'w') as f:
+            f.write('paragraphs: {}, text portions: {}\n'.format(paragraphsCount, portionsCount))
+            f.write('conversion time: {:.3f} s{}\n'.format(
+                elapsed, '' if excType is None else ' (failed or cancelled: {})'.format(excType.__name__)))
+            f.write('peak traced memory: {:.1f} KiB\n\n'.format(peakMemory / 1024))
+
+            f.write('top {} functions by cumulative time:\n'.format(self.TOP_FUNCTIONS_COUNT))
+            stats = pstats.Stats(self._profile, stream=f)
+            stats.sort_stats('cumulative').print_stats(self.TOP_FUNCTIONS_COUNT)
+
+            f.write('\ntop {} allocations alive at the end, by line:\n'.format(self.TOP_ALLOCATIONS_COUNT))
+            for stat in snapshot.statistics('lineno')[:self.TOP_ALLOCATIONS_COUNT]:
+                f.write('{}\n'.format(stat))
+
+        log.info('profiling reports saved: %s, %s', profFile, reportFile)
@@ -16,6 +16,28 @@ def noWriterDocumentOpened():
 def docHasNoFile():
     return 'Save you document - converted file will be saved to the same folder'
 
+def noTextSelected():
+    return 'Please, select text to convert'
+
+def selectionCopiedToClipboard():
+    return 'Converted text is copied to clipboard'
+
+def previewSaved(targetFile: Path):
+    return 'Saved converted paragraphs to {}'.format(targetFile)
+
+def invalidParagraphRange(rangeString):
+    return "Invalid range of paragraphs: '{}'. Expected '<first>-<last>', e.g. 'paragraphs=10-20', " \
+           "numbers start from 1".format(rangeString)
+
+def paragraphRangeOutsideDocument(rangeString):
+    return "Document has fewer paragraphs than the range '{}' starts from".format(rangeString)
+
+def conversionCancelled():
+    return 'Conversion is cancelled, nothing was saved'
+
+def conversionIsRunning():
+    return 'Previous conversion is still running. Wait for it to finish or cancel it'
+
 def _missingStylesDescription(conversionSettings: ConversionSettings):
     """
     Get string with text description of missing styles for UI dialog
@@ -1,18 +1,22 @@
+import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
-def openW2wFile(path, mode):
+def openW2wFile(path, mode, newline='\r\n'):
     """
     Helper function to read/write all files with same encoding and line endings
 
     :param str|Path path: full path to file
     :param str mode: open mode: 'r' - read, 'w' - write, 'a' - append
+    :param str|None newline: line endings, see `open()`. Windows ones by default, so that less advanced people
+                             can edit files, created on Unix in Windows Notepad
     :return TextIO:
     """
     if isinstance(path, Path):
         path = str(path)
 
-    # Windows line endings so that less advanced people can edit files, created on Unix in Windows Notepad
-    return open(path, mode, encoding='utf-8', newline='\r\n')
+    return open(path, mode, encoding='utf-8', newline=newline)
 
 def intToHtmlHex(val):
     return '#{:0>6X}'.format(val)
@@ -22,23 +26,68 @@ def iterUnoCollection(unoCollection):
     while enum.hasMoreElements():
         yield enum.nextElement()
 
-def flushLogger():
-    import logging as log
+def surroundWithTag(content, tag, tagAttributes=''):
+    if tagAttributes:
+        tagAttributes = ' ' + tagAttributes
+    return '<{0}{1}>{2}</{0}>'.format(tag, tagAttributes, content)
+
+@contextmanager
+def lockFile(guardedPath, timeout=60.0):
+    """
+    Exclusive lock of `guardedPath` shared by all processes of the user. Lock files are kept in
+    `.writer2wiki-cache/locks` folder in home folder, not next to the guarded file: they can't be deleted on release,
+    as other processes may be waiting on them, and shouldn't litter user's folders
 
-    for weakRef in log._handlerList:
-        handler = weakRef()
-        if not handler:
-            continue
+    :param str|Path guardedPath: file to guard, doesn't have to exist
+    :param float timeout: seconds to wait for the lock, TimeoutError is raised after that
+    """
+    lockPath = getLockPath(guardedPath)
+    lockPath.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(lockPath), os.O_RDWR | os.O_CREAT)
+    try:
+        deadline = time.monotonic() + timeout
+        while not _tryLock(fd):
+            if time.monotonic() > deadline:
+                raise TimeoutError('failed to lock file: {}'.format(guardedPath))
+            time.sleep(0.05)
 
-        print('flushing log handler:', handler)
-        handler.acquire()
         try:
-            handler.flush()
+            yield
         finally:
-            handler.release()
+            _unlock(fd)
+    finally:
+        os.close(fd)
 
+def getLockPath(guardedPath):
+    """ :return Path: lock file used by `lockFile()` for `guardedPath` """
+    import hashlib
+    key = hashlib.sha1(str(Path(guardedPath).resolve()).encode('utf-8')).hexdigest()
+    return Path(os.path.expanduser('~/.writer2wiki-cache/locks')) / (key + '.lock')
 
-def surroundWithTag(content, tag, tagAttributes=''):
-    if tagAttributes:
-        tagAttributes = ' ' + tagAttributes
-    return '<{0}{1}>{2}</{0}>'.format(tag, tagAttributes, content)
\ No newline at end of file
+try:
+    import fcntl
+
+    def _tryLock(fd):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+except ImportError:  # Windows
+    import msvcrt
+
+    def _tryLock(fd):
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
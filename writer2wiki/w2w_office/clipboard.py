@@ -0,0 +1,44 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import uno
+import unohelper
+# noinspection PyUnresolvedReferences
+from com.sun.star.datatransfer import XTransferable
+
+from writer2wiki.w2w_office.service import Service
+
+
+class TextTransferable(unohelper.Base, XTransferable):
+    """ Plain text content for system clipboard """
+
+    _MIME_TYPE = 'text/plain;charset=utf-16'
+
+    def __init__(self, text):
+        self._text = text
+        self._flavor = uno.createUnoStruct('com.sun.star.datatransfer.DataFlavor')
+        self._flavor.MimeType = self._MIME_TYPE
+        self._flavor.HumanPresentableName = 'Unicode Text'
+        self._flavor.DataType = uno.getTypeByName('string')
+
+    # methods from XTransferable
+    def getTransferData(self, flavor):
+        if flavor.MimeType != self._MIME_TYPE:
+            # noinspection PyUnresolvedReferences
+            from com.sun.star.datatransfer import UnsupportedFlavorException
+            raise UnsupportedFlavorException()
+        return self._text
+
+    def getTransferDataFlavors(self):
+        return self._flavor,
+
+    def isDataFlavorSupported(self, flavor):
+        return flavor.MimeType == self._MIME_TYPE
+
+
+def copyToClipboard(context, text):
+    clipboard = Service.create(Service.SYSTEM_CLIPBOARD, context)
+    clipboard.setContents(TextTransferable(text), None)
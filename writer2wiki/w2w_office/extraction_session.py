@@ -0,0 +1,85 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import logging as log
+
+
+class ExtractionSession:
+    """ Context manager to read document's content with less overhead from Office UI.
+
+        While session is active:
+        * document's controllers are locked, so views don't react to our access of the model
+        * document's action lock is held (if document supports it), which postpones layout and repaint
+        * document's window doesn't accept user input, so user can't edit the document or open dialogs while
+          we enumerate it
+
+        Conversion running in background (see `main.py`) doesn't lock anything: user keeps working with the document
+        and can cancel conversion from its window, and locks held for the whole conversion would freeze document's
+        view. Edits made meanwhile are detected by `BaseConverter` with document's modified flag.
+
+        Everything is restored on exit, also when exception is raised inside the session.
+
+        Usage:
+            with ExtractionSession(document):
+                ... enumerate paragraphs ...
+    """
+
+    def __init__(self, document, inBackground=False):
+        self._document = document
+        self._inBackground = inBackground
+        self._controllersLocked = False
+        self._actionLocked = False
+        self._disabledWindow = None
+
+    def __enter__(self):
+        if self._inBackground:
+            return self
+
+        try:
+            self._document.lockControllers()
+            self._controllersLocked = True
+
+            if hasattr(self._document, 'addActionLock'):
+                self._document.addActionLock()
+                self._actionLocked = True
+
+            controller = self._document.getCurrentController()
+            if controller is not None:
+                window = controller.getFrame().getContainerWindow()
+                window.setEnable(False)
+                self._disabledWindow = window
+        except Exception:
+            self._restore()
+            raise
+
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self._restore()
+        return False
+
+    def _restore(self):
+        # each step is independent: failure to restore one of them must not leave the others locked
+        if self._disabledWindow is not None:
+            try:
+                self._disabledWindow.setEnable(True)
+            except Exception:
+                log.error('failed to enable document window', exc_info=True)
+            self._disabledWindow = None
+
+        if self._actionLocked:
+            try:
+                self._document.removeActionLock()
+            except Exception:
+                log.error('failed to remove document action lock', exc_info=True)
+            self._actionLocked = False
+
+        if self._controllersLocked:
+            try:
+                self._document.unlockControllers()
+            except Exception:
+                log.error('failed to unlock document controllers', exc_info=True)
+            self._controllersLocked = False
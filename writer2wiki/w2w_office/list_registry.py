@@ -0,0 +1,45 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+from writer2wiki.w2w_office.lo_enums import NumberingType
+
+
+class ListRegistry:
+    """ Formats of document's lists, read from numbering rules once per list and level.
+
+        All items of a list share the same numbering rules, so only the first item of each list level costs
+        reading them from Office.
+    """
+
+    # list items without a number: bullets (including picture ones) or no label at all
+    _UNNUMBERED_TYPES = {NumberingType.CHAR_SPECIAL, NumberingType.BITMAP, NumberingType.NUMBER_NONE}
+
+    def __init__(self):
+        self._isNumbered = {}  # (ListId, level) -> bool
+
+    def isNumbered(self, paragraphUno, listId, level) -> bool:
+        """
+        :param paragraphUno: any item of the list
+        :param level: 0-based list level, i.e. `NumberingLevel` property
+        """
+        key = (listId, level)
+        if key not in self._isNumbered:
+            self._isNumbered[key] = self._readIsNumbered(paragraphUno, level)
+        return self._isNumbered[key]
+
+    def _readIsNumbered(self, paragraphUno, level):
+        rules = paragraphUno.NumberingRules
+        if rules is not None and 0 <= level < rules.getCount():
+            for prop in rules.getByIndex(level):
+                if prop.Name == 'NumberingType':
+                    return prop.Value not in self._UNNUMBERED_TYPES
+
+        # shouldn't happen: list item without numbering rules. Label is empty for bullets and like '1.' for numbers
+        print('ERR: no numbering rules for list `{}`, level {}'.format(paragraphUno.ListId, level))
+        return len(paragraphUno.ListLabelString) > 0
+
+    def getListsCount(self):
+        return len({listId for listId, level in self._isNumbered})
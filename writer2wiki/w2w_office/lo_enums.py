@@ -4,11 +4,31 @@
 #           http://www.boost.org/LICENSE_1_0.txt)
 
 
-from writer2wiki.w2w_office import lo_import
+# UNO enums (as opposed to constant groups) are hardcoded as their values' names, i.e. `uno.Enum.value`. Importing
+# them from `com.sun.star` goes through pyuno's import hook on each script startup, which is slow
 
-"""https://api.libreoffice.org/docs/idl/ref/namespacecom_1_1sun_1_1star_1_1awt.html#a362a86d3ebca4a201d13bc3e7b94340e"""
-FontSlant = lo_import.enum('awt.FontSlant',
-                           'NONE', 'OBLIQUE', 'ITALIC', 'DONTKNOW', 'REVERSE_OBLIQUE', 'REVERSE_ITALIC')
+class FontSlant:
+    """https://api.libreoffice.org/docs/idl/ref/namespacecom_1_1sun_1_1star_1_1awt.html#a362a86d3ebca4a201d13bc3e7b94340e"""
+    NONE            = 'NONE'
+    OBLIQUE         = 'OBLIQUE'
+    ITALIC          = 'ITALIC'
+    DONTKNOW        = 'DONTKNOW'
+    REVERSE_OBLIQUE = 'REVERSE_OBLIQUE'
+    REVERSE_ITALIC  = 'REVERSE_ITALIC'
+
+class PropertyState:
+    """https://api.libreoffice.org/docs/idl/ref/namespacecom_1_1sun_1_1star_1_1beans.html"""
+    DIRECT_VALUE    = 'DIRECT_VALUE'
+    DEFAULT_VALUE   = 'DEFAULT_VALUE'
+    AMBIGUOUS_VALUE = 'AMBIGUOUS_VALUE'
+
+class TextContentAnchorType:
+    """https://api.libreoffice.org/docs/idl/ref/namespacecom_1_1sun_1_1star_1_1text.html"""
+    AT_PARAGRAPH = 'AT_PARAGRAPH'
+    AS_CHARACTER = 'AS_CHARACTER'
+    AT_PAGE      = 'AT_PAGE'
+    AT_FRAME     = 'AT_FRAME'
+    AT_CHARACTER = 'AT_CHARACTER'
 
 class TextPortionType:
     """https://api.libreoffice.org/docs/idl/ref/servicecom_1_1sun_1_1star_1_1text_1_1TextPortion.html#a7ecd2de53df4ec8d3fffa94c2e80d651"""
@@ -85,9 +105,27 @@ class FontUnderline:
     BOLDWAVE        = 18
 
 
-"""https://api.libreoffice.org/docs/idl/ref/namespacecom_1_1sun_1_1star_1_1awt.html#ad249d76933bdf54c35f4eaf51a5b7965"""
-MbType = lo_import.enum('awt.MessageBoxType',
-                    'MESSAGEBOX', 'INFOBOX', 'WARNINGBOX', 'ERRORBOX', 'QUERYBOX')
+class MbType:
+    """https://api.libreoffice.org/docs/idl/ref/namespacecom_1_1sun_1_1star_1_1awt.html#ad249d76933bdf54c35f4eaf51a5b7965"""
+    TYPE_NAME  = 'com.sun.star.awt.MessageBoxType'
+
+    MESSAGEBOX = 'MESSAGEBOX'
+    INFOBOX    = 'INFOBOX'
+    WARNINGBOX = 'WARNINGBOX'
+    ERRORBOX   = 'ERRORBOX'
+    QUERYBOX   = 'QUERYBOX'
+
+class NumberingType:
+    """https://api.libreoffice.org/docs/idl/ref/namespacecom_1_1sun_1_1star_1_1style_1_1NumberingType.html"""
+    CHARS_UPPER_LETTER = 0
+    CHARS_LOWER_LETTER = 1
+    ROMAN_UPPER        = 2
+    ROMAN_LOWER        = 3
+    ARABIC             = 4
+    NUMBER_NONE        = 5
+    CHAR_SPECIAL       = 6  # bullet
+    PAGE_DESCRIPTOR    = 7
+    BITMAP             = 8  # picture bullet
 
 class MbButtons:
     """https://api.libreoffice.org/docs/idl/ref/namespacecom_1_1sun_1_1star_1_1awt_1_1MessageBoxButtons.html"""
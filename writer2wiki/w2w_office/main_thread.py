@@ -0,0 +1,69 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import threading
+
+import unohelper
+# noinspection PyUnresolvedReferences
+from com.sun.star.awt import XCallback
+
+from writer2wiki.w2w_office.service import Service
+
+
+# `isWorker` is set for threads started with `startWorkerThread()`
+_threadState = threading.local()
+
+
+class _MainThreadCall(unohelper.Base, XCallback):
+    """ Function call, which is run by Office's main thread and waited for by a worker thread """
+
+    def __init__(self, function, args):
+        self._function = function
+        self._args = args
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    # methods from XCallback
+    def notify(self, data):
+        try:
+            self._result = self._function(*self._args)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def waitResult(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def startWorkerThread(target, args, name) -> threading.Thread:
+    """ Start daemon thread, which runs `target(*args)` and uses UI only through `callInMainThread()` """
+    def run():
+        _threadState.isWorker = True
+        target(*args)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def callInMainThread(context, function, *args):
+    """ Call `function` in Office's main thread, wait for it and return its result.
+
+        UI (dialogs, clipboard) must be used only from the main thread: VCL doesn't support other threads, it may
+        deadlock or crash. If called not from a worker thread (e.g. from the main thread, or when running from IDE),
+        `function` is called directly.
+    """
+    if not getattr(_threadState, 'isWorker', False):
+        return function(*args)
+
+    call = _MainThreadCall(function, args)
+    Service.create(Service.ASYNC_CALLBACK, context).addCallback(call, None)
+    return call.waitResult()
@@ -0,0 +1,52 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+import logging as log
+import time
+
+
+class ProgressIndicator:
+    """ Conversion progress in document's status bar (frame's XStatusIndicator).
+
+        Each update is a call to Office, so they are throttled by time: the bar is moved at most once in
+        `MIN_UPDATE_INTERVAL` seconds however fast paragraphs are read. Does nothing if document has no frame
+        (e.g. it's opened hidden).
+    """
+
+    MIN_UPDATE_INTERVAL = 0.25
+
+    def __init__(self, document, text, total: int):
+        """ :param total: value of the finished progress, e.g. number of paragraphs """
+        self._total = max(total, 1)
+        self._lastUpdateTime = 0.0
+        self._indicator = None
+
+        controller = document.getCurrentController()
+        if controller is None:
+            return
+
+        try:
+            self._indicator = controller.getFrame().createStatusIndicator()
+            self._indicator.start(text, self._total)
+        except Exception:
+            log.error('failed to create status indicator', exc_info=True)
+            self._indicator = None
+
+    def update(self, value: int):
+        if self._indicator is None:
+            return
+
+        now = time.perf_counter()
+        if now - self._lastUpdateTime < self.MIN_UPDATE_INTERVAL:
+            return
+
+        self._lastUpdateTime = now
+        self._indicator.setValue(min(value, self._total))
+
+    def end(self):
+        if self._indicator is not None:
+            self._indicator.end()
+            self._indicator = None
@@ -4,8 +4,6 @@
 #           http://www.boost.org/LICENSE_1_0.txt)
 
 
-import uno
-
 import functools
 
 # Constants and function are inside class (as opposed to at file's top level) for consistency with other UNO enums
@@ -13,6 +11,7 @@ class Service:
     # paragraph/text services
     TEXT_CONTENT                 = 'com.sun.star.text.TextContent'
     TEXT_TABLE                   = 'com.sun.star.text.TextTable'
+    TEXT_GRAPHIC_OBJECT          = 'com.sun.star.text.TextGraphicObject'
     PARAGRAPH                    = 'com.sun.star.text.Paragraph'
     CHARACTER_PROPERTIES         = 'com.sun.star.style.CharacterProperties'
     CHARACTER_PROPERTIES_ASIAN   = 'com.sun.star.style.CharacterPropertiesAsian'
@@ -26,13 +25,18 @@ class Service:
     DESKTOP            = 'com.sun.star.frame.Desktop'
     SIMPLE_FILE_ACCESS = 'com.sun.star.ucb.SimpleFileAccess'
     TOOLKIT            = 'com.sun.star.awt.Toolkit'
+    GRAPHIC_PROVIDER   = 'com.sun.star.graphic.GraphicProvider'
+    ASYNC_CALLBACK     = 'com.sun.star.awt.AsyncCallback'
 
     TEXT_DOCUMENT = 'com.sun.star.text.TextDocument'
+    TEXT_RANGES   = 'com.sun.star.text.TextRanges'
+    SYSTEM_CLIPBOARD = 'com.sun.star.datatransfer.clipboard.SystemClipboard'
 
     @staticmethod
     # @functools.lru_cache()  # may be useful for optimization, but it should be benchmarked first
     def create(serviceName, context=None):
         if context is None:
+            import uno
             context = uno.getComponentContext()
         return context.ServiceManager.createInstanceWithContext(serviceName, context)
 
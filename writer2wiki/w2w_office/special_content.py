@@ -0,0 +1,105 @@
+#           Copyright Alexander Malahov 2018.
+#  Distributed under the Boost Software License, Version 1.0.
+#     (See accompanying file ../../LICENSE.txt or copy at
+#           http://www.boost.org/LICENSE_1_0.txt)
+
+
+from functools import cmp_to_key
+
+from writer2wiki.w2w_office.lo_enums import TextContentAnchorType
+from writer2wiki.util import iterUnoCollection
+
+
+class SpecialContentIndex:
+    """ Positions of text content, which is not plain text of a paragraph: footnotes, endnotes, fields and frames
+        anchored to characters (they are enumerated as separate text portions).
+
+        Used to find out if paragraph can be read as a plain string, without enumeration of its portions.
+        Paragraphs must be checked in the order they are in the text.
+
+        For a part of text (e.g. range of paragraphs), only content inside it is indexed. Footnotes are numbered in
+        the order of the text, so the ones in the part are found by binary search. Fields and frames are not
+        ordered, all of them are checked.
+    """
+
+    _CHAR_ANCHORS = (TextContentAnchorType.AS_CHARACTER, TextContentAnchorType.AT_CHARACTER)
+
+    def __init__(self, document, textUno, rangeUno=None):
+        """
+        :param textUno: XText, which paragraphs will be checked. Content of other texts (tables, headers, other
+                        footnotes etc) is ignored
+        :param rangeUno: XTextRange of `textUno`, which paragraphs will be checked, None for the whole text
+        """
+        self._text = textUno
+        self._next = 0
+        self._rangeStart = None if rangeUno is None else rangeUno.getStart()
+        self._rangeEnd = None if rangeUno is None else rangeUno.getEnd()
+
+        anchors = []
+        for footnotes in (document.getFootnotes(), document.getEndnotes()):
+            anchors.extend(self._footnoteAnchors(footnotes))
+        anchors.extend(field.getAnchor() for field in iterUnoCollection(document.getTextFields()))
+        for frames in (document.getTextFrames(), document.getGraphicObjects(), document.getEmbeddedObjects()):
+            anchors.extend(frame.getAnchor() for frame in iterUnoCollection(frames)
+                           if frame.AnchorType.value in self._CHAR_ANCHORS)
+
+        anchors = [a for a in anchors if self._isInText(a) and self._isInRange(a)]
+        # compareRegionStarts() is 1 if the first range is before the second one
+        self._anchors = sorted(anchors, key=cmp_to_key(lambda a, b: -self._text.compareRegionStarts(a, b)))
+
+    def _isInText(self, rangeUno):
+        try:
+            self._text.compareRegionStarts(rangeUno, rangeUno)
+            return True
+        except Exception:  # IllegalArgumentException: range is in another text
+            return False
+
+    def _isInRange(self, anchor):
+        # compareRegionStarts() is -1 if the first range is after the second one
+        return self._rangeStart is None or (self._text.compareRegionStarts(anchor, self._rangeStart) != 1
+                                            and self._text.compareRegionStarts(anchor, self._rangeEnd) != -1)
+
+    def _footnoteAnchors(self, footnotes):
+        """ :return Iterable: anchors of footnotes starting from the first one, which may be inside the range """
+        count = footnotes.getCount()
+        first = 0
+        if self._rangeStart is not None:
+            low, high = 0, count
+            try:
+                while low < high:
+                    middle = (low + high) // 2
+                    if self._text.compareRegionStarts(footnotes.getByIndex(middle).getAnchor(), self._rangeStart) == 1:
+                        low = middle + 1
+                    else:
+                        high = middle
+                first = low
+            except Exception:  # IllegalArgumentException: footnote in another text (e.g. table), check all of them
+                first = 0
+
+        for i in range(first, count):
+            anchor = footnotes.getByIndex(i).getAnchor()
+            if self._rangeEnd is not None and self._isInText(anchor) \
+                    and self._text.compareRegionStarts(anchor, self._rangeEnd) == -1:
+                break  # the rest are after the range
+            yield anchor
+
+    def getText(self):
+        return self._text
+
+    def hasSpecialContent(self, paragraphUno) -> bool:
+        paragraphEnd = None
+        while self._next < len(self._anchors):
+            anchor = self._anchors[self._next]
+            if paragraphEnd is None:
+                paragraphEnd = paragraphUno.getEnd()
+
+            if self._text.compareRegionStarts(anchor, paragraphEnd) == -1:
+                return False  # the nearest content is after the paragraph
+
+            if self._text.compareRegionStarts(anchor, paragraphUno.getStart()) == 1:
+                self._next += 1  # content before the paragraph, e.g. in skipped paragraphs
+                continue
+
+            return True
+
+        return False